@@ -0,0 +1,71 @@
+#!/bin/bash
+# PostgreSQL Connection Benchmark Script (Linux/Mac)
+# Serves the API with gunicorn and teaching.settings_postgresql against a
+# local Postgres (DB_* variables, see the settings) and compares the
+# throughput of a new connection per request (the old settings) with
+# persistent connections and, if psycopg_pool is installed, the pool.
+#
+# Usage: ./db-pool-test.sh [requests per endpoint] [concurrency]
+# Run `python manage.py generate_dataset` against the database first.
+
+set -e
+
+REQUESTS=${1:-200}
+CONCURRENCY=${2:-16}
+PORT=${PORT:-8103}
+RESULTS=$(mktemp -d)
+export DJANGO_SETTINGS_MODULE=teaching.settings_postgresql
+export CACHE_LOCATION=${CACHE_LOCATION:-$RESULTS/cache}
+
+cd "$(dirname "$0")/teaching"
+
+SERVER_PID=
+stop_server() {
+    if [ -n "$SERVER_PID" ]; then
+        kill -TERM "$SERVER_PID" 2>/dev/null || true
+        wait "$SERVER_PID" 2>/dev/null || true
+        SERVER_PID=
+    fi
+}
+trap stop_server EXIT
+
+wait_for() {
+    for _ in $(seq 1 60); do
+        if python -c "import urllib.request; urllib.request.urlopen('http://127.0.0.1:$PORT/api/course-types/', timeout=2)" 2>/dev/null; then
+            return 0
+        fi
+        sleep 1
+    done
+    echo "❌ Server on port $PORT did not start"
+    exit 1
+}
+
+# run NAME [benchmark_api options...] - with the DB_* variables of the caller
+run() {
+    local name=$1
+    shift
+    echo ""
+    echo "🔌 $name"
+    GUNICORN_BIND="127.0.0.1:$PORT" GUNICORN_ACCESS_LOG="$RESULTS/$name.access.log" \
+        gunicorn -c gunicorn.conf.py > "$RESULTS/$name.log" 2>&1 &
+    SERVER_PID=$!
+    wait_for
+    python manage.py benchmark_api --url "http://127.0.0.1:$PORT" \
+        --requests "$REQUESTS" --concurrency "$CONCURRENCY" --save "$RESULTS/$name.json" "$@"
+    # Connections are per worker: this is the last scraped worker's view.
+    python -c "import urllib.request; print(urllib.request.urlopen('http://127.0.0.1:$PORT/api/_metrics').read().decode())" \
+        | grep -E '^api_db_(connections|pool_(pool_size|requests_num|requests_wait_ms|connections_num))' || true
+    stop_server
+}
+
+DB_POOL=false DB_CONN_MAX_AGE=0 run no-persistence
+DB_POOL=false DB_CONN_MAX_AGE=600 run persistent --compare "$RESULTS/no-persistence.json"
+if python -c "import psycopg, psycopg_pool" 2>/dev/null; then
+    DB_POOL=true run pool --compare "$RESULTS/no-persistence.json"
+else
+    echo ""
+    echo "⏭️  psycopg_pool is not installed (pip install 'psycopg[binary,pool]'), skipping the pool"
+fi
+
+echo ""
+echo "📋 Results and server logs: $RESULTS"
@@ -6,6 +6,8 @@ const apiUrl = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
 const api = axios.create({
    baseURL: import.meta.env.VITE_API_URL ? import.meta.env.VITE_API_URL : apiUrl,
+   // List endpoints are keyset-paginated; the UI still expects plain arrays
+   params: { paginate: 'false' },
 });
 
 // Helper function to check if token is valid
@@ -44,14 +44,9 @@ function SearchBar({ onSearch, onFilterChange }) {
   const [loading, setLoading] = useState(false);
   const isInitialMount = useRef(true);
 
-  // Fetch teachers on component mount
+  // Fetch all filter options (with course counts) on component mount
   useEffect(() => {
-    fetchTeachers();
-    fetchCourseTypes();
-    fetchInstitutes();
-    fetchDepartments();
-    fetchStudyPrograms();
-    fetchSemesters();
+    fetchFacets();
   }, []);
 
   // Fetch curriculum subjects when study programs change
@@ -99,64 +94,25 @@ function SearchBar({ onSearch, onFilterChange }) {
     }
   }, [query, selectedTeachers, selectedCourseTypes, selectedInstitutes, selectedDepartments, selectedStudyPrograms, selectedCurriculumSubjects, selectedStudySubjects, selectedSemesters, genderDiversityFilter, onFilterChange]);
 
-  const fetchTeachers = async () => {
+  const fetchFacets = async () => {
     try {
       setLoading(true);
-      const response = await api.get('/api/teachers/');
-      setTeachers(response.data);
-      console.log("Fetched teachers:", response.data);
+      // One request returns every dropdown's options with course counts
+      const response = await api.get('/api/courses/facets/');
+      const { facets } = response.data;
+      setTeachers(facets.teacher);
+      setCourseTypes(facets.type);
+      setInstitutes(facets.institute);
+      setDepartments(facets.department);
+      setStudyPrograms(facets.study_program);
+      setSemesters(facets.semester);
     } catch (error) {
-      console.error("Error fetching teachers:", error);
+      console.error("Error fetching filter options:", error);
     } finally {
       setLoading(false);
     }
   };
 
-  const fetchCourseTypes = async () => {
-    try {
-      const response = await api.get('/api/course-types/');
-      setCourseTypes(response.data);
-    } catch (error) {
-      console.error("Error fetching course types:", error);
-    }
-  };
-
-  const fetchInstitutes = async () => {
-    try {
-      const response = await api.get('/api/institutes/');
-      setInstitutes(response.data);
-    } catch (error) {
-      console.error("Error fetching institutes:", error);
-    }
-  };
-
-  const fetchDepartments = async () => {
-    try {
-      const response = await api.get('/api/departments/');
-      setDepartments(response.data);
-    } catch (error) {
-      console.error("Error fetching departments:", error);
-    }
-  };
-
-  const fetchStudyPrograms = async () => {
-    try {
-      const response = await api.get('/api/study-programs/');
-      setStudyPrograms(response.data);
-    } catch (error) {
-      console.error("Error fetching study programs:", error);
-    }
-  };
-
-  const fetchSemesters = async () => {
-    try {
-      const response = await api.get('/api/semesters/');
-      setSemesters(response.data);
-    } catch (error) {
-      console.error("Error fetching semesters:", error);
-    }
-  };
-
   const fetchCurriculumSubjects = async () => {
     try {
       // Filter curriculum subjects by selected study programs
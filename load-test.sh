@@ -0,0 +1,62 @@
+#!/bin/bash
+# Local Load Test Script (Linux/Mac)
+# Compares the throughput of the development server (runserver, as the
+# container used to run) with gunicorn using teaching/gunicorn.conf.py.
+#
+# Usage: ./load-test.sh [requests per endpoint] [concurrency]
+# Run `python manage.py generate_dataset` first for production-sized data.
+
+set -e
+
+REQUESTS=${1:-200}
+CONCURRENCY=${2:-16}
+RUNSERVER_PORT=${RUNSERVER_PORT:-8101}
+GUNICORN_PORT=${GUNICORN_PORT:-8102}
+RESULTS=$(mktemp -d)
+# Both servers use the file cache shared by workers, as in the container.
+export CACHE_LOCATION=${CACHE_LOCATION:-$RESULTS/cache}
+
+cd "$(dirname "$0")/teaching"
+
+SERVER_PID=
+stop_server() {
+    if [ -n "$SERVER_PID" ]; then
+        kill -TERM "$SERVER_PID" 2>/dev/null || true
+        wait "$SERVER_PID" 2>/dev/null || true
+        SERVER_PID=
+    fi
+}
+trap stop_server EXIT
+
+wait_for() {
+    for _ in $(seq 1 60); do
+        if python -c "import urllib.request; urllib.request.urlopen('http://127.0.0.1:$1/api/course-types/', timeout=2)" 2>/dev/null; then
+            return 0
+        fi
+        sleep 1
+    done
+    echo "❌ Server on port $1 did not start"
+    exit 1
+}
+
+echo "🐢 Starting runserver on port $RUNSERVER_PORT..."
+python manage.py runserver "127.0.0.1:$RUNSERVER_PORT" > "$RESULTS/runserver.log" 2>&1 &
+SERVER_PID=$!
+wait_for "$RUNSERVER_PORT"
+python manage.py benchmark_api --url "http://127.0.0.1:$RUNSERVER_PORT" \
+    --requests "$REQUESTS" --concurrency "$CONCURRENCY" --save "$RESULTS/runserver.json"
+stop_server
+
+echo ""
+echo "🚀 Starting gunicorn on port $GUNICORN_PORT..."
+GUNICORN_BIND="127.0.0.1:$GUNICORN_PORT" GUNICORN_ACCESS_LOG="$RESULTS/gunicorn.access.log" \
+    gunicorn -c gunicorn.conf.py > "$RESULTS/gunicorn.log" 2>&1 &
+SERVER_PID=$!
+wait_for "$GUNICORN_PORT"
+python manage.py benchmark_api --url "http://127.0.0.1:$GUNICORN_PORT" \
+    --requests "$REQUESTS" --concurrency "$CONCURRENCY" --compare "$RESULTS/runserver.json" \
+    --save "$RESULTS/gunicorn.json"
+stop_server
+
+echo ""
+echo "📋 Results and server logs: $RESULTS"
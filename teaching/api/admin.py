@@ -1,8 +1,189 @@
+from django import forms
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import connections, DatabaseError
+from django.db.models import Prefetch
+from django.utils.functional import cached_property
 from .models import Course, CourseType, StudyProgram, Teacher, Department, Curicculum, Institute, Semester, CurriculumSubject, StudySubject
 
 # Register your models here.
 
+class RelatedChoicesMixin:
+    """
+    Join the relations read by ``__str__`` of foreign key choices.
+
+    ``CurriculumSubject`` and ``StudySubject`` include their parent's
+    name in ``__str__``; without a join every option of their select
+    boxes costs a query.
+    """
+    choices_select_related = {
+        CurriculumSubject: ('study_program',),
+        StudySubject: ('curriculum_subject',),
+    }
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        related = self.choices_select_related.get(db_field.related_model)
+        if formfield is not None and related and hasattr(formfield, 'queryset'):
+            formfield.queryset = formfield.queryset.select_related(*related)
+        return formfield
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    Related field filter rendered as an autocomplete box.
+
+    Unlike ``RelatedFieldListFilter`` it doesn't load every option into
+    the sidebar: only the selected object is fetched, other options are
+    searched through the admin's autocomplete view (the related model's
+    admin needs ``search_fields``).
+    """
+    template = 'admin/api/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f'{field_path}__{field.target_field.name}__exact'
+        self.lookup_val = params.get(self.lookup_kwarg)
+        self.admin_site = model_admin.admin_site
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.title = getattr(field, 'verbose_name', field_path)
+
+    def has_output(self):
+        return True
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def choices(self, changelist):
+        value = self.lookup_val[-1] if self.lookup_val else None
+        field = forms.ModelChoiceField(
+            queryset=self.field.related_model._default_manager.all(),
+            widget=AutocompleteSelect(self.field, self.admin_site, attrs={
+                # Clearing the box submits the form without this parameter.
+                'onchange': 'this.disabled = !this.value; this.form.submit();',
+                'style': 'width: 100%',
+            }),
+            required=False,
+        )
+        yield {
+            'selected': value is not None,
+            'widget': field.widget.render(self.lookup_kwarg, value),
+            'params': [
+                (name, param) for name, param in changelist.params.items() if name != self.lookup_kwarg
+            ],
+            'clear_query_string': changelist.get_query_string(remove=[self.lookup_kwarg]),
+        }
+
+
+def estimate_count(queryset):
+    """
+    Row count of the queryset's table from the planner statistics, or
+    None when there are none (PostgreSQL ``pg_class.reltuples``, SQLite
+    ``sqlite_stat1`` after ``ANALYZE``).
+    """
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+            elif connection.vendor == 'sqlite':
+                # ``stat`` starts with the row count of the index (or of the
+                # table, for ``idx IS NULL``); partial indexes cover fewer rows.
+                cursor.execute(
+                    'SELECT MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 WHERE tbl = %s AND ('
+                    'idx IS NULL OR idx NOT IN (SELECT name FROM pragma_index_list(%s) WHERE partial))',
+                    [table, table],
+                )
+            else:
+                return None
+            row = cursor.fetchone()
+    except DatabaseError:
+        # e.g. no sqlite_stat1 before the first ANALYZE
+        return None
+    if row is None or row[0] is None:
+        return None
+    estimate = int(row[0])
+    return estimate if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that takes the unfiltered count of large tables from the
+    planner statistics instead of a ``COUNT(*)`` over the whole table.
+    Filtered (searched) lists and small tables are counted exactly.
+    """
+    exact_below = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_count(queryset)
+            if estimate is not None and estimate >= self.exact_below:
+                return estimate
+        return super().count
+
+
+class PerformanceModeMixin:
+    """
+    Changelist settings for large tables, on while
+    ``settings.ADMIN_PERFORMANCE_MODE`` is true (the default):
+
+    - ``performance_select_related`` joined and ``performance_prefetch``
+      prefetched instead of queried per row
+    - ``autocomplete_filters`` rendered with ``AutocompleteFilter``
+    - the unfiltered result count estimated (``EstimatedCountPaginator``)
+    - no second ``COUNT(*)`` for the "N total" link
+      (``show_full_result_count``)
+    """
+    performance_select_related = ()
+    performance_prefetch = ()
+    autocomplete_filters = ()
+
+    @property
+    def performance_mode(self):
+        return getattr(settings, 'ADMIN_PERFORMANCE_MODE', True)
+
+    @property
+    def show_full_result_count(self):
+        return not self.performance_mode
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if self.performance_mode and self.performance_prefetch:
+            queryset = queryset.prefetch_related(*self.performance_prefetch)
+        return queryset
+
+    def get_list_select_related(self, request):
+        if self.performance_mode and self.performance_select_related:
+            return list(self.performance_select_related)
+        return super().get_list_select_related(request)
+
+    def get_list_filter(self, request):
+        list_filter = super().get_list_filter(request)
+        if not self.performance_mode:
+            return list_filter
+        return [
+            (name, AutocompleteFilter) if name in self.autocomplete_filters else name
+            for name in list_filter
+        ]
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        if self.performance_mode:
+            return EstimatedCountPaginator(queryset, per_page, orphans, allow_empty_first_page)
+        return super().get_paginator(request, queryset, per_page, orphans, allow_empty_first_page)
+
+    @property
+    def media(self):
+        media = super().media
+        if self.performance_mode and self.autocomplete_filters:
+            field = self.model._meta.get_field(self.autocomplete_filters[0])
+            media += AutocompleteSelect(field, self.admin_site).media
+        return media
+
+
 @admin.register(CourseType)
 class CourseTypeAdmin(admin.ModelAdmin):
     list_display = ['name', 'description']
@@ -29,16 +210,19 @@ class TeacherAdmin(admin.ModelAdmin):
     ordering = ['name']
 
 @admin.register(Course)
-class CourseAdmin(admin.ModelAdmin):
+class CourseAdmin(PerformanceModeMixin, RelatedChoicesMixin, admin.ModelAdmin):
     list_display = ['course_code', 'title', 'type', 'teacher', 'institute', 'department', 'study_program', 'get_semesters', 'year', 'credits', 'gender_diversity']
     list_filter = ['type', 'teacher', 'institute', 'department', 'study_program', 'semesters', 'year', 'gender_diversity']
+    performance_select_related = ['type', 'teacher', 'institute', 'department', 'study_program']
+    performance_prefetch = [Prefetch('semesters', queryset=Semester.objects.only('id', 'name'))]
+    autocomplete_filters = ['teacher', 'semesters']
     search_fields = ['course_code', 'title', 'description']
     date_hierarchy = 'start_date'
     ordering = ['course_code', 'title']
     filter_horizontal = ['semesters']  # For many-to-many semester relationship
     
     def get_semesters(self, obj):
-        """Display all semesters for this course"""
+        """Display all semesters for this course (prefetched in performance mode)"""
         return ", ".join([semester.name for semester in obj.semesters.all()])
     get_semesters.short_description = 'Semesters'
     
@@ -112,13 +296,17 @@ class SemesterAdmin(admin.ModelAdmin):
 @admin.register(CurriculumSubject)
 class CurriculumSubjectAdmin(admin.ModelAdmin):
     list_display = ['name', 'study_program', 'credits', 'semester_number', 'is_mandatory']
+    list_select_related = ['study_program']
     search_fields = ['name', 'study_program__name']
     list_filter = ['study_program', 'semester_number', 'is_mandatory']
     ordering = ['study_program__name', 'semester_number', 'name']
 
 @admin.register(StudySubject)
-class StudySubjectAdmin(admin.ModelAdmin):
+class StudySubjectAdmin(RelatedChoicesMixin, admin.ModelAdmin):
     list_display = ['name', 'curriculum_subject', 'credits', 'hours_per_week', 'subject_type']
+    # ``curriculum_subject`` is shown with its study program's name; only
+    # join that instead of every non-null foreign key chain.
+    list_select_related = ['curriculum_subject__study_program']
     search_fields = ['name', 'curriculum_subject__name']
     list_filter = ['curriculum_subject__study_program', 'subject_type']
     ordering = ['curriculum_subject__name', 'name']
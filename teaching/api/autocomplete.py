@@ -0,0 +1,311 @@
+"""
+Autocomplete Index
+==================
+
+In-process index answering search-as-you-type queries over
+``Course.title``, ``Course.course_code`` and ``Teacher.name``.
+
+- Prefix matches come from a sorted term list searched with ``bisect``
+  (the flattened equivalent of a trie), so a lookup is O(log n + k).
+- Fuzzy matches (typos, transpositions) come from a trigram index,
+  scored by the share of the query's trigrams found in the label.
+
+The index is built once per process (``warm_up`` is called from the
+WSGI/ASGI entry points, and lazily on first use otherwise) and updated
+incrementally by the ``post_save``/``post_delete`` handlers in
+``api.signals`` and by ``api.bulk.after_bulk_write``.
+
+Every worker process has its own index, so changes are also published
+as a version counter in the shared cache (``publish_change``). Queries
+compare it with the index's version at most every
+``AUTOCOMPLETE_REFRESH_INTERVAL`` seconds, and a process that sees the
+counter moved (``import_catalog``, ``generate_dataset``, writes in
+other workers) rebuilds. A process whose own increment was the only
+change since its index's version applies it in place and keeps
+serving; that needs an atomic ``incr`` (memcached, redis). The file
+and database caches implement ``incr`` as a get and a set, which can
+lose a concurrent increment, so there every change, including the
+process's own, leads to a rebuild.
+"""
+
+import bisect
+import logging
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache, caches, DEFAULT_CACHE_ALIAS
+from django.core.cache.backends.base import BaseCache
+from django.db import connections, DatabaseError
+
+
+logger = logging.getLogger(__name__)
+
+COURSE = 'course'
+TEACHER = 'teacher'
+
+# Upper bound on prefix candidates examined for very short queries.
+MAX_PREFIX_SCAN = 2000
+FUZZY_THRESHOLD = 0.5
+
+VERSION_KEY = 'api:autocomplete:version'
+
+# ``whole`` holds the normalized label and code; ``terms`` adds every word.
+Entry = namedtuple('Entry', ['kind', 'id', 'label', 'code', 'whole', 'terms', 'trigrams'])
+
+
+def normalize(text):
+    """Lowercase and strip diacritics so 'Übung' matches 'ubung'."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(text.casefold().split())
+
+
+def trigrams(text):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _initial_version():
+    # Time based, so a counter lost to eviction never reuses an old value.
+    return int(time.time() * 1000)
+
+
+def get_shared_version():
+    """The version of the courses and teachers in the database."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _initial_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def has_atomic_incr():
+    """Whether concurrent ``publish_change`` calls can't share a version."""
+    return type(caches[DEFAULT_CACHE_ALIAS]).incr is not BaseCache.incr
+
+
+def publish_change():
+    """
+    Tell every process that courses or teachers changed (after commit).
+    Returns ``(previous, new)`` versions.
+    """
+    previous = cache.get(VERSION_KEY)
+    try:
+        return previous, cache.incr(VERSION_KEY)
+    except ValueError:
+        version = _initial_version()
+        cache.set(VERSION_KEY, version, timeout=None)
+        return previous, version
+
+
+class AutocompleteIndex:
+    """Thread-safe prefix + trigram index of courses and teachers."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._rebuild_lock = threading.Lock()
+        self._built = False
+        # ``get_shared_version()`` the index reflects
+        self._version = None
+        # ``time.monotonic()`` of the last comparison with it
+        self._checked = None
+        self._entries = {}
+        self._terms = []
+        self._trigrams = defaultdict(set)
+
+    @property
+    def is_built(self):
+        return self._built
+
+    def build(self):
+        """(Re)load every course and teacher from the database."""
+        from .models import Course, Teacher
+
+        # Read before the rows: a change committed meanwhile moves the
+        # version past this one and triggers another build.
+        version = get_shared_version()
+        entries = [
+            self._make_entry(COURSE, pk, title, code)
+            for pk, title, code in Course.objects.values_list('id', 'title', 'course_code').iterator()
+        ]
+        entries += [
+            self._make_entry(TEACHER, pk, name)
+            for pk, name in Teacher.objects.values_list('id', 'name').iterator()
+        ]
+
+        terms = []
+        grams = defaultdict(set)
+        for entry in entries:
+            key = (entry.kind, entry.id)
+            terms.extend((term, key) for term in entry.terms)
+            for gram in entry.trigrams:
+                grams[gram].add(key)
+        terms.sort()
+
+        with self._lock:
+            self._entries = {(entry.kind, entry.id): entry for entry in entries}
+            self._terms = terms
+            self._trigrams = grams
+            self._version = version
+            self._checked = time.monotonic()
+            self._built = True
+        return len(entries)
+
+    def ensure_built(self):
+        if not self._built:
+            with self._lock:
+                if not self._built:
+                    self.build()
+
+    def refresh(self):
+        """
+        Rebuild if another process published a change since the index was
+        built, checking at most every ``AUTOCOMPLETE_REFRESH_INTERVAL``
+        seconds. While one thread rebuilds, the others keep answering from
+        the current index.
+        """
+        if not self._built:
+            return
+        now = time.monotonic()
+        if self._checked is not None and now - self._checked < getattr(settings, 'AUTOCOMPLETE_REFRESH_INTERVAL', 1.0):
+            return
+        self._checked = now
+        if get_shared_version() == self._version:
+            return
+        if self._rebuild_lock.acquire(blocking=False):
+            try:
+                self.build()
+            finally:
+                self._rebuild_lock.release()
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._terms = []
+            self._trigrams = defaultdict(set)
+            self._version = None
+            self._checked = None
+            self._built = False
+
+    def add(self, kind, pk, label, code=None):
+        """Insert or replace one entry and publish the change."""
+        self.add_many(kind, [(pk, label, code)])
+
+    def add_many(self, kind, rows):
+        """Insert or replace ``(pk, label, code)`` rows and publish the change once."""
+        if self._built:
+            entries = [self._make_entry(kind, pk, label, code) for pk, label, code in rows]
+            with self._lock:
+                for entry in entries:
+                    key = (kind, entry.id)
+                    self._remove_locked(key)
+                    self._entries[key] = entry
+                    for term in entry.terms:
+                        bisect.insort(self._terms, (term, key))
+                    for gram in entry.trigrams:
+                        self._trigrams[gram].add(key)
+        self._published(*publish_change())
+
+    def remove(self, kind, pk):
+        """Remove one entry and publish the change."""
+        if self._built:
+            with self._lock:
+                self._remove_locked((kind, pk))
+        self._published(*publish_change())
+
+    def _published(self, previous, version):
+        # Still current if ours was the only change since the index's
+        # version. Otherwise the next check sees the counter moved.
+        if not has_atomic_incr():
+            return
+        with self._lock:
+            if self._built and previous == self._version and version == previous + 1:
+                self._version = version
+
+    def _remove_locked(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for term in entry.terms:
+            index = bisect.bisect_left(self._terms, (term, key))
+            if index < len(self._terms) and self._terms[index] == (term, key):
+                del self._terms[index]
+        for gram in entry.trigrams:
+            keys = self._trigrams.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._trigrams[gram]
+
+    @staticmethod
+    def _make_entry(kind, pk, label, code=None):
+        label = label or ''
+        normalized = normalize(label)
+        whole = {normalized, normalize(code)} - {''}
+        terms = whole | set(normalized.split())
+        return Entry(
+            kind, pk, label, code, frozenset(whole), tuple(sorted(terms)),
+            frozenset(trigrams(normalized)),
+        )
+
+    def query(self, text, limit=10, kinds=None):
+        """
+        Return up to ``limit`` ``(score, entry)`` pairs, best first.
+
+        Prefix hits score 2-3 (whole label or code > word), fuzzy hits
+        score the share of query trigrams they contain (0.5-1).
+        """
+        self.ensure_built()
+        self.refresh()
+        needle = normalize(text)
+        if not needle:
+            return []
+
+        scores = {}
+        with self._lock:
+            start = bisect.bisect_left(self._terms, (needle,))
+            for term, key in self._terms[start:start + MAX_PREFIX_SCAN]:
+                if not term.startswith(needle):
+                    break
+                if kinds and key[0] not in kinds:
+                    continue
+                score = 3.0 if term in self._entries[key].whole else 2.0
+                if score > scores.get(key, 0):
+                    scores[key] = score
+
+            if len(scores) < limit and len(needle) >= 3:
+                needle_grams = trigrams(needle)
+                shared = Counter()
+                for gram in needle_grams:
+                    for key in self._trigrams.get(gram, ()):
+                        if key not in scores and (not kinds or key[0] in kinds):
+                            shared[key] += 1
+                for key, count in shared.items():
+                    similarity = count / len(needle_grams)
+                    if similarity >= FUZZY_THRESHOLD:
+                        scores[key] = similarity
+
+            ranked = sorted(
+                scores.items(),
+                key=lambda item: (-item[1], len(self._entries[item[0]].label), self._entries[item[0]].label),
+            )
+            return [(score, self._entries[key]) for key, score in ranked[:limit]]
+
+
+autocomplete_index = AutocompleteIndex()
+
+
+def warm_up():
+    """Build the index at process start; failures fall back to lazy build."""
+    try:
+        count = autocomplete_index.build()
+    except DatabaseError as exc:
+        logger.warning('Autocomplete index not built at startup: %s', exc)
+    else:
+        logger.info('Autocomplete index built with %d entries', count)
+    finally:
+        # Don't hand a connection opened at import time to forked workers.
+        connections.close_all()
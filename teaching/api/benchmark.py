@@ -0,0 +1,227 @@
+"""
+API Benchmark
+=============
+
+A small locust-style load runner for the read endpoints, used by the
+``benchmark_api`` management command.
+
+``discover_endpoints`` builds the list, detail and filter URLs from ids
+sampled in the current database (e.g. a ``generate_dataset`` catalog).
+Each endpoint is requested a fixed number of times, either in process
+through the Django test client (``InProcessRunner``, which also counts
+the SQL queries of every request) or over HTTP against a running server
+with concurrent workers (``HTTPRunner``, which reads the query count
+from the ``X-Query-Count`` header when ``METRICS_HEADERS`` is on).
+
+Results are summarized as p50/p95/p99 latencies, queries per request
+and throughput, and can be saved as JSON to compare two commits.
+"""
+
+import json
+import math
+import statistics
+import subprocess
+import time
+import urllib.error
+import urllib.request
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.test import Client
+from django.urls import resolve, reverse
+from rest_framework.permissions import AllowAny
+
+from .middleware import QueryStats
+from .models import (
+    Course, CourseType, CurriculumSubject, Department, Institute, Semester, StudyProgram,
+    StudySubject, Teacher,
+)
+
+
+Endpoint = namedtuple('Endpoint', 'name path')
+
+# (URL name prefix, model) of the plain list + detail endpoints.
+RESOURCES = (
+    ('course', Course),
+    ('course-type', CourseType),
+    ('teacher', Teacher),
+    ('institute', Institute),
+    ('department', Department),
+    ('study-program', StudyProgram),
+    ('semester', Semester),
+    ('curriculum-subject', CurriculumSubject),
+    ('study-subject', StudySubject),
+)
+
+
+def _url(name, *args, **params):
+    path = reverse(name, args=args)
+    return f'{path}?{urlencode(params, doseq=True)}' if params else path
+
+
+def _is_public(path):
+    view = resolve(path.split('?')[0]).func.view_class
+    return AllowAny in getattr(view, 'permission_classes', ())
+
+
+def discover_endpoints(using=DEFAULT_DB_ALIAS):
+    """
+    Return the anonymous ``Endpoint`` list, with ids sampled from the
+    middle of each table.
+    """
+    endpoints = []
+    samples = {}
+    for prefix, model in RESOURCES:
+        rows = model.objects.using(using).order_by('pk')
+        count = rows.count()
+        endpoints.append(Endpoint(f'{prefix}-list', _url(f'{prefix}-list')))
+        if count:
+            samples[prefix] = rows[count // 2]
+            detail = _url(f'{prefix}-detail', samples[prefix].pk)
+            if _is_public(detail):
+                endpoints.append(Endpoint(f'{prefix}-detail', detail))
+
+    course = samples.get('course')
+    if course is not None:
+        semester_id = course.semesters.values_list('pk', flat=True).first()
+        filters = {
+            'teacher': course.teacher_id, 'type': course.type_id, 'institute': course.institute_id,
+            'department': course.department_id, 'study_program': course.study_program_id,
+            'semester': semester_id,
+        }
+        for param, value in filters.items():
+            if value is not None:
+                endpoints.append(Endpoint(f'course-list?{param}', _url('course-list', **{param: value})))
+        endpoints.append(Endpoint('course-list?gender_diversity', _url('course-list', gender_diversity='true')))
+        word = course.title.split()[0]
+        endpoints += [
+            Endpoint('course-list?search', _url('course-list', search=word)),
+            Endpoint(
+                'course-list?combined',
+                _url('course-list', institute=course.institute_id, type=course.type_id, semester=semester_id),
+            ),
+            Endpoint('course-facets', _url('course-facets', institute=course.institute_id)),
+            Endpoint('autocomplete', _url('autocomplete', q=word[:3])),
+        ]
+    if 'teacher' in samples:
+        endpoints.append(Endpoint('teacher-list?search', _url('teacher-list', search=samples['teacher'].name.split()[0])))
+    endpoints.append(Endpoint('hierarchy', _url('hierarchy')))
+    if 'institute' in samples:
+        endpoints.append(Endpoint('hierarchy-subtree', _url('hierarchy-subtree', 'institutes', samples['institute'].pk)))
+    return endpoints
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of ``values``."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def summarize(timings, queries, errors, elapsed):
+    """Result row of one endpoint; ``timings`` in seconds."""
+    ms = [timing * 1000 for timing in timings]
+    return {
+        'requests': len(timings),
+        'errors': errors,
+        'p50_ms': percentile(ms, 50),
+        'p95_ms': percentile(ms, 95),
+        'p99_ms': percentile(ms, 99),
+        'mean_ms': statistics.fmean(ms) if ms else None,
+        'queries': statistics.fmean(queries) if queries else None,
+        'rps': len(timings) / elapsed if elapsed else None,
+    }
+
+
+class InProcessRunner:
+    """Requests every endpoint through the Django test client, counting SQL queries."""
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.client = Client(HTTP_HOST='localhost')
+        self.using = using
+
+    def request(self, path):
+        """Return ``(seconds, queries, ok)`` for one GET."""
+        stats = QueryStats()
+        with connections[self.using].execute_wrapper(stats):
+            start = time.perf_counter()
+            response = self.client.get(path)
+            duration = time.perf_counter() - start
+        return duration, stats.count, response.status_code == 200
+
+    def run(self, endpoint, requests, warmup=1):
+        for _ in range(warmup):
+            self.request(endpoint.path)
+        timings, queries, errors = [], [], 0
+        start = time.perf_counter()
+        for _ in range(requests):
+            duration, count, ok = self.request(endpoint.path)
+            timings.append(duration)
+            queries.append(count)
+            errors += not ok
+        return summarize(timings, queries, errors, time.perf_counter() - start)
+
+
+class HTTPRunner:
+    """Requests every endpoint of a running server from ``concurrency`` threads."""
+
+    def __init__(self, base_url, concurrency=1, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    def request(self, path):
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(self.base_url + path, timeout=self.timeout) as response:
+                response.read()
+                count = response.headers.get('X-Query-Count')
+                ok = response.status == 200
+        except (urllib.error.URLError, OSError):
+            count, ok = None, False
+        return time.perf_counter() - start, int(count) if count is not None else None, ok
+
+    def run(self, endpoint, requests, warmup=1):
+        for _ in range(warmup):
+            self.request(endpoint.path)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            results = list(pool.map(self.request, [endpoint.path] * requests))
+        elapsed = time.perf_counter() - start
+        timings = [duration for duration, _, _ in results]
+        queries = [count for _, count, _ in results if count is not None]
+        errors = sum(not ok for _, _, ok in results)
+        return summarize(timings, queries, errors, elapsed)
+
+
+def run_benchmark(runner, endpoints, requests, warmup=1, log=None):
+    """Return ``{endpoint name: result}`` in endpoint order."""
+    results = {}
+    for endpoint in endpoints:
+        results[endpoint.name] = runner.run(endpoint, requests, warmup)
+        if log:
+            log(endpoint, results[endpoint.name])
+    return results
+
+
+def git_revision():
+    """Short hash of the checked out commit (None outside a git checkout)."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_report(path, results, **meta):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'revision': git_revision(), **meta, 'results': results}, file, indent=2)
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
@@ -0,0 +1,281 @@
+"""
+Bulk Course Writes
+==================
+
+Set-based create/update/delete for ``/api/courses/bulk/``.
+
+A batch is validated as a whole before anything is written:
+
+- field validation per item (types, lengths, ``Course.clean()``) without
+  touching the database
+- foreign keys and ``semesters`` checked with one ``pk IN (...)`` query
+  per related model
+- ``course_code`` uniqueness checked with one ``course_code IN (...)``
+  query plus an in-memory check for duplicates inside the batch
+
+If any item is invalid nothing is written and the errors are returned
+per item, aligned with the input (``{}`` for valid items). Valid batches
+are written with ``bulk_create``/``bulk_update`` and one bulk insert of
+``semesters`` rows inside a single transaction.
+
+``bulk_create``/``bulk_update`` bypass the model signals, so the search
+index, autocomplete index and cache versions are updated here. Deletes
+go through ``QuerySet.delete()`` and its signals.
+"""
+
+from collections import Counter
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .autocomplete import autocomplete_index, COURSE
+from .caching import bump_model_version
+from .models import Course, Semester
+from .search import get_search_backend
+
+
+BATCH_SIZE = 500
+MAX_ITEMS = 5000
+
+# Input name -> related model for the foreign keys accepted by the API.
+FOREIGN_KEYS = {
+    field.name: field.related_model
+    for field in Course._meta.concrete_fields
+    if field.many_to_one
+}
+
+
+class BulkError(Exception):
+    """Raised with per-item ``errors`` (aligned with the input) or a message."""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+class CourseBulkItemSerializer(serializers.ModelSerializer):
+    """
+    Validates one course of a bulk payload without database queries.
+
+    Foreign keys are plain integers and ``course_code`` has no
+    ``UniqueValidator``; both are checked set-based for the whole batch.
+    """
+    id = serializers.IntegerField(required=False)
+    course_code = serializers.CharField(max_length=10)
+    semesters = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    class Meta:
+        model = Course
+        exclude = ['updated_at']
+
+    def build_field(self, field_name, info, model_class, nested_depth):
+        if field_name in FOREIGN_KEYS:
+            return serializers.IntegerField, {'source': f'{field_name}_id', 'required': False, 'allow_null': True}
+        return super().build_field(field_name, info, model_class, nested_depth)
+
+
+def _validate_items(items, instances=None):
+    """
+    Validate ``items`` field by field and return ``(validated, errors)``.
+
+    ``instances`` (for updates) maps ids to the current rows; items are
+    applied on top of them as partial updates.
+    """
+    if not isinstance(items, list):
+        raise BulkError({'non_field_errors': ['Expected a list of items.']})
+    if len(items) > MAX_ITEMS:
+        raise BulkError({'non_field_errors': [f'At most {MAX_ITEMS} items per request.']})
+
+    validated, errors = [], []
+    for item in items:
+        serializer = CourseBulkItemSerializer(data=item, partial=instances is not None)
+        if not serializer.is_valid():
+            validated.append(None)
+            errors.append(dict(serializer.errors))
+            continue
+        data = dict(serializer.validated_data)
+        data.pop('id', None)
+        if instances is not None:
+            pk = item.get('id') if isinstance(item, dict) else None
+            instance = instances.get(pk)
+            if instance is None:
+                validated.append(None)
+                errors.append({'id': ['Course not found.' if pk is not None else 'This field is required.']})
+                continue
+        else:
+            instance = Course()
+        semesters = data.pop('semesters', None)
+        for attr, value in data.items():
+            setattr(instance, attr, value)
+        try:
+            # Foreign keys and uniqueness are checked set-based below.
+            instance.full_clean(
+                exclude=list(FOREIGN_KEYS),
+                validate_unique=False,
+                validate_constraints=False,
+            )
+        except DjangoValidationError as exc:
+            validated.append(None)
+            errors.append(exc.message_dict)
+            continue
+        validated.append((instance, semesters, set(data)))
+        errors.append({})
+    return validated, errors
+
+
+def _check_references(validated, errors):
+    """Check every referenced id exists, one query per related model."""
+    wanted = {name: set() for name in FOREIGN_KEYS}
+    wanted_semesters = set()
+    for entry in validated:
+        if entry is None:
+            continue
+        instance, semesters, _ = entry
+        for name in FOREIGN_KEYS:
+            value = getattr(instance, f'{name}_id')
+            if value is not None:
+                wanted[name].add(value)
+        wanted_semesters.update(semesters or ())
+
+    existing = {}
+    for name, ids in wanted.items():
+        model = FOREIGN_KEYS[name]
+        existing[name] = set(model.objects.filter(pk__in=ids).values_list('pk', flat=True)) if ids else set()
+    existing_semesters = (
+        set(Semester.objects.filter(pk__in=wanted_semesters).values_list('pk', flat=True))
+        if wanted_semesters else set()
+    )
+
+    for index, entry in enumerate(validated):
+        if entry is None:
+            continue
+        instance, semesters, _ = entry
+        for name in FOREIGN_KEYS:
+            value = getattr(instance, f'{name}_id')
+            if value is not None and value not in existing[name]:
+                errors[index].setdefault(name, []).append(f'Invalid pk "{value}" - object does not exist.')
+        missing = sorted(set(semesters or ()) - existing_semesters)
+        if missing:
+            errors[index].setdefault('semesters', []).append(f'Invalid pk(s) {missing} - object does not exist.')
+
+
+def _check_course_codes(validated, errors):
+    """Check ``course_code`` uniqueness against the batch and the table."""
+    codes = Counter(entry[0].course_code for entry in validated if entry is not None)
+    owners = dict(
+        Course.objects.filter(course_code__in=list(codes)).values_list('course_code', 'pk')
+    ) if codes else {}
+    for index, entry in enumerate(validated):
+        if entry is None:
+            continue
+        instance = entry[0]
+        code = instance.course_code
+        if codes[code] > 1:
+            errors[index].setdefault('course_code', []).append('Duplicate course code in this request.')
+        elif code in owners and owners[code] != instance.pk:
+            errors[index].setdefault('course_code', []).append('course with this course code already exists.')
+
+
+def _validate(items, instances=None):
+    validated, errors = _validate_items(items, instances)
+    _check_references(validated, errors)
+    _check_course_codes(validated, errors)
+    if any(errors):
+        raise BulkError(errors)
+    return validated
+
+
+def _set_semesters(pairs, clear_ids=()):
+    """Replace the semesters of ``clear_ids`` and insert ``(course, semester)`` rows."""
+    through = Course.semesters.through
+    if clear_ids:
+        through.objects.filter(course_id__in=list(clear_ids)).delete()
+    through.objects.bulk_create(
+        [through(course_id=course_id, semester_id=semester_id) for course_id, semester_id in pairs],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def after_bulk_write(courses, semesters_changed, using=DEFAULT_DB_ALIAS):
+    """Do what the per-row signal handlers would have done."""
+    get_search_backend(using).index_courses([course.pk for course in courses])
+
+    models = [Course, Semester] if semesters_changed else [Course]
+
+    def on_commit():
+        autocomplete_index.add_many(
+            COURSE, [(course.pk, course.title, course.course_code) for course in courses]
+        )
+        for model in models:
+            bump_model_version(model)
+
+    for model in models:
+        bump_model_version(model)
+    transaction.on_commit(on_commit, using=using)
+
+
+def create_courses(items):
+    """Validate and insert ``items``. Returns the created courses."""
+    validated = _validate(items)
+    with transaction.atomic():
+        courses = Course.objects.bulk_create([entry[0] for entry in validated], batch_size=BATCH_SIZE)
+        pairs = [
+            (course.pk, semester_id)
+            for course, (_, semesters, _) in zip(courses, validated)
+            for semester_id in set(semesters or ())
+        ]
+        _set_semesters(pairs)
+        after_bulk_write(courses, semesters_changed=bool(pairs))
+    return courses
+
+
+def update_courses(items):
+    """Validate and apply partial updates (each item needs an ``id``)."""
+    ids = [item.get('id') for item in items if isinstance(item, dict)] if isinstance(items, list) else []
+    with transaction.atomic():
+        instances = Course.objects.select_for_update().in_bulk([pk for pk in ids if isinstance(pk, int)])
+        validated = _validate(items, instances)
+
+        courses = [entry[0] for entry in validated]
+        if len({course.pk for course in courses}) != len(courses):
+            raise BulkError({'non_field_errors': ['Each course may only be updated once per request.']})
+
+        fields = set()
+        for _, _, changed in validated:
+            fields |= changed
+        # bulk_update() does not apply auto_now.
+        now = timezone.now()
+        for course in courses:
+            course.updated_at = now
+        Course.objects.bulk_update(courses, sorted(fields) + ['updated_at'], batch_size=BATCH_SIZE)
+
+        replaced = [course.pk for course, semesters, _ in validated if semesters is not None]
+        pairs = [
+            (course.pk, semester_id)
+            for course, semesters, _ in validated if semesters is not None
+            for semester_id in set(semesters)
+        ]
+        if replaced:
+            _set_semesters(pairs, clear_ids=replaced)
+        after_bulk_write(courses, semesters_changed=bool(replaced))
+    return courses
+
+
+def delete_courses(ids):
+    """Delete the courses with ``ids``; every id must exist."""
+    if not isinstance(ids, list) or not all(isinstance(pk, int) for pk in ids):
+        raise BulkError({'ids': ['Expected a list of course ids.']})
+    if len(ids) > MAX_ITEMS:
+        raise BulkError({'ids': [f'At most {MAX_ITEMS} ids per request.']})
+    with transaction.atomic():
+        existing = set(Course.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        errors = [{} if pk in existing else {'id': ['Course not found.']} for pk in ids]
+        if any(errors):
+            raise BulkError(errors)
+        # A regular delete: it cascades and sends the signals that keep the
+        # indexes and cache versions in sync.
+        Course.objects.filter(pk__in=ids).delete()
+    return len(existing)
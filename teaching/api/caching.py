@@ -0,0 +1,384 @@
+"""
+Versioned Response Cache
+========================
+
+Per-model version counters stored in Django's cache framework.
+
+Every model has a counter that the signal handlers in ``api.signals``
+bump (after commit) on ``post_save``, ``post_delete`` and
+``m2m_changed``. Cached responses are keyed by the versions of the
+models they depend on, so invalidation is exact and costs a single
+``incr`` - stale entries are simply never read again and expire.
+
+The same versions yield a strong ``ETag``, letting clients revalidate
+with ``If-None-Match`` and get a ``304`` without the payload.
+
+Larger endpoints (course list/detail, teacher detail) use
+``ConditionalGetMixin`` instead: validators are derived from the served
+rows' maintained ``updated_at`` columns (``COUNT`` + ``MAX(updated_at)``
+over the rows and every serialized relation), so an unchanged response
+is answered with ``304`` without loading or serializing any rows.
+
+Both mixins also serve the async views in ``api.views.async_views``
+(``alist``/``aretrieve``), using the async cache and ORM APIs.
+
+Responses read from a read replica that is behind the primary
+(``api.db_routing``) aren't stored, so they can't outlive a version.
+
+The counters only work if every worker process sees the same cache:
+with a per-process backend (``LocMemCache``) a write bumps the version
+in one worker while the others keep serving their stale entries. The
+default ``CACHES`` is therefore a file cache (``CACHE_LOCATION``);
+deployments may swap in another shared backend (database, memcached,
+redis), never ``LocMemCache`` with more than one worker.
+
+Note: ``QuerySet.update()``/``bulk_create()`` bypass signals; callers
+using them must call ``bump_model_version`` themselves.
+"""
+
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Count, Max
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_etags, quote_etag
+
+from .db_routing import reading_behind
+from .eager_loading import get_eager_loading_plan
+
+
+VERSION_KEY = 'api:version:{}'
+RESPONSE_KEY = 'api:response:{}'
+
+
+def _version_key(model):
+    return VERSION_KEY.format(model._meta.label_lower)
+
+
+def _initial_version():
+    # Time based, so a counter lost to eviction never reuses an old value.
+    return int(time.time() * 1000)
+
+
+def get_model_versions(models):
+    """Return ``{label: version}`` for ``models`` in one cache round trip."""
+    keys = {_version_key(model): model for model in models}
+    versions = cache.get_many(keys.keys())
+    for key in keys.keys() - versions.keys():
+        initial = _initial_version()
+        cache.add(key, initial, timeout=None)
+        versions[key] = cache.get(key, initial)
+    return {keys[key]._meta.label_lower: version for key, version in versions.items()}
+
+
+async def aget_model_versions(models):
+    """Async ``get_model_versions``."""
+    keys = {_version_key(model): model for model in models}
+    versions = await cache.aget_many(keys.keys())
+    for key in keys.keys() - versions.keys():
+        initial = _initial_version()
+        await cache.aadd(key, initial, timeout=None)
+        versions[key] = await cache.aget(key, initial)
+    return {keys[key]._meta.label_lower: version for key, version in versions.items()}
+
+
+def bump_model_version(model):
+    """Invalidate every cached response depending on ``model``."""
+    key = _version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), timeout=None)
+
+
+def response_etag(request, versions):
+    """A strong ETag for ``request``'s representation at ``versions``."""
+    renderer = getattr(request, 'accepted_renderer', None)
+    parts = [
+        request.get_full_path(),
+        getattr(request, 'accepted_media_type', ''),
+        getattr(renderer, 'format', ''),
+    ]
+    parts += [f'{label}={version}' for label, version in sorted(versions.items())]
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+class VersionedCacheMixin:
+    """
+    Mixin to cache list responses keyed by model versions.
+
+    Set ``cache_models`` to every model the serialized output reads
+    (including nested ``depth`` relations).
+    """
+    cache_models = ()
+    cache_timeout = 60 * 60 * 24
+
+    def get_cache_models(self):
+        return self.cache_models or (self.get_queryset().model,)
+
+    def get_response_etag(self, request, versions=None):
+        if versions is None:
+            versions = get_model_versions(self.get_cache_models())
+        return response_etag(request, versions)
+
+    def list(self, request, *args, **kwargs):
+        etag = self.get_response_etag(request)
+        quoted_etag = quote_etag(etag)
+        if self._is_not_modified(request, quoted_etag):
+            return self._finish(HttpResponseNotModified(), quoted_etag)
+
+        cache_key = RESPONSE_KEY.format(etag)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return self._finish(self._cached_response(cached), quoted_etag)
+
+        response = super().list(request, *args, **kwargs)
+        return self._finish(self._store(response, cache_key), quoted_etag)
+
+    async def alist(self, request, *args, **kwargs):
+        versions = await aget_model_versions(self.get_cache_models())
+        etag = self.get_response_etag(request, versions)
+        quoted_etag = quote_etag(etag)
+        if self._is_not_modified(request, quoted_etag):
+            return self._finish(HttpResponseNotModified(), quoted_etag)
+
+        cache_key = RESPONSE_KEY.format(etag)
+        cached = await cache.aget(cache_key)
+        if cached is not None:
+            return self._finish(self._cached_response(cached), quoted_etag)
+
+        response = await super().alist(request, *args, **kwargs)
+        return self._finish(self._store(response, cache_key), quoted_etag)
+
+    @staticmethod
+    def _is_not_modified(request, quoted_etag):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if not if_none_match:
+            return False
+        etags = parse_etags(if_none_match)
+        return '*' in etags or quoted_etag in etags
+
+    @staticmethod
+    def _cached_response(cached):
+        content, content_type = cached
+        response = HttpResponse(content, content_type=content_type)
+        response['X-Cache'] = 'HIT'
+        return response
+
+    def _store(self, response, cache_key):
+        if response.status_code == 200 and not reading_behind():
+            def store(rendered):
+                cache.set(cache_key, (rendered.content, rendered['Content-Type']), self.cache_timeout)
+            response.add_post_render_callback(store)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    @staticmethod
+    def _finish(response, quoted_etag):
+        response['ETag'] = quoted_etag
+        patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    Mixin adding ``ETag``/``Last-Modified`` validators to list and
+    retrieve views over models with an ``updated_at`` column.
+
+    The validators cover the served rows -- the object, or the page plus
+    the row telling whether there is a next one -- and every relation in
+    the serializer's eager-loading plan that has ``updated_at`` as well:
+    their count and latest ``updated_at``. Editing a teacher changes the
+    validators of its courses, deletions change the count, and ``m2m``
+    membership changes touch the owning row (see ``api.signals``).
+
+    Only a request with ``If-None-Match``/``If-Modified-Since`` runs a
+    query for them (one aggregate over the served rows, answering
+    ``304`` without loading them); otherwise they are computed from the
+    rows the response loads anyway. Unpaginated lists and reads from a
+    replica that is behind (``api.db_routing``) get no validators.
+    """
+    validator_field = 'updated_at'
+
+    def get_validator_lookups(self, model):
+        """Return the ``updated_at`` lookups covering ``model`` and its relations."""
+        lookups = [self.validator_field]
+        select, prefetch = get_eager_loading_plan(self.get_serializer_class())
+        for path in select + prefetch:
+            related = model
+            try:
+                for attr in path.split('__'):
+                    related = related._meta.get_field(attr).related_model
+                related._meta.get_field(self.validator_field)
+            except FieldDoesNotExist:
+                continue
+            lookups.append(f'{path}__{self.validator_field}')
+        return lookups
+
+    def get_served_queryset(self, queryset, detail):
+        """The rows the response shows, or None for an unpaginated list."""
+        if detail:
+            return queryset
+        get_page_queryset = getattr(self.paginator, 'get_page_queryset', None)
+        if get_page_queryset is None:
+            return None
+        return get_page_queryset(queryset, self.request, view=self)
+
+    def get_validators(self, request, queryset):
+        """
+        Return ``(etag, last_modified, count)`` for the rows of ``queryset``
+        using one aggregate query.
+        """
+        rows, aggregates = self._validator_aggregates(queryset)
+        return self._make_validators(request, rows.aggregate(**aggregates))
+
+    async def aget_validators(self, request, queryset):
+        """Async ``get_validators``."""
+        rows, aggregates = self._validator_aggregates(queryset)
+        return self._make_validators(request, await rows.aaggregate(**aggregates))
+
+    def _validator_aggregates(self, queryset):
+        model = queryset.model
+        lookups = self.get_validator_lookups(model)
+        aggregates = {f'max_{index}': Max(lookup) for index, lookup in enumerate(lookups)}
+        rows = model._default_manager.using(queryset.db).filter(pk__in=queryset.values('pk'))
+        return rows, {'count': Count('pk', distinct=True), **aggregates}
+
+    def get_loaded_validators(self, request, model, instances):
+        """``get_validators`` from loaded ``instances`` and their eager-loaded relations."""
+        values = {'count': len({instance.pk for instance in instances})}
+        for index, lookup in enumerate(self.get_validator_lookups(model)):
+            stamps = [
+                stamp for instance in instances
+                for stamp in self._follow(instance, lookup.split('__')) if stamp is not None
+            ]
+            values[f'max_{index}'] = max(stamps, default=None)
+        return self._make_validators(request, values)
+
+    @classmethod
+    def _follow(cls, instance, attrs):
+        value = getattr(instance, attrs[0])
+        if len(attrs) == 1:
+            return [value]
+        if value is None:
+            return []
+        # Prefetched to-many relations answer ``all()`` from their cache.
+        related = value.all() if hasattr(value, 'all') else [value]
+        return [stamp for item in related for stamp in cls._follow(item, attrs[1:])]
+
+    @staticmethod
+    def _make_validators(request, values):
+        count = values.pop('count')
+        stamps = [value for value in values.values() if value is not None]
+        last_modified = int(max(stamps).timestamp()) if stamps else None
+
+        renderer = getattr(request, 'accepted_renderer', None)
+        parts = [
+            request.get_full_path(),
+            getattr(request, 'accepted_media_type', ''),
+            getattr(renderer, 'format', ''),
+            str(count),
+        ]
+        parts += [value.isoformat() if value else '' for _, value in sorted(values.items())]
+        etag = quote_etag(hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest())
+        return etag, last_modified, count
+
+    @staticmethod
+    def _is_conditional(request):
+        return 'HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META
+
+    @staticmethod
+    def _not_modified(request, validators, detail):
+        etag, last_modified, count = validators
+        # A missing object must still 404 (even for ``If-None-Match: *``).
+        if detail and not count:
+            return None
+        return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    def _served_rows(self, detail):
+        if detail:
+            return getattr(self, '_served_object', None)
+        # The fetched page, including the row past its end
+        return getattr(self.paginator, 'fetched_rows', None)
+
+    def get_object(self):
+        instance = super().get_object()
+        self._served_object = [instance]
+        return instance
+
+    async def aget_object(self):
+        instance = await super().aget_object()
+        self._served_object = [instance]
+        return instance
+
+    def conditional_response(self, request, queryset, handler, *args, detail=False, **kwargs):
+        if reading_behind():
+            return handler(request, *args, **kwargs)
+        validators = None
+        if self._is_conditional(request):
+            served = self.get_served_queryset(queryset, detail)
+            if served is not None:
+                validators = self.get_validators(request, served)
+                response = self._not_modified(request, validators, detail)
+                if response is not None:
+                    return self._add_validators(response, validators)
+        response = handler(request, *args, **kwargs)
+        return self._add_validators(response, validators or self._loaded_validators(request, queryset, detail))
+
+    async def aconditional_response(self, request, queryset, handler, *args, detail=False, **kwargs):
+        """Async ``conditional_response``."""
+        if reading_behind():
+            return await handler(request, *args, **kwargs)
+        validators = None
+        if self._is_conditional(request):
+            served = self.get_served_queryset(queryset, detail)
+            if served is not None:
+                validators = await self.aget_validators(request, served)
+                response = self._not_modified(request, validators, detail)
+                if response is not None:
+                    return self._add_validators(response, validators)
+        response = await handler(request, *args, **kwargs)
+        return self._add_validators(response, validators or self._loaded_validators(request, queryset, detail))
+
+    def _loaded_validators(self, request, queryset, detail):
+        rows = self._served_rows(detail)
+        if rows is None:
+            return None
+        return self.get_loaded_validators(request, queryset.model, rows)
+
+    @staticmethod
+    def _add_validators(response, validators):
+        if validators is not None and response.status_code in (200, 304):
+            etag, last_modified, _ = validators
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional_response(request, queryset, super().list, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return await self.aconditional_response(request, queryset, super().alist, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, self._lookup_queryset(), super().retrieve, *args, detail=True, **kwargs
+        )
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self.aconditional_response(
+            request, self._lookup_queryset(), super().aretrieve, *args, detail=True, **kwargs
+        )
+
+    def _lookup_queryset(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
@@ -0,0 +1,79 @@
+"""
+Database Connection Metrics
+===========================
+
+Connection usage per database alias, added to ``/api/_metrics`` with
+``api.metrics.register_collector``:
+
+- ``api_db_connections_total``: connections set up by Django (counted
+  on ``connection_created``, see ``api.signals``). With persistent
+  connections (``CONN_MAX_AGE``) it levels off once every worker thread
+  has one; without them it grows with every request. With a pool it
+  counts checkouts instead; see ``api_db_pool_connections_num_total``
+  for the connections actually opened.
+- ``api_db_pool_*``: the statistics of psycopg's connection pool
+  (``ConnectionPool.get_stats()``) for aliases with ``OPTIONS['pool']``
+  (see ``teaching/settings_postgresql.py``). Sizes and waiting requests
+  are gauges, the rest are counters (``_total``).
+"""
+
+from django.db import connections
+
+from .metrics import Counter, register_collector, sample
+
+
+CONNECTIONS = Counter(
+    'api_db_connections_total', 'Database connections set up by Django by alias.', ('database',),
+)
+
+# ``get_stats()`` keys describing the current state; the others count events.
+POOL_GAUGES = {
+    'pool_min': 'Minimum size of the connection pool.',
+    'pool_max': 'Maximum size of the connection pool.',
+    'pool_size': 'Connections managed by the pool (in use, available or being prepared).',
+    'pool_available': 'Idle connections in the pool.',
+    'requests_waiting': 'Requests waiting for a connection.',
+}
+
+
+def connection_created(connection):
+    CONNECTIONS.inc((connection.alias,))
+
+
+def get_pool_stats():
+    """
+    Return ``{alias: stats}`` for every connection pool created in this
+    process. Pools are looked up without creating them, so a scrape never
+    opens one.
+    """
+    stats = {}
+    for alias in connections:
+        pools = getattr(connections[alias], '_connection_pools', None) or {}
+        pool = pools.get(alias)
+        if pool is not None:
+            stats[alias] = pool.get_stats()
+    return stats
+
+
+def render_pool_stats(stats):
+    """Exposition lines for ``{alias: stats}``."""
+    series = {}
+    for alias, values in sorted(stats.items()):
+        for key, value in values.items():
+            series.setdefault(key, []).append((alias, value))
+
+    lines = []
+    for key, values in sorted(series.items()):
+        if key in POOL_GAUGES:
+            name, kind, documentation = f'api_db_pool_{key}', 'gauge', POOL_GAUGES[key]
+        else:
+            name, kind = f'api_db_pool_{key}_total', 'counter'
+            documentation = f'Connection pool statistic "{key}".'
+        lines += [f'# HELP {name} {documentation}', f'# TYPE {name} {kind}']
+        lines += [sample(name, ('database',), (alias,), value) for alias, value in values]
+    return lines
+
+
+@register_collector
+def collect():
+    return CONNECTIONS.render() + render_pool_stats(get_pool_stats())
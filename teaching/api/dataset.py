@@ -0,0 +1,239 @@
+"""
+Synthetic Dataset
+=================
+
+Seeded generator for a production-sized course catalog: the academic
+hierarchy, teachers, semesters and courses, written with bulk inserts.
+
+The same ``seed`` and sizes always produce the same catalog, so
+benchmarks run against comparable data on every machine and commit.
+
+Course codes are the free ones of the ``S`` + 5 digits format
+``Course.clean`` accepts, taken from ``S99999`` down, so synthetic
+courses can be edited in the admin like any other and a database holds
+at most 100,000 courses.
+"""
+
+import random
+from dataclasses import dataclass
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .autocomplete import publish_change
+from .caching import bump_model_version
+from .models import (
+    Course, CourseType, CurriculumSubject, Department, Institute, Semester, StudyProgram,
+    StudySubject, Teacher,
+)
+from .search import get_search_backend
+
+
+BATCH_SIZE = 5000
+
+SUBJECTS = (
+    'Architecture', 'Art History', 'Ceramics', 'Conservation', 'Design', 'Digital Art',
+    'Fashion', 'Film', 'Graphic Design', 'Industrial Design', 'Media Theory', 'Painting',
+    'Photography', 'Sculpture', 'Social Design', 'Stage Design', 'Textiles', 'Typography',
+)
+TOPICS = (
+    'Foundations', 'Studio', 'Theory', 'Practice', 'Methods', 'Materials', 'Research',
+    'Project', 'Critique', 'History', 'Techniques', 'Workshop', 'Laboratory', 'Seminar',
+)
+COURSE_TYPES = ('Vorlesung', 'Seminar', 'Übung', 'Workshop', 'Projekt', 'Exkursion', 'Kolloquium')
+FIRST_NAMES = (
+    'Anna', 'Ben', 'Clara', 'David', 'Eva', 'Felix', 'Greta', 'Hannes', 'Ida', 'Jakob',
+    'Katharina', 'Lukas', 'Maria', 'Niklas', 'Olga', 'Paul', 'Rosa', 'Simon', 'Theresa', 'Valentin',
+)
+LAST_NAMES = (
+    'Auer', 'Berger', 'Fischer', 'Gruber', 'Hofer', 'Huber', 'Koller', 'Lang', 'Mayer',
+    'Moser', 'Pichler', 'Steiner', 'Wagner', 'Weber', 'Wimmer', 'Winkler', 'Wolf', 'Zimmermann',
+)
+
+
+@dataclass
+class DatasetSize:
+    """How many rows of each kind to generate."""
+    courses: int = 90000
+    teachers: int = 3000
+    institutes: int = 12
+    departments_per_institute: int = 4
+    programs_per_department: int = 5
+    curriculum_subjects_per_program: int = 12
+    study_subjects_per_curriculum_subject: int = 3
+    first_year: int = 2015
+    years: int = 10
+    # Share of gender-diverse courses (the minority filtered for).
+    gender_diversity_share: float = 0.1
+
+
+def free_course_codes(count, using=DEFAULT_DB_ALIAS):
+    """``count`` course codes (S + 5 digits) not in use, from S99999 down."""
+    used = set(
+        Course.objects.using(using).filter(course_code__startswith='S').values_list('course_code', flat=True)
+    )
+    codes = []
+    for number in range(99999, -1, -1):
+        if len(codes) == count:
+            break
+        code = f'S{number:05d}'
+        if code not in used:
+            codes.append(code)
+    if len(codes) < count:
+        raise ValueError(f'Only {len(codes)} free course codes left')
+    return codes
+
+
+class DatasetGenerator:
+    """Writes a ``DatasetSize`` catalog derived from ``seed``."""
+
+    def __init__(self, size=None, seed=0, using=DEFAULT_DB_ALIAS, batch_size=BATCH_SIZE, log=None):
+        self.size = size or DatasetSize()
+        self.random = random.Random(seed)
+        self.using = using
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+
+    def _create(self, model, objects):
+        objects = model.objects.using(self.using).bulk_create(objects, batch_size=self.batch_size)
+        self.log(f'{model._meta.verbose_name_plural}: {len(objects)}')
+        return objects
+
+    def generate(self):
+        """Insert the catalog; returns ``{model name: rows}``."""
+        with transaction.atomic(using=self.using):
+            counts = self._generate()
+        for model in (
+            Institute, Department, StudyProgram, CurriculumSubject, StudySubject,
+            CourseType, Teacher, Semester, Course,
+        ):
+            bump_model_version(model)
+        publish_change()
+        return counts
+
+    def _generate(self):
+        size, rnd = self.size, self.random
+
+        institutes = self._create(Institute, [
+            Institute(name=f'Institute of {SUBJECTS[i % len(SUBJECTS)]} {i // len(SUBJECTS) + 1}',
+                      description=f'Synthetic institute {i}')
+            for i in range(size.institutes)
+        ])
+        departments = self._create(Department, [
+            Department(name=f'{institute.name} / Department {d + 1}', institute=institute)
+            for institute in institutes for d in range(size.departments_per_institute)
+        ])
+        programs = self._create(StudyProgram, [
+            StudyProgram(
+                name=f'{rnd.choice(("Bachelor", "Master", "Diploma"))} {rnd.choice(SUBJECTS)} {d + 1}.{p + 1}',
+                description='Synthetic study program', department=department,
+                year=size.first_year + rnd.randrange(size.years),
+            )
+            for d, department in enumerate(departments) for p in range(size.programs_per_department)
+        ])
+        curriculum_subjects = self._create(CurriculumSubject, [
+            CurriculumSubject(
+                name=f'{rnd.choice(SUBJECTS)} {rnd.choice(TOPICS)} {c + 1}', study_program=program,
+                credits=rnd.choice((2, 3, 4, 6, 8)), semester_number=c % 8 + 1,
+                is_mandatory=rnd.random() < 0.7,
+            )
+            for program in programs for c in range(size.curriculum_subjects_per_program)
+        ])
+        study_subjects = self._create(StudySubject, [
+            StudySubject(
+                name=f'{subject.name} {"I" * (s + 1)}', curriculum_subject=subject,
+                credits=rnd.choice((1, 2, 3)), hours_per_week=rnd.choice((1, 2, 3, 4)),
+                subject_type=rnd.choice(('lecture', 'seminar', 'exercise', 'workshop', 'project')),
+            )
+            for subject in curriculum_subjects for s in range(size.study_subjects_per_curriculum_subject)
+        ])
+        course_types = self._create(CourseType, [
+            CourseType(name=name, description=f'Course type: {name}') for name in COURSE_TYPES
+        ])
+        # Emails and semesters are unique: continue after (or reuse) the rows of earlier runs.
+        offset = Teacher.objects.using(self.using).filter(email__endswith='@synthetic.example').count()
+        teachers = self._create(Teacher, [
+            Teacher(
+                name=f'{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)} {t + 1}',
+                email=f'teacher{t + 1}@synthetic.example', subject=rnd.choice(SUBJECTS),
+            )
+            for t in range(offset, offset + size.teachers)
+        ])
+        years = range(size.first_year, size.first_year + size.years)
+        semesters = Semester.objects.using(self.using).filter(year__in=years)
+        existing = set(semesters.values_list('year', 'season'))
+        self._create(Semester, [
+            Semester(
+                name=f'{year}{season}', year=year, season=season,
+                start_date=f'{year}-10-01' if season == 'W' else f'{year}-03-01',
+                end_date=f'{year + 1}-01-31' if season == 'W' else f'{year}-06-30',
+                is_active=year >= size.first_year + size.years - 1,
+            )
+            for year in years for season in ('S', 'W') if (year, season) not in existing
+        ])
+        semesters = list(semesters.order_by('year', 'season'))
+
+        courses = self._create_courses(
+            study_subjects, {program.pk: program for program in programs},
+            {subject.pk: subject for subject in curriculum_subjects},
+            {department.pk: department for department in departments},
+            course_types, teachers, semesters,
+        )
+
+        with transaction.atomic(using=self.using):
+            backend = get_search_backend(self.using)
+            backend.create_index()
+            backend.rebuild()
+
+        return {
+            'institutes': len(institutes), 'departments': len(departments),
+            'study_programs': len(programs), 'curriculum_subjects': len(curriculum_subjects),
+            'study_subjects': len(study_subjects), 'course_types': len(course_types),
+            'teachers': len(teachers), 'semesters': len(semesters), 'courses': courses,
+        }
+
+    def _create_courses(self, study_subjects, programs, curriculum_subjects, departments,
+                        course_types, teachers, semesters):
+        size, rnd = self.size, self.random
+        through = Course.semesters.through
+        # Skewed like real data: some teachers and types teach far more courses.
+        teacher_weights = [1 / (rank + 1) ** 0.8 for rank in range(len(teachers))]
+        type_weights = [1 / (rank + 1) for rank in range(len(course_types))]
+        codes = free_course_codes(size.courses, self.using)
+
+        written = 0
+        while written < size.courses:
+            batch = min(self.batch_size, size.courses - written)
+            courses, semester_choices = [], []
+            for study_subject, teacher, course_type in zip(
+                rnd.choices(study_subjects, k=batch),
+                rnd.choices(teachers, weights=teacher_weights, k=batch),
+                rnd.choices(course_types, weights=type_weights, k=batch),
+            ):
+                code = codes[written + len(courses)]
+                curriculum_subject = curriculum_subjects[study_subject.curriculum_subject_id]
+                program = programs[curriculum_subject.study_program_id]
+                department = departments[program.department_id]
+                offered = rnd.sample(semesters, k=rnd.choice((1, 1, 2, 2, 3)))
+                year = max(semester.year for semester in offered)
+                courses.append(Course(
+                    course_code=code,
+                    title=f'{study_subject.name}: {rnd.choice(TOPICS)}'[:100],
+                    description=f'Synthetic course {code} in {program.name}.',
+                    type=course_type, teacher=teacher, year=year,
+                    credits=rnd.choice((1, 2, 3, 4, 6)),
+                    gender_diversity=rnd.random() < size.gender_diversity_share,
+                    institute_id=department.institute_id, department=department, study_program=program,
+                    curriculum_subject=curriculum_subject, study_subject=study_subject,
+                ))
+                semester_choices.append(offered)
+            courses = Course.objects.using(self.using).bulk_create(courses, batch_size=self.batch_size)
+            through.objects.using(self.using).bulk_create(
+                [
+                    through(course_id=course.pk, semester_id=semester.pk)
+                    for course, offered in zip(courses, semester_choices) for semester in offered
+                ],
+                batch_size=self.batch_size,
+            )
+            written += len(courses)
+            self.log(f'courses: {written}/{size.courses}')
+        return written
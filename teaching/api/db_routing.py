@@ -0,0 +1,216 @@
+"""
+Read Replica Routing
+====================
+
+``ReplicaRouter`` (``settings.DATABASE_ROUTERS``) sends the reads of
+public API requests to the read replicas listed in
+``settings.DATABASE_REPLICAS`` and everything else to ``default``:
+
+- Only safe (GET, HEAD, OPTIONS) requests to the DRF views in
+  ``api.views`` whose permissions for the request (``get_permissions()``,
+  so per-method overrides count) are all ``AllowAny`` -- the public
+  list and detail endpoints -- read from a replica, and only models of
+  the ``api`` app; sessions and users stay on the primary.
+  ``ReplicaRoutingMiddleware`` marks those requests and picks one
+  replica per request. Writes, the admin, admin-only endpoints and
+  management commands use ``default``.
+- Read-your-writes: once a request writes, its remaining reads go to
+  the primary, and the response sets the ``db_pin`` cookie for
+  ``REPLICA_PIN_SECONDS`` so that the client's next requests (the
+  list after a POST) read from the primary too, until the replicas have
+  caught up.
+- Lag guard: a replica more than ``REPLICA_MAX_LAG`` seconds behind, or
+  one that can't be reached, is skipped; with no usable replica reads
+  fall back to the primary. Lag is measured at most every
+  ``REPLICA_LAG_CHECK_INTERVAL`` seconds per process: with
+  ``pg_last_xact_replay_timestamp()`` on PostgreSQL, and on SQLite
+  (replicas being copies of the primary's file, refreshed by another
+  process) from the files' modification times. Responses read from a
+  replica that is behind aren't stored in the response cache.
+
+``/api/_metrics`` adds ``api_db_replica_requests_total`` (public reads
+by the database they read from) and ``api_db_replica_lag_seconds``.
+"""
+
+import os
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS, Error
+from rest_framework.permissions import AllowAny, SAFE_METHODS
+
+from .metrics import Counter, register_collector, sample
+
+
+PIN_COOKIE = 'db_pin'
+
+# 0 when the server has replayed all the WAL it received (or isn't a
+# replica), otherwise the age of the last transaction it replayed.
+POSTGRESQL_LAG_SQL = (
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+)
+
+REPLICA_READS = Counter(
+    'api_db_replica_requests_total',
+    'Public read requests by the database they read from (default: pinned or no usable replica).',
+    ('database',),
+)
+
+
+class RoutingState:
+    """How the current request's reads are routed."""
+
+    def __init__(self, pinned=False):
+        # Read from the primary (the client wrote recently)
+        self.pinned = pinned
+        # The replica this request reads from, None for the primary
+        self.replica = None
+        self.wrote = False
+
+
+# The ``RoutingState`` of the current request, None outside requests.
+request_routing = ContextVar('request_routing', default=None)
+
+
+def get_replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+def reads_from_replica(view_func, request, *args, **kwargs):
+    """
+    Whether ``request`` to the view ``view_func`` (from ``as_view()``) may
+    read from a replica: asks a view instance set up for the request for
+    its permissions, as ``dispatch`` would.
+    """
+    view_class = getattr(view_func, 'view_class', None)
+    if (
+        request.method not in SAFE_METHODS or view_class is None
+        or not view_class.__module__.startswith('api.views') or not hasattr(view_class, 'get_permissions')
+    ):
+        return False
+    view = view_class(**view_func.view_initkwargs)
+    view.setup(request, *args, **kwargs)
+    # Not authenticated yet: permission checks run later, in dispatch.
+    view.request = view.initialize_request(request, *args, **kwargs)
+    permissions = view.get_permissions()
+    return bool(permissions) and all(isinstance(permission, AllowAny) for permission in permissions)
+
+
+def _modified(connection):
+    """When a SQLite database was last written: its file, or its WAL once that holds data."""
+    name = str(connection.settings_dict['NAME'])
+    if not os.path.exists(name):
+        return None
+    times = [os.path.getmtime(name)]
+    # Opening a database in WAL mode creates an empty WAL
+    if os.path.exists(name + '-wal') and os.path.getsize(name + '-wal'):
+        times.append(os.path.getmtime(name + '-wal'))
+    return max(times)
+
+
+def measure_lag(alias):
+    """Seconds the replica ``alias`` is behind the primary."""
+    replica = connections[alias]
+    if replica.vendor == 'postgresql':
+        with replica.cursor() as cursor:
+            cursor.execute(POSTGRESQL_LAG_SQL)
+            lag = cursor.fetchone()[0]
+        return float(lag or 0)
+    if replica.vendor == 'sqlite':
+        primary, copy = _modified(connections[DEFAULT_DB_ALIAS]), _modified(replica)
+        if primary is None or copy is None:
+            # In-memory databases
+            return 0.0
+        return max(0.0, primary - copy)
+    return 0.0
+
+
+# {alias: (monotonic time of the check, lag in seconds or None if unreachable)}
+_lag_checks = {}
+
+
+def get_replica_lag(alias):
+    """``measure_lag``, at most once every ``REPLICA_LAG_CHECK_INTERVAL`` seconds."""
+    now = time.monotonic()
+    checked = _lag_checks.get(alias)
+    if checked is not None and now - checked[0] < getattr(settings, 'REPLICA_LAG_CHECK_INTERVAL', 1.0):
+        return checked[1]
+    try:
+        lag = measure_lag(alias)
+    except (Error, OSError):
+        lag = None
+    _lag_checks[alias] = (now, lag)
+    return lag
+
+
+def choose_replica():
+    """A random replica within ``REPLICA_MAX_LAG``, or None."""
+    max_lag = getattr(settings, 'REPLICA_MAX_LAG', 5.0)
+    usable = []
+    for alias in get_replicas():
+        lag = get_replica_lag(alias)
+        if lag is not None and lag <= max_lag:
+            usable.append(alias)
+    return random.choice(usable) if usable else None
+
+
+def reading_behind():
+    """
+    Whether the current request reads from a replica that was behind the
+    primary at its last check. Their responses aren't cached
+    (``api.caching``): they could be older than the cache version.
+    """
+    state = request_routing.get()
+    if state is None or state.replica is None or state.wrote:
+        return False
+    checked = _lag_checks.get(state.replica)
+    return checked is None or checked[1] != 0
+
+
+class ReplicaRouter:
+    """
+    Reads of public API requests from a replica. Everything else is left
+    to Django's defaults: the database of the instance involved, if any,
+    otherwise ``default``.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = request_routing.get()
+        if state is None or state.replica is None or model._meta.app_label != 'api':
+            return None
+        return DEFAULT_DB_ALIAS if state.wrote else state.replica
+
+    def db_for_write(self, model, **hints):
+        state = request_routing.get()
+        if state is not None:
+            state.wrote = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas get their schema from the primary.
+        if db in get_replicas():
+            return False
+        return None
+
+
+@register_collector
+def collect():
+    lines = REPLICA_READS.render()
+    checks = sorted((alias, lag) for alias, (_, lag) in _lag_checks.items() if lag is not None)
+    if checks:
+        name = 'api_db_replica_lag_seconds'
+        lines += [
+            f'# HELP {name} Last measured lag of each read replica.',
+            f'# TYPE {name} gauge',
+        ]
+        lines += [sample(name, ('database',), (alias,), lag) for alias, lag in checks]
+    return lines
@@ -0,0 +1,175 @@
+"""
+Dimension Identity Maps
+=======================
+
+Write-through identity maps for the small "dimension" tables that bulk
+imports reference by natural key (course types and teachers by name,
+semesters by ``'2025W'`` style code).
+
+Each map is preloaded once per import run with a single query. Lookups
+are dictionary hits; a key that doesn't exist yet gets an unsaved
+instance that is returned for every later lookup of the same key, and
+all new rows are inserted with one ``bulk_create`` per model at
+``flush()``. An import therefore costs O(batches) queries for its
+dimensions instead of a ``get_or_create`` per row.
+
+``bulk_create`` sends no signals, so ``flush()`` itself invalidates the
+cached responses of the models it inserted into and adds new teachers
+to the autocomplete index.
+"""
+
+import re
+from datetime import date
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .autocomplete import autocomplete_index, TEACHER
+from .caching import bump_model_version
+from .models import CourseType, Semester, Teacher
+
+
+def semester_dates(semester):
+    """Default start/end dates for ``'2025W'`` style semester codes."""
+    year, season = int(semester[:4]), semester[4]
+    if season == 'W':
+        return date(year, 10, 1), date(year + 1, 1, 31)
+    return date(year, 3, 1), date(year, 6, 30)
+
+
+def teacher_email(name):
+    """Placeholder e-mail address derived from the teacher's name."""
+    local = re.sub(r'[^\w\s]', '', name.lower())
+    local = re.sub(r'\s+', '.', local.strip())
+    return f'{local}@uni-ak.ac.at'
+
+
+class IdentityMap:
+    """
+    Natural key -> instance map for one model.
+
+    ``key`` computes the natural key of an instance and ``factory``
+    builds a new (unsaved) instance for a missing key. ``unique``, if
+    given, computes the value of a unique column the factory fills in:
+    a new instance whose value is already taken (by a row or a pending
+    instance of another key) is replaced by that instance, so the bulk
+    insert can't violate the constraint. Rows are read from and written
+    to the database ``using``.
+    """
+
+    def __init__(self, model, key, factory, unique=None, using=DEFAULT_DB_ALIAS):
+        self.model = model
+        self.using = using
+        self.key = key
+        self.factory = factory
+        self.unique = unique
+        self.instances = {}
+        self.by_unique = {}
+        self.pending = []
+        self.loaded = False
+
+    def preload(self):
+        self.pending = []
+        self.instances = {}
+        self.by_unique = {}
+        # Natural keys are not enforced unique; the oldest row wins.
+        for instance in self.model.objects.using(self.using).order_by('-pk'):
+            self.instances[self.key(instance)] = instance
+            if self.unique is not None:
+                self.by_unique[self.unique(instance)] = instance
+        self.loaded = True
+
+    def get(self, key):
+        if not self.loaded:
+            self.preload()
+        instance = self.instances.get(key)
+        if instance is None:
+            instance = self.factory(key)
+            taken = self.by_unique.get(self.unique(instance)) if self.unique is not None else None
+            if taken is not None:
+                instance = taken
+            else:
+                if self.unique is not None:
+                    self.by_unique[self.unique(instance)] = instance
+                self.pending.append(instance)
+            self.instances[key] = instance
+        return instance
+
+    def flush(self):
+        """Insert the pending instances. Returns the number of new rows."""
+        pending, self.pending = self.pending, []
+        if not pending:
+            return 0
+        self.model.objects.using(self.using).bulk_create(pending)
+        if any(instance.pk is None for instance in pending):
+            # Backends that can't return ids from bulk inserts.
+            saved = {self.key(instance): instance for instance in self.model.objects.using(self.using).order_by('-pk')}
+            for instance in pending:
+                instance.pk = saved[self.key(instance)].pk
+        self.after_flush(pending)
+        return len(pending)
+
+    def after_flush(self, instances):
+        """Do what the per-row signal handlers would have done."""
+        model = self.model
+
+        def on_commit():
+            if model is Teacher:
+                autocomplete_index.add_many(TEACHER, [(teacher.pk, teacher.name, None) for teacher in instances])
+            bump_model_version(model)
+
+        bump_model_version(model)
+        transaction.on_commit(on_commit, using=self.using)
+
+
+def _semester_factory(code):
+    start_date, end_date = semester_dates(code)
+    return Semester(name=code, year=int(code[:4]), season=code[4], start_date=start_date, end_date=end_date)
+
+
+def _teacher_factory(name):
+    return Teacher(name=name, email=teacher_email(name), subject='Arts and Design')
+
+
+class DimensionCache:
+    """The course type, teacher and semester maps used by an import run."""
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.course_types = IdentityMap(
+            CourseType, key=lambda row: row.name,
+            factory=lambda name: CourseType(name=name, description=f'Course type: {name}'), using=using,
+        )
+        # Placeholder e-mails are unique; names that map to the same one
+        # ('Dr. Anna Berg', 'Dr Anna Berg') share that teacher.
+        self.teachers = IdentityMap(
+            Teacher, key=lambda row: row.name, factory=_teacher_factory,
+            unique=lambda row: row.email, using=using,
+        )
+        self.semesters = IdentityMap(
+            Semester, key=lambda row: f'{row.year}{row.season}', factory=_semester_factory, using=using,
+        )
+
+    def maps(self):
+        return (self.course_types, self.teachers, self.semesters)
+
+    def preload(self):
+        for identity_map in self.maps():
+            identity_map.preload()
+
+    def reset(self):
+        """Forget everything, e.g. after the flushing transaction rolled back."""
+        for identity_map in self.maps():
+            identity_map.loaded = False
+            identity_map.pending = []
+
+    def course_type(self, name):
+        return self.course_types.get(name)
+
+    def teacher(self, name):
+        return self.teachers.get(name) if name else None
+
+    def semester(self, code):
+        return self.semesters.get(code)
+
+    def flush(self):
+        """Insert every new dimension row (one query per model with new rows)."""
+        return sum(identity_map.flush() for identity_map in self.maps())
@@ -0,0 +1,127 @@
+"""
+Eager Loading
+=============
+
+Derives ``select_related`` / ``prefetch_related`` lookups from a
+serializer's declared fields so that list and detail views serialize
+nested relations with a constant number of queries.
+
+Handled field shapes:
+- nested ``ModelSerializer`` (``depth`` or explicit) -> select_related
+- nested ``ListSerializer`` / ``ManyRelatedField`` -> prefetch_related
+- dotted ``source`` chains (e.g. ``study_program.name``) -> select_related
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+_plan_cache = {}
+
+
+def _walk_source(model, source_attrs, prefix=''):
+    """
+    Follow a field's ``source_attrs`` through the model's relations.
+
+    Returns a tuple ``(select_path, prefetch_path, related_model)``.
+    Only the longest to-one chain is returned as ``select_path``; the first
+    to-many hop ends the walk and is returned as ``prefetch_path``.
+    """
+    path = []
+    current = model
+    for attr in source_attrs:
+        try:
+            field = current._meta.get_field(attr)
+        except FieldDoesNotExist:
+            break
+        if not field.is_relation or field.related_model is None:
+            break
+        path.append(attr)
+        lookup = prefix + '__'.join(path)
+        if field.many_to_many or field.one_to_many:
+            select_path = prefix + '__'.join(path[:-1]) if len(path) > 1 else None
+            return select_path, lookup, field.related_model
+        current = field.related_model
+
+    if not path:
+        return None, None, None
+    return prefix + '__'.join(path), None, current
+
+
+def _collect(serializer, model, prefix, select, prefetch):
+    """Recursively collect lookups for the fields of ``serializer``."""
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+
+        source_attrs = field.source.split('.')
+
+        if isinstance(field, serializers.ListSerializer):
+            _, lookup, related_model = _walk_source(model, source_attrs, prefix)
+            if lookup:
+                prefetch.add(lookup)
+                child = field.child
+                if isinstance(child, serializers.ModelSerializer):
+                    # To-one relations below a prefetch are prefetched too.
+                    nested = set()
+                    _collect(child, related_model, lookup + '__', nested, prefetch)
+                    prefetch.update(nested)
+            continue
+
+        if isinstance(field, serializers.ManyRelatedField):
+            _, lookup, _ = _walk_source(model, source_attrs, prefix)
+            if lookup:
+                prefetch.add(lookup)
+            continue
+
+        if isinstance(field, serializers.ModelSerializer):
+            lookup, many_lookup, related_model = _walk_source(model, source_attrs, prefix)
+            if many_lookup:
+                prefetch.add(many_lookup)
+            elif lookup:
+                select.add(lookup)
+                _collect(field, related_model, lookup + '__', select, prefetch)
+            continue
+
+        if isinstance(field, serializers.RelatedField):
+            # Primary key fields read ``<name>_id`` straight off the row.
+            if field.use_pk_only_optimization() and len(source_attrs) == 1:
+                continue
+        elif len(source_attrs) == 1:
+            continue
+        else:
+            # Plain attribute behind a relation chain: ``a.b.name``.
+            source_attrs = source_attrs[:-1]
+
+        lookup, many_lookup, _ = _walk_source(model, source_attrs, prefix)
+        if many_lookup:
+            prefetch.add(many_lookup)
+        elif lookup:
+            select.add(lookup)
+
+
+def get_eager_loading_plan(serializer_class):
+    """
+    Return ``(select_related, prefetch_related)`` tuples for a serializer.
+
+    Plans are computed once per serializer class and cached.
+    """
+    plan = _plan_cache.get(serializer_class)
+    if plan is None:
+        select, prefetch = set(), set()
+        model = getattr(getattr(serializer_class, 'Meta', None), 'model', None)
+        if model is not None:
+            _collect(serializer_class(), model, '', select, prefetch)
+        plan = (tuple(sorted(select)), tuple(sorted(prefetch)))
+        _plan_cache[serializer_class] = plan
+    return plan
+
+
+def optimize_queryset(queryset, serializer_class):
+    """Apply the eager-loading plan for ``serializer_class`` to ``queryset``."""
+    select, prefetch = get_eager_loading_plan(serializer_class)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
@@ -0,0 +1,109 @@
+"""
+Course Export
+=============
+
+Streams a course queryset as NDJSON or CSV without materializing it.
+
+Rows are read with ``values()`` (no model instances) through
+``.iterator(chunk_size=...)``; the semesters of every chunk are fetched
+with one extra query. Memory use is bounded by the chunk size, however
+many courses match.
+"""
+
+import csv
+import json
+from collections import defaultdict
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Course
+
+
+CHUNK_SIZE = 2000
+
+# Output column -> ``values()`` lookup
+EXPORT_FIELDS = {
+    'id': 'id',
+    'course_code': 'course_code',
+    'title': 'title',
+    'description': 'description',
+    'year': 'year',
+    'start_date': 'start_date',
+    'end_date': 'end_date',
+    'credits': 'credits',
+    'gender_diversity': 'gender_diversity',
+    'type_id': 'type_id',
+    'type': 'type__name',
+    'teacher_id': 'teacher_id',
+    'teacher': 'teacher__name',
+    'institute_id': 'institute_id',
+    'institute': 'institute__name',
+    'department_id': 'department_id',
+    'department': 'department__name',
+    'study_program_id': 'study_program_id',
+    'study_program': 'study_program__name',
+    'curriculum_subject_id': 'curriculum_subject_id',
+    'curriculum_subject': 'curriculum_subject__name',
+    'study_subject_id': 'study_subject_id',
+    'study_subject': 'study_subject__name',
+}
+COLUMNS = list(EXPORT_FIELDS) + ['semesters']
+
+
+def iter_course_rows(queryset, chunk_size=CHUNK_SIZE):
+    """Yield one dict per course (``COLUMNS`` keys), ``chunk_size`` rows at a time."""
+    names = list(EXPORT_FIELDS)
+    lookups = list(EXPORT_FIELDS.values())
+    rows = queryset.values_list(*lookups).iterator(chunk_size=chunk_size)
+
+    chunk = []
+    for values in rows:
+        chunk.append(dict(zip(names, values)))
+        if len(chunk) >= chunk_size:
+            yield from _with_semesters(chunk)
+            chunk = []
+    if chunk:
+        yield from _with_semesters(chunk)
+
+
+def _with_semesters(chunk):
+    semesters = defaultdict(list)
+    pairs = (
+        Course.semesters.through.objects
+        .filter(course_id__in=[row['id'] for row in chunk])
+        .order_by('semester__year', 'semester__season')
+        .values_list('course_id', 'semester__name')
+    )
+    for course_id, name in pairs:
+        semesters[course_id].append(name)
+    for row in chunk:
+        row['semesters'] = semesters.get(row['id'], [])
+        yield row
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the value (for csv.writer)."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(COLUMNS)
+    for row in rows:
+        row['semesters'] = ';'.join(row['semesters'])
+        yield writer.writerow([_csv_value(row[column]) for column in COLUMNS])
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return value
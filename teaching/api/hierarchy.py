@@ -0,0 +1,110 @@
+"""
+Academic Hierarchy Tree
+=======================
+
+Institute -> Department -> StudyProgram -> CurriculumSubject ->
+StudySubject as one nested JSON document, for ``/api/hierarchy/``.
+
+A tree (or a subtree rooted at any node) is built with one ``values()``
+query per level: each level is filtered by the previous level's query as
+a subquery and attached to its parents through an ``id -> node`` map.
+
+The serialized JSON is materialized in the cache, keyed by the version
+counters of the five models (see ``api.caching``), so it is rebuilt only
+after one of them changed and served as is otherwise.
+"""
+
+import hashlib
+import json
+from collections import namedtuple
+
+from django.core.cache import cache
+
+from .caching import get_model_versions
+from .models import CurriculumSubject, Department, Institute, StudyProgram, StudySubject
+
+
+CACHE_KEY = 'api:hierarchy:{}'
+CACHE_TIMEOUT = 60 * 60 * 24
+
+# ``name`` is used in URLs; ``parent`` is the foreign key to the level above.
+Level = namedtuple('Level', 'name model parent fields')
+
+LEVELS = (
+    Level('institutes', Institute, None, ('id', 'name', 'description')),
+    Level('departments', Department, 'institute', ('id', 'name')),
+    Level('study-programs', StudyProgram, 'department', ('id', 'name', 'description', 'year')),
+    Level(
+        'curriculum-subjects', CurriculumSubject, 'study_program',
+        ('id', 'name', 'credits', 'semester_number', 'is_mandatory'),
+    ),
+    Level(
+        'study-subjects', StudySubject, 'curriculum_subject',
+        ('id', 'name', 'credits', 'hours_per_week', 'subject_type'),
+    ),
+)
+LEVEL_NAMES = [level.name for level in LEVELS]
+HIERARCHY_MODELS = tuple(level.model for level in LEVELS)
+
+
+def build_tree(root=None, pk=None):
+    """
+    Return the list of institutes with their descendants, or the node
+    ``pk`` of level ``root`` with its descendants (None if it doesn't
+    exist). Runs one query per level; each level is filtered on the ids
+    the previous one returned (or not at all for the whole tree), and
+    rows whose parent isn't in the tree are left out.
+    """
+    start = LEVEL_NAMES.index(root) if root else 0
+    queryset = LEVELS[start].model.objects.all()
+    if root:
+        queryset = queryset.filter(pk=pk)
+
+    roots = None
+    parents = {}
+    for depth, level in enumerate(LEVELS[start:], start=start):
+        if depth > start:
+            queryset = level.model.objects.all()
+            if root:
+                queryset = queryset.filter(**{f'{level.parent}_id__in': list(parents)})
+        nodes = {}
+        rows = queryset.order_by('name', 'pk').values(*level.fields, *([f'{level.parent}_id'] if depth > start else []))
+        for row in rows:
+            parent = parents.get(row.pop(f'{level.parent}_id', None))
+            if depth > start and parent is None:
+                continue
+            node = {'type': level.name, **row}
+            if depth < len(LEVELS) - 1:
+                node['children'] = []
+            nodes[node['id']] = node
+            if depth > start:
+                parent['children'].append(node)
+        if roots is None:
+            roots = list(nodes.values())
+        if not nodes:
+            break
+        parents = nodes
+
+    if root:
+        return roots[0] if roots else None
+    return roots
+
+
+def get_tree_json(root=None, pk=None):
+    """
+    Return ``(etag, content)`` with the tree serialized as JSON bytes
+    (``content`` is None for a missing node), from the cache if the
+    hierarchy hasn't changed since it was built.
+    """
+    versions = get_model_versions(HIERARCHY_MODELS)
+    parts = [root or '', str(pk or '')]
+    parts += [f'{label}={version}' for label, version in sorted(versions.items())]
+    etag = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+    key = CACHE_KEY.format(etag)
+    content = cache.get(key)
+    if content is None:
+        tree = build_tree(root, pk)
+        content = b'' if tree is None else json.dumps(tree, ensure_ascii=False).encode('utf-8')
+        cache.set(key, content, CACHE_TIMEOUT)
+    return etag, content or None
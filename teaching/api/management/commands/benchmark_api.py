@@ -0,0 +1,115 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from api.benchmark import (
+    discover_endpoints, HTTPRunner, InProcessRunner, load_report, run_benchmark, save_report,
+)
+
+
+def _format(value, digits=1):
+    return '-' if value is None else f'{value:.{digits}f}'
+
+
+class Command(BaseCommand):
+    help = (
+        'Request every list, detail and filter endpoint and report p50/p95/p99 latency, '
+        'SQL queries per request and throughput. Runs in process by default, or against a '
+        'running server with --url; --save and --compare keep and diff results between commits.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Requests per endpoint (default: 50)')
+        parser.add_argument('--warmup', type=int, default=2, help='Unmeasured requests per endpoint (default: 2)')
+        parser.add_argument(
+            '--url',
+            help='Base URL of a running server (e.g. http://localhost:8000); in process if omitted'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help='Concurrent requests with --url (default: 1)'
+        )
+        parser.add_argument('--endpoint', action='append', help='Only endpoints whose name contains this')
+        parser.add_argument('--save', metavar='PATH', help='Write the results as JSON')
+        parser.add_argument('--compare', metavar='PATH', help='Compare with results saved by --save')
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Database alias to sample ids from and count queries on (default: "default")'
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be at least 1')
+        report = {'results': {}}
+        if options['compare']:
+            try:
+                report = load_report(options['compare'])
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Cannot read "{options["compare"]}": {exc}')
+        baseline = report.get('results', {})
+
+        endpoints = discover_endpoints(options['database'])
+        if options['endpoint']:
+            endpoints = [
+                endpoint for endpoint in endpoints
+                if any(part in endpoint.name for part in options['endpoint'])
+            ]
+        if not endpoints:
+            raise CommandError('No endpoints to benchmark')
+
+        if options['url']:
+            runner = HTTPRunner(options['url'], options['concurrency'])
+            target = options['url']
+        else:
+            runner = InProcessRunner(options['database'])
+            target = 'in process'
+        self.stdout.write(
+            f"Benchmarking {len(endpoints)} endpoints {target}, {options['requests']} requests each"
+        )
+        self.stdout.write(
+            f"{'endpoint':<30} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'req/s':>8} {'errors':>6}"
+        )
+
+        def log(endpoint, result):
+            line = (
+                f"{endpoint.name:<30} {_format(result['p50_ms']):>8} {_format(result['p95_ms']):>8} "
+                f"{_format(result['p99_ms']):>8} {_format(result['queries']):>8} "
+                f"{_format(result['rps'], 0):>8} {result['errors']:>6}"
+            )
+            before = baseline.get(endpoint.name)
+            if before and before.get('p50_ms'):
+                change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100
+                line += f"  p50 {change:+.0f}%"
+                if before.get('rps'):
+                    line += f", req/s {(result['rps'] - before['rps']) / before['rps'] * 100:+.0f}%"
+                if before.get('queries') is not None and result['queries'] is not None:
+                    line += f", queries {before['queries']:.1f} -> {result['queries']:.1f}"
+            self.stdout.write(line)
+
+        started = time.perf_counter()
+        results = run_benchmark(runner, endpoints, options['requests'], options['warmup'], log)
+        # Overall throughput: measured requests over the time spent measuring them.
+        measured = sum(result['requests'] for result in results.values())
+        busy = sum(result['requests'] / result['rps'] for result in results.values() if result['rps'])
+        throughput = measured / busy if busy else None
+        line = f"Total: {measured} requests, {_format(throughput, 0)} req/s"
+        before = report.get('throughput')
+        if before and throughput:
+            line += f" (before: {before:.0f} req/s, {(throughput - before) / before * 100:+.0f}%)"
+        self.stdout.write(line + f" in {time.perf_counter() - started:.1f} s")
+
+        if options['save']:
+            save_report(
+                options['save'], results, target=target, requests=options['requests'], throughput=throughput,
+                concurrency=options['concurrency'] if options['url'] else 1,
+            )
+            self.stdout.write(f"Saved results to {options['save']}")
+        errors = sum(result['errors'] for result in results.values())
+        if errors:
+            self.stdout.write(self.style.WARNING(f'{errors} request(s) failed'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Benchmark finished'))
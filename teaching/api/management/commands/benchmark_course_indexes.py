@@ -0,0 +1,139 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, DEFAULT_DB_ALIAS, transaction
+
+from api.dataset import DatasetGenerator, DatasetSize
+from api.models import Course
+from api.slow_queries import explain
+
+
+PAGE_SIZE = 50
+
+# Indexes added by migration 0019, and the single-column indexes they
+# replaced (recreated by --compare to show the old plans).
+NEW_INDEXES = (
+    'course_code_title_idx', 'course_teacher_order_idx', 'course_type_order_idx',
+    'course_institute_order_idx', 'course_department_order_idx', 'course_program_order_idx',
+    'course_diverse_order_idx', 'course_semesters_cover_idx',
+)
+OLD_INDEXES = (
+    ('api_course', 'course_code'), ('api_course', 'type_id'), ('api_course', 'teacher_id'),
+    ('api_course', 'institute_id'), ('api_course', 'department_id'), ('api_course', 'study_program_id'),
+)
+
+
+def course_list_cases(using):
+    """``(label, queryset)`` for the course list's filter + order paths."""
+    courses = Course.objects.using(using)
+    sample = courses.order_by('pk')[courses.count() // 2]
+    through = Course.semesters.through.objects.using(using)
+    semester_id = through.filter(course_id=sample.pk).values_list('semester_id', flat=True).first()
+    ordered = ('course_code', 'title', 'pk')
+    return [
+        ('default order', courses.order_by(*ordered)),
+        ('teacher', courses.filter(teacher_id=sample.teacher_id).order_by(*ordered)),
+        ('type', courses.filter(type_id=sample.type_id).order_by(*ordered)),
+        ('institute', courses.filter(institute_id=sample.institute_id).order_by(*ordered)),
+        ('department', courses.filter(department_id=sample.department_id).order_by(*ordered)),
+        ('study_program', courses.filter(study_program_id=sample.study_program_id).order_by(*ordered)),
+        ('gender_diversity', courses.filter(gender_diversity=True).order_by(*ordered)),
+        (
+            'semester',
+            courses.filter(pk__in=through.filter(semester_id=semester_id).values('course_id')).order_by(*ordered),
+        ),
+    ]
+
+
+def summarize_plan(plan):
+    """Condense a plan to the access paths: scans, index lookups, sorts."""
+    steps = []
+    for line in plan or ():
+        upper = line.upper()
+        if any(word in upper for word in ('SCAN', 'SEARCH', 'SORT', 'TEMP B-TREE', 'INDEX')):
+            steps.append(line.split('|')[-1].strip().split('  (cost')[0].strip(' ->'))
+    return steps
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the course list filter + order queries on a synthetic catalog and print '
+        'their query plans, to check they use the composite indexes instead of table scans.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--courses',
+            type=int,
+            default=200000,
+            help='Generate a synthetic catalog until there are this many courses (default: 200000)'
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic catalog (default: 0)')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per query (default: 20)')
+        parser.add_argument(
+            '--compare',
+            action='store_true',
+            help='Also run every query with the pre-0019 indexes (in a transaction that is rolled back)'
+        )
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Database alias to benchmark (default: "default")'
+        )
+
+    def handle(self, *args, **options):
+        using = options['database']
+        connection = connections[using]
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+
+        missing = options['courses'] - Course.objects.using(using).count()
+        if missing > 0:
+            self.stdout.write(f"Generating {missing} synthetic courses (seed {options['seed']})...")
+            DatasetGenerator(DatasetSize(courses=missing), seed=options['seed'], using=using).generate()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        results = self.run_cases(using, options['repeat'])
+        if options['compare']:
+            with transaction.atomic(using=using):
+                with connection.cursor() as cursor:
+                    for name in NEW_INDEXES:
+                        cursor.execute(f'DROP INDEX {name}')
+                    for table, column in OLD_INDEXES:
+                        cursor.execute(f'CREATE INDEX benchmark_{column} ON {table} ({column})')
+                    cursor.execute('ANALYZE')
+                before = self.run_cases(using, options['repeat'])
+                transaction.set_rollback(True, using=using)
+        else:
+            before = {}
+
+        for label, (median, plan) in results.items():
+            line = f'{label:<18} {median:8.2f} ms'
+            if label in before:
+                line += f'  (before: {before[label][0]:8.2f} ms, {before[label][0] / median:5.1f}x)'
+            self.stdout.write(line)
+            if label in before:
+                self.stdout.write('  before:')
+                for step in summarize_plan(before[label][1]):
+                    self.stdout.write(f'    {step}')
+                self.stdout.write('  after:')
+            for step in summarize_plan(plan):
+                self.stdout.write(f'    {step}')
+
+    def run_cases(self, using, repeat):
+        """Return ``{label: (median ms for the first page, plan)}``."""
+        connection = connections[using]
+        results = {}
+        for label, queryset in course_list_cases(using):
+            sql, params = queryset[:PAGE_SIZE].query.get_compiler(using).as_sql()
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                with connection.cursor() as cursor:
+                    cursor.execute(sql, params)
+                    cursor.fetchall()
+                timings.append((time.perf_counter() - start) * 1000)
+            results[label] = (statistics.median(timings), explain(connection, sql, params))
+        return results
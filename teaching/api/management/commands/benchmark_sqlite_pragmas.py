@@ -0,0 +1,154 @@
+import json
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from api.benchmark import InProcessRunner, percentile
+from api.dataset import free_course_codes
+from api.export import iter_course_rows
+from api.importing import CatalogImporter, CHUNK_SIZE, ImportStats
+from api.models import Course
+from api.sqlite_tuning import get_pragmas, in_checkout, read_pragmas, STOCK_PRAGMAS
+
+
+def import_records(count):
+    """Export-format records of ``count`` new courses copied from existing ones."""
+    templates = list(iter_course_rows(Course.objects.order_by('pk')[:min(count, 1000)]))
+    if not templates:
+        raise CommandError('The database has no courses; run generate_dataset first')
+    try:
+        codes = free_course_codes(count)
+    except ValueError as error:
+        raise CommandError(str(error))
+    records = []
+    for index, code in enumerate(codes):
+        record = json.loads(json.dumps(templates[index % len(templates)], cls=DjangoJSONEncoder))
+        record.pop('id', None)
+        record['course_code'] = code
+        records.append((index + 1, record))
+    return records
+
+
+class Command(BaseCommand):
+    help = (
+        'Request the course list and detail from concurrent reader threads while a bulk import '
+        '(import_catalog) writes to the SQLite database, once with SQLite\'s stock pragmas and '
+        'once with settings.SQLITE_PRAGMAS, and report read latency, throughput and errors. '
+        'Adds --courses new courses per profile: run it on a scratch copy of the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=20000, help='Courses imported per profile (default: 20000)')
+        parser.add_argument('--readers', type=int, default=4, help='Concurrent reader threads (default: 4)')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help=f'Import records per transaction (default: {CHUNK_SIZE})'
+        )
+        parser.add_argument(
+            '--profile',
+            action='append',
+            choices=['stock', 'tuned'],
+            help='Profiles to run (default: both)'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('The default database is not SQLite')
+        if options['courses'] < 1 or options['readers'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--courses, --readers and --chunk-size must be at least 1')
+        profiles = {'stock': STOCK_PRAGMAS, 'tuned': get_pragmas()}
+        if not profiles['tuned']:
+            raise CommandError('settings.SQLITE_PRAGMAS is empty (SQLITE_TUNING=false)')
+
+        if 'journal_mode' in profiles['tuned'] and in_checkout(connection.settings_dict['NAME']):
+            self.stdout.write(self.style.WARNING(
+                'The database is inside a git checkout, so journal_mode is left alone; '
+                'benchmark a copy outside it to include WAL'
+            ))
+
+        sample = Course.objects.order_by('pk')[Course.objects.count() // 2]
+        paths = [
+            reverse('course-list'),
+            f"{reverse('course-list')}?institute={sample.institute_id}",
+            reverse('course-detail', args=[sample.pk]),
+        ]
+        self.stdout.write(
+            f"{'profile':<8} {'import s':>9} {'reads':>7} {'reads/s':>8} {'p50 ms':>8} "
+            f"{'p95 ms':>8} {'max ms':>8} {'errors':>7}"
+        )
+        for name in options['profile'] or ['stock', 'tuned']:
+            records = import_records(options['courses'])
+            with override_settings(SQLITE_PRAGMAS=profiles[name]):
+                result = self.run_profile(records, paths, options['readers'], options['chunk_size'])
+            self.stdout.write(
+                f"{name:<8} {result['import_s']:>9.1f} {len(result['timings']):>7} {result['rps']:>8.0f} "
+                f"{self._ms(percentile(result['timings'], 50)):>8} {self._ms(percentile(result['timings'], 95)):>8} "
+                f"{self._ms(max(result['timings'], default=None)):>8} {result['errors']:>7}"
+            )
+            if result['imported'] != len(records):
+                self.stdout.write(self.style.WARNING(f"  imported {result['imported']} of {len(records)} courses"))
+            if options['verbosity'] > 1:
+                self.stdout.write(f"  pragmas: {result['pragmas']}")
+        self.stdout.write(self.style.SUCCESS('Benchmark finished'))
+
+    def run_profile(self, records, paths, readers, chunk_size):
+        # New connections pick up the profile; switching the journal mode
+        # needs the only connection to the database.
+        connections.close_all()
+        connection.ensure_connection()
+        pragmas = read_pragmas(connection)
+
+        done = threading.Event()
+        timings, errors = [], []
+
+        def read():
+            runner = InProcessRunner()
+            try:
+                while not done.is_set():
+                    for path in paths:
+                        try:
+                            duration, _, ok = runner.request(path)
+                        except Exception:
+                            ok = False
+                        if ok:
+                            timings.append(duration)
+                        else:
+                            errors.append(path)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=read) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        stats = ImportStats('courses')
+        start = time.perf_counter()
+        try:
+            importer = CatalogImporter(chunk_size=chunk_size)
+            for offset in range(0, len(records), chunk_size):
+                importer.import_chunk('courses', records[offset:offset + chunk_size], stats)
+            importer.finish()
+        finally:
+            elapsed = time.perf_counter() - start
+            done.set()
+            for thread in threads:
+                thread.join()
+        connections.close_all()
+        return {
+            'import_s': elapsed,
+            'timings': timings,
+            'errors': len(errors),
+            'rps': len(timings) / elapsed if elapsed else 0,
+            'pragmas': pragmas,
+            'imported': stats.created + stats.updated,
+        }
+
+    @staticmethod
+    def _ms(seconds):
+        return '-' if seconds is None else f'{seconds * 1000:.1f}'
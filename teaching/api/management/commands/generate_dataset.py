@@ -0,0 +1,55 @@
+from dataclasses import fields
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from api.dataset import BATCH_SIZE, DatasetGenerator, DatasetSize
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a seeded synthetic catalog: the academic hierarchy, teachers, semesters and '
+        'courses, written with bulk inserts. The same seed and sizes give the same catalog.'
+    )
+
+    def add_arguments(self, parser):
+        for field in fields(DatasetSize):
+            parser.add_argument(
+                f'--{field.name.replace("_", "-")}',
+                type=field.type,
+                default=field.default,
+                help=f'{field.name.replace("_", " ").capitalize()} (default: {field.default})'
+            )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Rows per INSERT (default: {BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Database alias to write to (default: "default")'
+        )
+
+    def handle(self, *args, **options):
+        size = DatasetSize(**{field.name: options[field.name] for field in fields(DatasetSize)})
+        if size.courses < 0 or size.teachers < 1 or size.institutes < 1 or size.years < 1:
+            raise CommandError('Need at least one teacher, institute and year, and no negative sizes')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        verbose = options['verbosity'] > 1
+        generator = DatasetGenerator(
+            size, seed=options['seed'], using=options['database'], batch_size=options['batch_size'],
+            log=(lambda message: self.stdout.write(f'  {message}')) if verbose else None,
+        )
+        self.stdout.write(f"Generating {size.courses} courses (seed {options['seed']})...")
+        try:
+            counts = generator.generate()
+        except ValueError as error:
+            raise CommandError(f'{error}: course codes are S + 5 digits, lower --courses')
+        self.stdout.write(self.style.SUCCESS(
+            'Successfully generated ' + ', '.join(f'{count} {name.replace("_", " ")}' for name, count in counts.items())
+        ))
@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from api.importing import CatalogImporter, CHUNK_SIZE, detect_kind, KINDS
+
+
+class Command(BaseCommand):
+    help = (
+        'Import courses, teachers, semesters and the academic hierarchy from CSV or NDJSON files. '
+        'The kind of each file is taken from its name (e.g. "study_programs.csv") or --kind; '
+        'files are imported in dependency order.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help='CSV (with a header row) or NDJSON files')
+        parser.add_argument(
+            '--kind',
+            choices=list(KINDS),
+            help='Kind of the records (only with a single file)'
+        )
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'ndjson'],
+            help='Input format (default: from the file extension, .csv or NDJSON otherwise)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help=f'Records per chunk and transaction (default: {CHUNK_SIZE})'
+        )
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Database alias to import into (default: "default")'
+        )
+
+    def handle(self, *args, **options):
+        if options['kind'] and len(options['files']) > 1:
+            raise CommandError('--kind can only be used with a single file')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        files = []
+        for path in options['files']:
+            kind = options['kind'] or detect_kind(path)
+            if kind is None:
+                raise CommandError(
+                    f'Cannot tell what "{path}" contains; name it after one of '
+                    f'{", ".join(KINDS)} or pass --kind'
+                )
+            files.append((kind, path))
+        order = list(KINDS)
+        files.sort(key=lambda entry: order.index(entry[0]))
+
+        importer = CatalogImporter(using=options['database'], chunk_size=options['chunk_size'])
+        skipped = 0
+        for kind, path in files:
+            self.stdout.write(f"Importing {kind} from {path}...")
+            try:
+                stats = importer.import_file(kind, path, options['format'])
+            except OSError as exc:
+                raise CommandError(f'Cannot read "{path}": {exc}')
+            self.stdout.write(
+                f"  {stats.created} created, {stats.updated} updated, {stats.skipped} skipped"
+            )
+            for error in stats.errors:
+                self.stderr.write(f"  {error}")
+            skipped += stats.skipped
+
+        importer.finish()
+        message = f"Successfully imported {len(files)} file(s)"
+        if skipped:
+            self.stdout.write(self.style.WARNING(f"{message}, {skipped} invalid record(s) skipped"))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
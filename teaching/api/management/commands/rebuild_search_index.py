@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+from api.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the course full-text search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Database alias to rebuild the index on (default: "default")'
+        )
+
+    def handle(self, *args, **options):
+        backend = get_search_backend(options['database'])
+        self.stdout.write(f"Rebuilding search index using the {backend.vendor} backend...")
+
+        with transaction.atomic(using=options['database']):
+            backend.create_index()
+            indexed = backend.rebuild()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully indexed {indexed} courses")
+        )
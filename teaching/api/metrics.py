@@ -0,0 +1,186 @@
+"""
+Request Metrics
+===============
+
+In-process metrics for ``api.middleware.MetricsMiddleware``, exposed at
+``/api/_metrics`` in the Prometheus text format.
+
+Per resolved URL name the middleware records the request latency, the
+number of SQL queries, the time spent in SQL and the response size.
+
+Recording is lock-free: every thread writes to its own shard (keyed by
+thread id), so an observation is a couple of dictionary lookups and
+list increments without contention. Rendering sums the shards; a
+concurrent write may or may not be included in a scrape, which is fine
+for monotonic counters.
+
+Other modules can add their own series with ``register_collector``.
+"""
+
+from bisect import bisect_left
+from threading import get_ident
+
+
+# Prometheus' default latency buckets (seconds).
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value):
+    if isinstance(value, float):
+        return repr(value) if value != int(value) else str(int(value))
+    return str(value)
+
+
+class Metric:
+    """A metric whose series are kept in per-thread shards."""
+    type = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._shards = {}
+
+    def _series(self, labels):
+        shard = self._shards.get(get_ident())
+        if shard is None:
+            shard = self._shards.setdefault(get_ident(), {})
+        series = shard.get(labels)
+        if series is None:
+            series = shard[labels] = self._new_series()
+        return series
+
+    def _new_series(self):
+        raise NotImplementedError
+
+    def collect(self):
+        """Return ``{labels: series}`` summed over all shards."""
+        merged = {}
+        for shard in list(self._shards.values()):
+            for labels, series in list(shard.items()):
+                total = merged.get(labels)
+                if total is None:
+                    merged[labels] = list(series)
+                else:
+                    for index, value in enumerate(series):
+                        total[index] += value
+        return merged
+
+    def reset(self):
+        self._shards = {}
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        for labels, series in sorted(self.collect().items()):
+            lines.extend(self._render_series(labels, series))
+        return lines
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def _new_series(self):
+        return [0]
+
+    def inc(self, labels=(), amount=1):
+        self._series(labels)[0] += amount
+
+    def _render_series(self, labels, series):
+        yield f'{self.name}{_format_labels(self.labels, labels)} {_format_number(series[0])}'
+
+
+class Histogram(Metric):
+    """
+    Series are ``[count per bucket..., count above the last bucket, sum]``;
+    buckets are made cumulative when rendered.
+    """
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def _new_series(self):
+        return [0] * (len(self.buckets) + 2)
+
+    def observe(self, labels, value):
+        series = self._series(labels)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def _render_series(self, labels, series):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), series[:-1]):
+            cumulative += count
+            le = bound if bound == '+Inf' else _format_number(float(bound))
+            yield f'{self.name}_bucket{_format_labels(self.labels, labels, [("le", le)])} {cumulative}'
+        yield f'{self.name}_sum{_format_labels(self.labels, labels)} {_format_number(series[-1])}'
+        yield f'{self.name}_count{_format_labels(self.labels, labels)} {cumulative}'
+
+
+REQUESTS = Counter(
+    'api_requests_total', 'Requests by URL name, method and status.', ('view', 'method', 'status'),
+)
+LATENCY = Histogram(
+    'api_request_duration_seconds', 'Request latency by URL name.', ('view',),
+)
+QUERIES = Histogram(
+    'api_request_db_queries', 'SQL queries per request by URL name.', ('view',), QUERY_BUCKETS,
+)
+DB_TIME = Histogram(
+    'api_request_db_duration_seconds', 'Time spent in SQL per request by URL name.', ('view',),
+)
+RESPONSE_SIZE = Histogram(
+    'api_response_size_bytes', 'Response body size by URL name.', ('view',), SIZE_BUCKETS,
+)
+METRICS = [REQUESTS, LATENCY, QUERIES, DB_TIME, RESPONSE_SIZE]
+
+_collectors = []
+
+
+def sample(name, label_names, label_values, value):
+    """One exposition line, for collectors."""
+    return f'{name}{_format_labels(label_names, label_values)} {_format_number(value)}'
+
+
+def register_collector(collector):
+    """Add a callable returning extra exposition lines to every scrape."""
+    if collector not in _collectors:
+        _collectors.append(collector)
+    return collector
+
+
+def observe_request(view, method, status, duration, queries, db_time, size=None):
+    REQUESTS.inc((view, method, str(status)))
+    LATENCY.observe((view,), duration)
+    QUERIES.observe((view,), queries)
+    DB_TIME.observe((view,), db_time)
+    if size is not None:
+        RESPONSE_SIZE.observe((view,), size)
+
+
+def render():
+    """Return every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        lines.extend(collector())
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    for metric in METRICS:
+        metric.reset()
@@ -0,0 +1,172 @@
+"""
+API Middleware
+==============
+"""
+
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+
+from . import db_routing, metrics
+
+
+class QueryStats:
+    """``execute_wrapper`` counting the queries of a request and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+# The ``QueryStats`` of the current request. A context variable rather
+# than a per-connection wrapper, so that queries run by async views (in
+# ``sync_to_async`` threads, on those threads' connections) are counted.
+request_query_stats = ContextVar('request_query_stats', default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    """``execute_wrapper`` feeding the current request's ``QueryStats``."""
+    stats = request_query_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def install(connection):
+    """Add ``count_queries`` to a new connection (see ``api.signals``)."""
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+class MetricsMiddleware:
+    """
+    Record latency, SQL query count, SQL time and response size per
+    resolved URL name (see ``api.metrics``).
+
+    Enabled by ``settings.METRICS_ENABLED``; when disabled the middleware
+    removes itself from the chain at startup and costs nothing.
+    ``settings.METRICS_HEADERS`` adds ``X-Query-Count`` and
+    ``Server-Timing`` headers to every response for debugging.
+
+    Works in both sync and async chains, so it doesn't pin async views
+    to a thread under ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.headers = getattr(settings, 'METRICS_HEADERS', False)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = QueryStats()
+        token = request_query_stats.set(stats)
+        try:
+            start = time.perf_counter()
+            response = self.get_response(request)
+            duration = time.perf_counter() - start
+        finally:
+            request_query_stats.reset(token)
+        return self.record(request, response, stats, duration)
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        token = request_query_stats.set(stats)
+        try:
+            start = time.perf_counter()
+            response = await self.get_response(request)
+            duration = time.perf_counter() - start
+        finally:
+            request_query_stats.reset(token)
+        return self.record(request, response, stats, duration)
+
+    def record(self, request, response, stats, duration):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else '<unresolved>'
+        size = None if response.streaming else len(response.content)
+        metrics.observe_request(
+            view, request.method, response.status_code, duration, stats.count, stats.duration, size,
+        )
+
+        if self.headers:
+            response['X-Query-Count'] = str(stats.count)
+            response['Server-Timing'] = (
+                f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", '
+                f'total;dur={duration * 1000:.1f}'
+            )
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Route the reads of public API requests to a read replica and pin
+    clients that wrote to the primary (see ``api.db_routing``).
+
+    Removed from the chain at startup when ``settings.DATABASE_REPLICAS``
+    is empty. Works in both sync and async chains.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not db_routing.get_replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = db_routing.RoutingState(pinned=db_routing.PIN_COOKIE in request.COOKIES)
+        token = db_routing.request_routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            db_routing.request_routing.reset(token)
+        return self.pin(response, state)
+
+    async def __acall__(self, request):
+        state = db_routing.RoutingState(pinned=db_routing.PIN_COOKIE in request.COOKIES)
+        token = db_routing.request_routing.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            db_routing.request_routing.reset(token)
+        return self.pin(response, state)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Run in a thread under ASGI, so measuring the lag can query.
+        state = db_routing.request_routing.get()
+        if state is None or not db_routing.reads_from_replica(view_func, request, *view_args, **view_kwargs):
+            return None
+        if not state.pinned:
+            state.replica = db_routing.choose_replica()
+        db_routing.REPLICA_READS.inc((state.replica or DEFAULT_DB_ALIAS,))
+        return None
+
+    def pin(self, response, state):
+        if state.wrote:
+            response.set_cookie(
+                db_routing.PIN_COOKIE, '1', max_age=self.pin_seconds, httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from api.search import get_search_backend
+
+    backend = get_search_backend(connection=schema_editor.connection)
+    backend.create_index()
+    backend.rebuild()
+
+
+def drop_search_index(apps, schema_editor):
+    from api.search import get_search_backend
+
+    get_search_backend(connection=schema_editor.connection).drop_index()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_remove_semester_format'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
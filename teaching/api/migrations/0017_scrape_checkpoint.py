@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScrapeCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('base_url', models.URLField(unique=True)),
+                ('last_page', models.IntegerField(default=0, help_text='Last page whose courses are written')),
+                ('completed', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
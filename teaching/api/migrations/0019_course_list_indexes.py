@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_scrape_validators'),
+    ]
+
+    operations = [
+        # New indexes first, so the foreign keys never lack one.
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['course_code', 'title'], name='course_code_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['teacher', 'course_code', 'title'], name='course_teacher_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['type', 'course_code', 'title'], name='course_type_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['institute', 'course_code', 'title'], name='course_institute_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['department', 'course_code', 'title'], name='course_department_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['study_program', 'course_code', 'title'], name='course_program_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(condition=models.Q(('gender_diversity', True)), fields=['course_code', 'title'], name='course_diverse_order_idx'),
+        ),
+        migrations.AlterField(
+            model_name='course',
+            name='department',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='api.department'),
+        ),
+        migrations.AlterField(
+            model_name='course',
+            name='institute',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='api.institute'),
+        ),
+        migrations.AlterField(
+            model_name='course',
+            name='study_program',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='api.studyprogram'),
+        ),
+        migrations.AlterField(
+            model_name='course',
+            name='teacher',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='api.teacher'),
+        ),
+        migrations.AlterField(
+            model_name='course',
+            name='type',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='api.coursetype'),
+        ),
+        migrations.RemoveIndex(
+            model_name='course',
+            name='api_course_course__aeafd3_idx',
+        ),
+        # Semester filter: a semi-join on semester_id that reads course_id
+        # from the index alone.
+        migrations.RunSQL(
+            'CREATE INDEX course_semesters_cover_idx ON api_course_semesters (semester_id, course_id)',
+            'DROP INDEX course_semesters_cover_idx',
+        ),
+    ]
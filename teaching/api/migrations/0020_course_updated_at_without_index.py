@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_course_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='course',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -11,12 +11,12 @@ class Course(models.Model):
 		db_index=True
 	)
 	description = models.TextField()
-	type = models.ForeignKey('CourseType', on_delete=models.CASCADE, null=True, blank=True)
+	type = models.ForeignKey('CourseType', on_delete=models.CASCADE, null=True, blank=True, db_index=False)
 	# Removed single semester field, replaced with many-to-many relationship below
 	year = models.IntegerField(null=True, blank=True)
 	start_date = models.DateField(null=True, blank=True)
 	end_date = models.DateField(null=True, blank=True)
-	teacher = models.ForeignKey('Teacher', on_delete=models.CASCADE, null=True, blank=True)
+	teacher = models.ForeignKey('Teacher', on_delete=models.CASCADE, null=True, blank=True, db_index=False)
 	credits = models.IntegerField(null=True, blank=True)
 	gender_diversity = models.BooleanField(default=False)
 	
@@ -24,17 +24,35 @@ class Course(models.Model):
 	semesters = models.ManyToManyField('Semester', related_name='courses', blank=True, help_text="Semesters where this course is offered")
 	
 	# Add relationships for filtering
-	institute = models.ForeignKey('Institute', on_delete=models.CASCADE, null=True, blank=True)
-	department = models.ForeignKey('Department', on_delete=models.CASCADE, null=True, blank=True)
-	study_program = models.ForeignKey('StudyProgram', on_delete=models.CASCADE, null=True, blank=True)
+	institute = models.ForeignKey('Institute', on_delete=models.CASCADE, null=True, blank=True, db_index=False)
+	department = models.ForeignKey('Department', on_delete=models.CASCADE, null=True, blank=True, db_index=False)
+	study_program = models.ForeignKey('StudyProgram', on_delete=models.CASCADE, null=True, blank=True, db_index=False)
 	curriculum_subject = models.ForeignKey('CurriculumSubject', on_delete=models.CASCADE, null=True, blank=True)
 	study_subject = models.ForeignKey('StudySubject', on_delete=models.CASCADE, null=True, blank=True)
 
+	# Maintained on every save; drives the conditional GET validators
+	# (aggregated over the served rows, so it needs no index)
+	updated_at = models.DateTimeField(auto_now=True)
+
 	class Meta:
 		ordering = ['course_code', 'title']
+		# The list is filtered by these foreign keys and sorted (and keyset
+		# paginated) by course_code, title: each filter gets a composite
+		# index that also serves the sort and the foreign key lookups, so
+		# the FKs above have no single-column index of their own.
 		indexes = [
-			models.Index(fields=['course_code']),
+			models.Index(fields=['course_code', 'title'], name='course_code_title_idx'),
 			models.Index(fields=['year']),
+			models.Index(fields=['teacher', 'course_code', 'title'], name='course_teacher_order_idx'),
+			models.Index(fields=['type', 'course_code', 'title'], name='course_type_order_idx'),
+			models.Index(fields=['institute', 'course_code', 'title'], name='course_institute_order_idx'),
+			models.Index(fields=['department', 'course_code', 'title'], name='course_department_order_idx'),
+			models.Index(fields=['study_program', 'course_code', 'title'], name='course_program_order_idx'),
+			# Gender-diverse courses are the minority that gets filtered for.
+			models.Index(
+				fields=['course_code', 'title'], name='course_diverse_order_idx',
+				condition=models.Q(gender_diversity=True),
+			),
 		]
 
 	def clean(self):
@@ -70,6 +88,7 @@ class Course(models.Model):
 class CourseType(models.Model):
 	name = models.CharField(max_length=50)
 	description = models.TextField()
+	updated_at = models.DateTimeField(auto_now=True)
 
 	def __str__(self):
 		return self.name
@@ -79,6 +98,7 @@ class StudyProgram(models.Model):
 	description = models.TextField()
 	department = models.ForeignKey('Department', on_delete=models.CASCADE)
 	year = models.IntegerField()
+	updated_at = models.DateTimeField(auto_now=True)
 
 	def __str__(self):
 		return self.name
@@ -88,6 +108,7 @@ class Teacher(models.Model):
 	email = models.EmailField(unique=True)
 	# department = models.ForeignKey('Department', on_delete=models.CASCADE)
 	subject = models.CharField(max_length=100)
+	updated_at = models.DateTimeField(auto_now=True)
 
 	def __str__(self):
 		return self.name
@@ -95,6 +116,7 @@ class Teacher(models.Model):
 class Institute(models.Model):
 	name = models.CharField(max_length=100)
 	description = models.TextField()
+	updated_at = models.DateTimeField(auto_now=True)
 
 	def __str__(self):
 		return self.name
@@ -102,6 +124,7 @@ class Institute(models.Model):
 class Department(models.Model):
 	name = models.CharField(max_length=100)
 	institute = models.ForeignKey(Institute, on_delete=models.CASCADE, related_name='departments')
+	updated_at = models.DateTimeField(auto_now=True)
 
 	def __str__(self):
 		return self.name
@@ -128,6 +151,7 @@ class Semester(models.Model):
 	start_date = models.DateField(null=True, blank=True)
 	end_date = models.DateField(null=True, blank=True)
 	is_active = models.BooleanField(default=True, help_text="Is this semester currently active for enrollment")
+	updated_at = models.DateTimeField(auto_now=True)
 	
 	class Meta:
 		unique_together = ['year', 'season']
@@ -148,6 +172,7 @@ class CurriculumSubject(models.Model):
 	credits = models.IntegerField(default=0)
 	semester_number = models.IntegerField(help_text="Which semester this subject is taught in")
 	is_mandatory = models.BooleanField(default=True)
+	updated_at = models.DateTimeField(auto_now=True)
 	
 	def __str__(self):
 		return f"{self.name} ({self.study_program.name})"
@@ -166,10 +191,42 @@ class StudySubject(models.Model):
 		('project', 'Project'),
 		('thesis', 'Thesis'),
 	], default='lecture')
+	updated_at = models.DateTimeField(auto_now=True)
 	
 	def __str__(self):
 		return f"{self.name} ({self.curriculum_subject.name})"
 	
 
+class ScrapeCheckpoint(models.Model):
+	"""Progress of a scrape_courses run, so a rerun resumes after a crash"""
+	base_url = models.URLField(unique=True)
+	last_page = models.IntegerField(default=0, help_text="Last page whose courses are written")
+	completed = models.BooleanField(default=False)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	def __str__(self):
+		return f"{self.base_url} (page {self.last_page})"
+
+class ScrapedPage(models.Model):
+	"""HTTP validators of a scraped listing page, sent back as conditional request headers"""
+	url = models.URLField(max_length=500, unique=True)
+	etag = models.CharField(max_length=200, blank=True)
+	last_modified = models.CharField(max_length=50, blank=True)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	def __str__(self):
+		return self.url
+
+class ScrapedCourse(models.Model):
+	"""Content hash of a scraped course entry, keyed by its /courses/<sem>/S<code>/ URL"""
+	url = models.CharField(max_length=100, unique=True)
+	content_hash = models.CharField(max_length=40)
+	course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='scraped_entries')
+	updated_at = models.DateTimeField(auto_now=True)
+
+	def __str__(self):
+		return self.url
+
+
 #User model is not defined here, assuming it is imported from Django's auth models
 # If you need to extend the User model, you can create a custom user model or use
\ No newline at end of file
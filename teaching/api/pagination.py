@@ -0,0 +1,190 @@
+"""
+Keyset Pagination
+=================
+
+Cursor-based pagination over the model's ordering.
+
+Every page is fetched with a ``WHERE (ordering columns) > (last row)``
+predicate instead of ``OFFSET``, so page 500 costs the same as page 1.
+The ordering follows the queryset (or ``Meta.ordering``) and always ends
+with the primary key so that the position of every row is unique.
+
+Query parameters:
+- cursor: opaque cursor taken from the ``next``/``previous`` links
+- page_size: number of rows per page (capped at ``max_page_size``)
+- paginate=false: return the plain, unpaginated list (legacy shape)
+"""
+
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination with opaque cursors.
+
+    Views may set ``keyset_ordering`` to override the ordering taken from
+    the queryset. Ordering fields must be non-nullable.
+    """
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    legacy_query_param = 'paginate'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page = self.get_page_queryset(queryset, request, view)
+        if page is None:
+            return None
+        return self.set_page(list(page))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` for async views, fetching with ``aiterator``."""
+        page = self.get_page_queryset(queryset, request, view)
+        if page is None:
+            return None
+        return self.set_page([row async for row in page.aiterator(chunk_size=self.page_size + 1)])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        Return the sliced queryset of the requested page (one row more
+        than the page size), or ``None`` when pagination is turned off.
+        """
+        if request.query_params.get(self.legacy_query_param, '').lower() == 'false':
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset, view)
+
+        self.position, self.reverse = self.decode_cursor(request)
+        ordering = self.ordering
+        if self.reverse:
+            ordering = [self._invert(field) for field in ordering]
+
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self._seek_filter(ordering, self.position))
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, rows):
+        """Trim the fetched ``rows`` to the page and work out the links."""
+        # The page and the row after it (``api.caching`` validators)
+        self.fetched_rows = rows
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+            self.has_next = self.position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.position is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, queryset, view):
+        """
+        Return the ordering used for the keyset, always ending with ``pk``.
+        """
+        ordering = getattr(view, 'keyset_ordering', None)
+        if ordering is None:
+            ordering = queryset.query.order_by or queryset.model._meta.ordering
+        ordering = [field for field in ordering if isinstance(field, str)]
+
+        pk_name = queryset.model._meta.pk.name
+        if not any(field.lstrip('-') in ('pk', pk_name) for field in ordering):
+            ordering = ordering + ['pk']
+        return ordering
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, instance, reverse):
+        position = [self._get_value(instance, field.lstrip('-')) for field in self.ordering]
+        payload = json.dumps({'p': position, 'r': int(reverse)}, cls=DjangoJSONEncoder)
+        cursor = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+            position = payload['p']
+            reverse = bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def _seek_filter(self, ordering, position):
+        """
+        Build ``(a, b, c) > (x, y, z)`` honouring per-column direction:
+        ``a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)``.
+        """
+        condition = Q()
+        equal = {}
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def _get_value(instance, field):
+        for attr in field.split('__'):
+            instance = getattr(instance, attr)
+        return instance
@@ -0,0 +1,558 @@
+"""
+Course Scraper Pipeline
+=======================
+
+Staged pipeline behind ``python manage.py scrape_courses``:
+
+1. fetch  - pages are downloaded concurrently by a bounded thread pool
+   sharing one pooled ``requests.Session``
+2. parse  - HTML is parsed in a process pool (``parse_page`` is a pure
+   function of the page content, so it pickles and needs no Django)
+3. write  - parsed courses are buffered and upserted on ``course_code``
+   with ``bulk_create(update_conflicts=True)``, one batch at a time;
+   course types, teachers and semesters come from a run-long identity
+   map (``api.dimensions``)
+
+Pages are consumed in order, so after every written batch the pipeline
+records the last page whose courses are all in the database in a
+``ScrapeCheckpoint``. A rerun after a crash resumes from there.
+
+Runs are incremental: the ``ETag``/``Last-Modified`` of every page is
+stored (``ScrapedPage``) and sent back as ``If-None-Match``/
+``If-Modified-Since``, so unchanged pages answer ``304`` and are neither
+parsed nor written. Every parsed course entry carries a content hash
+stored per ``/courses/<sem>/S<code>/`` URL (``ScrapedCourse``); entries
+whose hash is unchanged are skipped by the writer.
+
+Batches only add semester links. Links of a course to semesters it is no
+longer listed under are deleted once a run has seen the whole listing:
+it wasn't incremental (``--full``), started at page 1, no page failed and
+it read past the last page (a page without courses). Runs that covered
+part of the listing, including incremental runs skipping ``304`` pages,
+leave the links alone, since a course's other listings may be on pages
+they didn't parse.
+"""
+
+import hashlib
+import json
+import logging
+import re
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = 'https://base.uni-ak.ac.at/courses/'
+COURSE_LINK_RE = re.compile(r'/courses/(\d{4}[WS])/(S\d+)/')
+COURSE_CODE_RE = re.compile(r'^S\d{5}$')
+
+TYPE_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r'(scientific seminar)',
+        r'(Vorlesung und Übungen)',
+        r'(artistic Seminar)',
+        r'(Lecture and Discussion)',
+        r'(Übungen)',
+        r'(Vorlesung)',
+    )
+]
+DEFAULT_TYPE = 'General'
+NO_DESCRIPTION = 'No description available'
+
+
+# Fetch stage
+# ``content`` is None when the server answered 304 Not Modified.
+FetchedPage = namedtuple('FetchedPage', ['url', 'content', 'etag', 'last_modified'])
+
+
+def make_session(pool_size, retries=3):
+    """Return a session whose connection pool fits ``pool_size`` workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=retries, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504)),
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def page_url(base_url, page):
+    return base_url if page == 1 else f'{base_url}?page={page}'
+
+
+def fetch_page(session, url, timeout=30, etag='', last_modified=''):
+    """Download one page, conditionally if validators are known."""
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    response = session.get(url, timeout=timeout, headers=headers)
+    response.raise_for_status()
+    if response.status_code == 304:
+        return FetchedPage(url, None, etag, last_modified)
+    return FetchedPage(
+        url,
+        response.content,
+        response.headers.get('ETag', ''),
+        response.headers.get('Last-Modified', ''),
+    )
+
+
+# Parse stage
+def parse_page(content):
+    """Parse a listing page into a list of course dicts (no database access)."""
+    soup = BeautifulSoup(content, HTML_PARSER)
+    courses = []
+    for link in soup.find_all('a', href=COURSE_LINK_RE):
+        course = parse_course(link)
+        if course is not None:
+            courses.append(course)
+    return courses
+
+
+def parse_course(link):
+    title = link.get_text(strip=True)
+    container = link.find_parent()
+    if not title or container is None:
+        return None
+
+    semester, course_code = COURSE_LINK_RE.search(link['href']).groups()
+    if not COURSE_CODE_RE.match(course_code):
+        return None
+
+    teacher = _find_teacher(link)
+    full_text = container.get_text()
+
+    ects_match = re.search(r'(\d+(?:\.\d+)?)\s*ECTS', full_text)
+    credits = float(ects_match.group(1)) if ects_match else 0
+
+    course_type = DEFAULT_TYPE
+    for pattern in TYPE_PATTERNS:
+        type_match = pattern.search(full_text)
+        if type_match:
+            course_type = type_match.group(1)
+            break
+
+    course = {
+        'url': COURSE_LINK_RE.search(link['href']).group(0),
+        'course_code': course_code,
+        'semester': semester,
+        'title': title[:100],
+        'teacher': teacher,
+        'description': extract_description(full_text, title, teacher, semester),
+        'credits': int(credits),
+        'type': course_type[:50],
+    }
+    course['hash'] = content_hash(course)
+    return course
+
+
+def content_hash(course):
+    payload = json.dumps(course, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _find_teacher(link):
+    # Usually the element right after the link ...
+    sibling = link.find_next_sibling()
+    if sibling is not None and sibling.name != 'a':
+        text = sibling.get_text(strip=True)
+        if text and not text.startswith('—'):
+            return text[:100]
+
+    # ... otherwise the first line of text after the link in its container
+    parent = link.parent
+    after_link = parent.get_text().split(link.get_text(), 1)
+    if len(after_link) > 1:
+        candidate = after_link[1].strip().split('\n')[0].strip()
+        if candidate and not candidate.startswith(('—', '–')):
+            candidate = re.sub(r'^[^\w]*', '', candidate)
+            if candidate and len(candidate) < 100:
+                return candidate
+    return None
+
+
+def extract_description(full_text, title, teacher, semester):
+    """Text between the teacher name and the semester, at most 500 chars."""
+    text = full_text.replace(title, '', 1).strip()
+    if teacher:
+        text = text.replace(teacher, '', 1).strip()
+    text = re.sub(f'{semester}.*$', '', text, flags=re.DOTALL).strip()
+    text = re.sub(r'\s+', ' ', text).strip('—–').strip()
+    if len(text) > 500:
+        text = text[:497] + '...'
+    return text or NO_DESCRIPTION
+
+
+# Write stage
+class CourseWriter:
+    """
+    Buffers parsed courses and upserts them on ``course_code`` in batches.
+
+    A course listed under several semesters is one row with several
+    ``semesters``. With ``incremental`` set, rows whose entries all match
+    their stored content hash are skipped. ``prune_semesters`` deletes
+    the links to semesters a course wasn't listed under in the run.
+    """
+
+    def __init__(self, batch_size=500, incremental=True):
+        from .dimensions import DimensionCache
+
+        self.batch_size = batch_size
+        self.incremental = incremental
+        # Course types, teachers and semesters for the length of the run.
+        self.dimensions = DimensionCache()
+        self.pending = {}
+        # course_code -> every semester the course was listed under in the run
+        self.listed_semesters = {}
+        self.written = 0
+        self.unchanged = 0
+
+    def add(self, courses):
+        """Buffer ``courses``; returns True when a batch was flushed."""
+        for course in courses:
+            entry = self.pending.get(course['course_code'])
+            if entry is None:
+                self.pending[course['course_code']] = dict(
+                    course, semesters={course['semester']}, hashes={course['url']: course['hash']}
+                )
+            else:
+                entry.update(
+                    course,
+                    semesters=entry['semesters'] | {course['semester']},
+                    hashes={**entry['hashes'], course['url']: course['hash']},
+                )
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+            return True
+        return False
+
+    def flush(self):
+        from django.db import transaction
+
+        rows = list(self.pending.values())
+        self.pending = {}
+        for row in rows:
+            self.listed_semesters.setdefault(row['course_code'], set()).update(row['semesters'])
+        if self.incremental and rows:
+            rows = self.changed_rows(rows)
+        if not rows:
+            return 0
+
+        try:
+            with transaction.atomic():
+                courses = self._write(rows)
+        except Exception:
+            # Rows inserted by the rolled back transaction are gone.
+            self.dimensions.reset()
+            raise
+
+        self.written += len(courses)
+        return len(courses)
+
+    def _write(self, rows):
+        from .bulk import after_bulk_write
+        from .dimensions import semester_dates
+        from .models import Course, ScrapedCourse
+
+        # New types/teachers/semesters are inserted in one query per model.
+        dimensions = self.dimensions
+        for row in rows:
+            dimensions.course_type(row['type'])
+            dimensions.teacher(row['teacher'])
+            for code in row['semesters']:
+                dimensions.semester(code)
+        dimensions.flush()
+
+        courses = []
+        for row in rows:
+            year = int(row['semester'][:4])
+            start_date, end_date = semester_dates(row['semester'])
+            courses.append(Course(
+                course_code=row['course_code'],
+                title=row['title'],
+                description=row['description'],
+                type=dimensions.course_type(row['type']),
+                teacher=dimensions.teacher(row['teacher']),
+                credits=row['credits'],
+                year=year,
+                start_date=start_date,
+                end_date=end_date,
+            ))
+        courses = Course.objects.bulk_create(
+            courses,
+            update_conflicts=True,
+            unique_fields=['course_code'],
+            update_fields=[
+                'title', 'description', 'type', 'teacher', 'credits',
+                'year', 'start_date', 'end_date', 'updated_at',
+            ],
+        )
+        if any(course.pk is None for course in courses):
+            # Backends that can't return ids from an upsert.
+            ids = dict(Course.objects.filter(
+                course_code__in=[course.course_code for course in courses]
+            ).values_list('course_code', 'pk'))
+            for course in courses:
+                course.pk = ids[course.course_code]
+
+        through = Course.semesters.through
+        through.objects.bulk_create(
+            [
+                through(course_id=course.pk, semester_id=dimensions.semester(code).pk)
+                for course, row in zip(courses, rows)
+                for code in sorted(row['semesters'])
+            ],
+            ignore_conflicts=True,
+        )
+        ScrapedCourse.objects.bulk_create(
+            [
+                ScrapedCourse(url=url, content_hash=digest, course_id=course.pk)
+                for course, row in zip(courses, rows)
+                for url, digest in row['hashes'].items()
+            ],
+            update_conflicts=True,
+            unique_fields=['url'],
+            update_fields=['content_hash', 'course', 'updated_at'],
+        )
+        after_bulk_write(courses, semesters_changed=True)
+        return courses
+
+    def prune_semesters(self):
+        """
+        Delete the links of the courses listed in the run to semesters
+        they weren't listed under, one transaction per batch. Only correct
+        after a run that parsed every listing page. Returns the number of
+        deleted links.
+        """
+        from django.db import transaction
+        from django.utils import timezone
+        from .bulk import after_bulk_write
+        from .models import Course, Semester
+
+        through = Course.semesters.through
+        semesters = {
+            f'{year}{season}': pk for pk, year, season in Semester.objects.values_list('pk', 'year', 'season')
+        }
+        codes = sorted(self.listed_semesters)
+        deleted = 0
+        for start in range(0, len(codes), self.batch_size):
+            with transaction.atomic():
+                courses = {
+                    course.pk: course
+                    for course in Course.objects.filter(course_code__in=codes[start:start + self.batch_size])
+                    .only('pk', 'course_code', 'title')
+                }
+                listed = {
+                    (pk, semesters.get(code))
+                    for pk, course in courses.items()
+                    for code in self.listed_semesters[course.course_code]
+                }
+                stale = [
+                    (pk, course_id)
+                    for pk, course_id, semester_id in through.objects.filter(course_id__in=list(courses))
+                    .values_list('pk', 'course_id', 'semester_id')
+                    if (course_id, semester_id) not in listed
+                ]
+                if stale:
+                    through.objects.filter(pk__in=[pk for pk, _ in stale]).delete()
+                    changed = sorted({course_id for _, course_id in stale})
+                    # Semesters are part of the course's conditional GET validators
+                    Course.objects.filter(pk__in=changed).update(updated_at=timezone.now())
+                    after_bulk_write([courses[course_id] for course_id in changed], semesters_changed=True)
+            deleted += len(stale)
+        return deleted
+
+    def changed_rows(self, rows):
+        """Drop rows whose every entry matches its stored hash (one query)."""
+        from .models import ScrapedCourse
+
+        urls = [url for row in rows for url in row['hashes']]
+        stored = dict(ScrapedCourse.objects.filter(url__in=urls).values_list('url', 'content_hash'))
+        changed = [
+            row for row in rows
+            if any(stored.get(url) != digest for url, digest in row['hashes'].items())
+        ]
+        self.unchanged += len(rows) - len(changed)
+        return changed
+
+
+class ScrapePipeline:
+    """
+    Fetch pages ``first..last`` concurrently, parse them in a process
+    pool and write them in batches, checkpointing after every batch.
+
+    ``parse_workers=0`` parses in the calling process; ``incremental=False``
+    ignores the stored page validators and content hashes.
+    """
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, concurrency=8, parse_workers=None,
+                 batch_size=500, timeout=30, session=None, log=None, incremental=True):
+        self.base_url = base_url
+        self.concurrency = max(1, concurrency)
+        self.parse_workers = parse_workers
+        self.timeout = timeout
+        self.incremental = incremental
+        self.session = session or make_session(self.concurrency)
+        self.writer = CourseWriter(batch_size, incremental=incremental)
+        self.log = log or logger.info
+        self.failed_pages = []
+        self.not_modified_pages = []
+        # A parsed page without courses: the listing ends before it
+        self.end_of_listing = False
+        self.pruned = 0
+        self.validators = {}
+        self.pending_validators = []
+
+    def get_checkpoint(self):
+        from .models import ScrapeCheckpoint
+        checkpoint, _ = ScrapeCheckpoint.objects.get_or_create(base_url=self.base_url)
+        return checkpoint
+
+    def run(self, pages, restart=False):
+        """Scrape pages ``1..pages``, resuming from the checkpoint unless ``restart``."""
+        checkpoint = self.get_checkpoint()
+        first = 1 if restart or checkpoint.completed else checkpoint.last_page + 1
+        if first > pages:
+            self.log(f'Nothing to do: page {checkpoint.last_page} already scraped')
+            return 0
+        if first > 1:
+            self.log(f'Resuming after page {first - 1}')
+
+        checkpoint.last_page, checkpoint.completed = first - 1, False
+        checkpoint.save()
+
+        if self.incremental:
+            from .models import ScrapedPage
+            urls = [page_url(self.base_url, page) for page in range(first, pages + 1)]
+            self.validators = {
+                url: (etag, last_modified)
+                for url, etag, last_modified in ScrapedPage.objects.filter(url__in=urls)
+                .values_list('url', 'etag', 'last_modified')
+            }
+
+        parse_pool = ProcessPoolExecutor(self.parse_workers) if self.parse_workers != 0 else None
+        try:
+            with ThreadPoolExecutor(self.concurrency) as fetch_pool:
+                self._run(range(first, pages + 1), fetch_pool, parse_pool, checkpoint)
+        finally:
+            if parse_pool is not None:
+                parse_pool.shutdown(cancel_futures=True)
+
+        if not self.failed_pages:
+            checkpoint.completed = True
+            checkpoint.save(update_fields=['completed', 'updated_at'])
+            if not self.incremental and first == 1 and self.end_of_listing:
+                self.pruned = self.writer.prune_semesters()
+        return self.writer.written
+
+    def _run(self, pages, fetch_pool, parse_pool, checkpoint):
+        pages = iter(pages)
+        fetching = deque()
+        parsing = deque()
+        buffered_page = None
+
+        def submit_fetch():
+            page = next(pages, None)
+            if page is not None:
+                url = page_url(self.base_url, page)
+                etag, last_modified = self.validators.get(url, ('', ''))
+                fetching.append((page, fetch_pool.submit(
+                    fetch_page, self.session, url, self.timeout, etag, last_modified
+                )))
+
+        # At most ``concurrency`` downloads in flight.
+        for _ in range(self.concurrency):
+            submit_fetch()
+
+        while fetching or parsing:
+            if fetching:
+                page, future = fetching.popleft()
+                submit_fetch()
+                try:
+                    fetched = future.result()
+                except requests.RequestException as exc:
+                    self.log(f'Error fetching page {page}: {exc}')
+                    self.failed_pages.append(page)
+                else:
+                    if fetched.content is None:
+                        self.not_modified_pages.append(page)
+                        parsing.append((page, None, _Done([])))
+                    elif parse_pool is None:
+                        parsing.append((page, fetched, _Done(parse_page(fetched.content))))
+                    else:
+                        parsing.append((page, fetched, parse_pool.submit(parse_page, fetched.content)))
+
+            # Keep a bounded number of parsed pages waiting for the writer.
+            if parsing and (len(parsing) >= self.concurrency or not fetching):
+                page, fetched, future = parsing.popleft()
+                try:
+                    courses = future.result()
+                except Exception as exc:
+                    self.log(f'Error parsing page {page}: {exc}')
+                    self.failed_pages.append(page)
+                    continue
+                if fetched is None:
+                    self.log(f'Page {page}: not modified')
+                else:
+                    self.log(f'Page {page}: found {len(courses)} courses')
+                    if not courses:
+                        self.end_of_listing = True
+                    if fetched.etag or fetched.last_modified:
+                        self.pending_validators.append(fetched)
+                buffered_page = page
+                if self.writer.add(courses):
+                    self._checkpoint(checkpoint, buffered_page)
+
+        self.writer.flush()
+        if buffered_page is not None:
+            self._checkpoint(checkpoint, buffered_page)
+
+    def _checkpoint(self, checkpoint, page):
+        from .models import ScrapedPage
+
+        # Validators are stored only once the page's courses are written,
+        # otherwise a crash in between would make the next run skip them.
+        if self.pending_validators:
+            ScrapedPage.objects.bulk_create(
+                [
+                    ScrapedPage(url=fetched.url, etag=fetched.etag, last_modified=fetched.last_modified)
+                    for fetched in self.pending_validators
+                ],
+                update_conflicts=True,
+                unique_fields=['url'],
+                update_fields=['etag', 'last_modified', 'updated_at'],
+            )
+            self.pending_validators = []
+
+        # Never move past a page that failed: a rerun must retry it.
+        if self.failed_pages:
+            page = min(page, min(self.failed_pages) - 1)
+        if page > checkpoint.last_page:
+            checkpoint.last_page = page
+            checkpoint.save(update_fields=['last_page', 'updated_at'])
+
+
+class _Done:
+    """Already computed result with the ``Future.result()`` interface."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def result(self):
+        return self.value
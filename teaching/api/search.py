@@ -0,0 +1,286 @@
+"""
+Course Full-Text Search
+=======================
+
+Full-text index over ``Course.title``, ``description``, ``course_code``
+and the teacher's name, backed by the active database:
+
+- SQLite: an FTS5 virtual table ranked with ``bm25()``
+- PostgreSQL: a ``tsvector`` side table with a GIN index ranked with
+  ``ts_rank()``
+- anything else (or SQLite without FTS5): ``icontains`` fallback
+
+The index is kept up to date by the signal handlers in ``api.signals``
+and can be rebuilt with ``python manage.py rebuild_search_index``.
+"""
+
+import re
+
+from django.db import connections, DEFAULT_DB_ALIAS, OperationalError
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# FTS5 availability per database alias, probed once per process.
+_fts5_supported = {}
+
+
+def tokenize(term):
+    """Split user input into plain word tokens (drops query syntax)."""
+    return TOKEN_RE.findall(term or '')
+
+
+class BaseSearchBackend:
+    """
+    Interface shared by the search backends.
+
+    ``search`` returns the queryset restricted to matches (an uncorrelated
+    ``pk IN (...)`` so it is safe inside subqueries) and annotated with
+    ``search_rank`` (higher is more relevant).
+    """
+    vendor = None
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    @property
+    def course_table(self):
+        from .models import Course
+        return Course._meta.db_table
+
+    @property
+    def teacher_table(self):
+        from .models import Teacher
+        return Teacher._meta.db_table
+
+    def create_index(self):
+        pass
+
+    def drop_index(self):
+        pass
+
+    def rebuild(self):
+        """Rebuild the whole index. Returns the number of indexed courses."""
+        return 0
+
+    def index_courses(self, course_ids):
+        pass
+
+    def remove_courses(self, course_ids):
+        pass
+
+    def search(self, queryset, term):
+        raise NotImplementedError
+
+
+class FallbackSearchBackend(BaseSearchBackend):
+    """``icontains`` search for databases without a full-text engine."""
+    vendor = 'fallback'
+
+    def search(self, queryset, term):
+        query = Q()
+        for token in tokenize(term):
+            query &= (
+                Q(title__icontains=token)
+                | Q(course_code__icontains=token)
+                | Q(description__icontains=token)
+                | Q(teacher__name__icontains=token)
+            )
+        return queryset.filter(query).annotate(search_rank=RawSQL('0', []))
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """FTS5 virtual table keyed by ``rowid = api_course.id``."""
+    vendor = 'sqlite'
+    table = 'api_course_fts'
+    # bm25 column weights: title, description, course_code, teacher_name
+    weights = (10.0, 1.0, 10.0, 5.0)
+
+    @classmethod
+    def is_supported(cls, connection):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA compile_options')
+            options = {row[0] for row in cursor.fetchall()}
+        return 'ENABLE_FTS5' in options
+
+    def create_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5('
+                'title, description, course_code, teacher_name, '
+                "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+            )
+
+    def drop_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def _insert_sql(self, where=''):
+        return (
+            f'INSERT INTO {self.table} (rowid, title, description, course_code, teacher_name) '
+            f'SELECT c.id, c.title, c.description, c.course_code, COALESCE(t.name, \'\') '
+            f'FROM {self.course_table} c LEFT JOIN {self.teacher_table} t ON t.id = c.teacher_id '
+            f'{where}'
+        )
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(self._insert_sql())
+            cursor.execute(f"INSERT INTO {self.table} ({self.table}) VALUES ('optimize')")
+            cursor.execute(f'SELECT COUNT(*) FROM {self.table}')
+            return cursor.fetchone()[0]
+
+    def index_courses(self, course_ids):
+        course_ids = list(course_ids)
+        if not course_ids:
+            return
+        placeholders = ', '.join(['%s'] * len(course_ids))
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({placeholders})', course_ids)
+            cursor.execute(self._insert_sql(f'WHERE c.id IN ({placeholders})'), course_ids)
+
+    def remove_courses(self, course_ids):
+        course_ids = list(course_ids)
+        if not course_ids:
+            return
+        placeholders = ', '.join(['%s'] * len(course_ids))
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({placeholders})', course_ids)
+
+    @staticmethod
+    def build_query(term):
+        # Every token must match; the last one is a prefix (search-as-you-type).
+        tokens = tokenize(term)
+        parts = [f'"{token}"' for token in tokens[:-1]]
+        if tokens:
+            parts.append(f'"{tokens[-1]}"*')
+        return ' '.join(parts)
+
+    def search(self, queryset, term):
+        match = self.build_query(term)
+        if not match:
+            return queryset.none()
+        weights = ', '.join(str(weight) for weight in self.weights)
+        matches = RawSQL(f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', [match])
+        # The ranked matches are a derived table SQLite evaluates once and
+        # looks up through an automatic index; ``LIMIT -1`` keeps it from
+        # being flattened into a full-text query per course row.
+        rank = RawSQL(
+            f'SELECT ranked.score FROM (SELECT rowid AS id, -bm25({self.table}, {weights}) AS score '
+            f'FROM {self.table} WHERE {self.table} MATCH %s LIMIT -1) ranked '
+            f'WHERE ranked.id = {self.course_table}.id',
+            [match],
+        )
+        return queryset.filter(pk__in=matches).annotate(search_rank=rank)
+
+
+class PostgreSQLSearchBackend(BaseSearchBackend):
+    """``tsvector`` side table with a GIN index."""
+    vendor = 'postgresql'
+    table = 'api_course_search'
+    config = 'simple'
+
+    def create_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {self.table} ('
+                f'course_id bigint PRIMARY KEY REFERENCES {self.course_table} (id) '
+                'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+                'document tsvector NOT NULL)'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {self.table}_document_gin '
+                f'ON {self.table} USING GIN (document)'
+            )
+
+    def drop_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def _upsert_sql(self, where=''):
+        config = self.config
+        return (
+            f'INSERT INTO {self.table} (course_id, document) '
+            f'SELECT c.id, '
+            f"setweight(to_tsvector('{config}', coalesce(c.title, '')), 'A') || "
+            f"setweight(to_tsvector('{config}', coalesce(c.course_code, '')), 'A') || "
+            f"setweight(to_tsvector('{config}', coalesce(t.name, '')), 'B') || "
+            f"setweight(to_tsvector('{config}', coalesce(c.description, '')), 'C') "
+            f'FROM {self.course_table} c LEFT JOIN {self.teacher_table} t ON t.id = c.teacher_id '
+            f'{where} '
+            'ON CONFLICT (course_id) DO UPDATE SET document = EXCLUDED.document'
+        )
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {self.table}')
+            cursor.execute(self._upsert_sql())
+            return cursor.rowcount
+
+    def index_courses(self, course_ids):
+        course_ids = list(course_ids)
+        if not course_ids:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(self._upsert_sql('WHERE c.id = ANY(%s)'), [course_ids])
+
+    def remove_courses(self, course_ids):
+        course_ids = list(course_ids)
+        if not course_ids:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE course_id = ANY(%s)', [course_ids])
+
+    @staticmethod
+    def build_query(term):
+        tokens = tokenize(term)
+        parts = list(tokens[:-1])
+        if tokens:
+            parts.append(f'{tokens[-1]}:*')
+        return ' & '.join(parts)
+
+    def search(self, queryset, term):
+        tsquery = self.build_query(term)
+        if not tsquery:
+            return queryset.none()
+        matches = RawSQL(
+            f"SELECT course_id FROM {self.table} WHERE document @@ to_tsquery('{self.config}', %s)",
+            [tsquery],
+        )
+        rank = RawSQL(
+            f"SELECT ts_rank(document, to_tsquery('{self.config}', %s)) FROM {self.table} "
+            f'WHERE {self.table}.course_id = {self.course_table}.id',
+            [tsquery],
+        )
+        return queryset.filter(pk__in=matches).annotate(search_rank=rank)
+
+
+def get_search_backend(using=DEFAULT_DB_ALIAS, connection=None):
+    """Return the search backend matching the database behind ``using``."""
+    connection = connection or connections[using]
+    if connection.vendor == 'postgresql':
+        return PostgreSQLSearchBackend(connection)
+    if connection.vendor == 'sqlite':
+        supported = _fts5_supported.get(connection.alias)
+        if supported is None:
+            try:
+                supported = SQLiteSearchBackend.is_supported(connection)
+            except OperationalError:
+                supported = False
+            _fts5_supported[connection.alias] = supported
+        if supported:
+            return SQLiteSearchBackend(connection)
+    return FallbackSearchBackend(connection)
+
+
+def search_courses(queryset, term):
+    """Restrict ``queryset`` to courses matching ``term``, ordered by relevance."""
+    if not tokenize(term):
+        # Blank input matches everything, as the old icontains filter did.
+        return queryset
+    backend = get_search_backend(queryset.db)
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    return backend.search(queryset, term).order_by('-search_rank', *ordering)
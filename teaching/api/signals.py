@@ -0,0 +1,128 @@
+"""
+Signal handlers keeping derived data in sync with the models.
+"""
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import connection_metrics
+from .autocomplete import autocomplete_index, COURSE, TEACHER
+from .caching import bump_model_version
+from .middleware import install as install_query_counter
+from .models import Course, Teacher
+from .search import get_search_backend
+from .slow_queries import install as install_slow_query_log
+from .sqlite_tuning import apply_pragmas
+
+
+# Full-text search index
+@receiver(post_save, sender=Course)
+def index_course(sender, instance, using, raw=False, **kwargs):
+    if raw:
+        return
+    get_search_backend(using).index_courses([instance.pk])
+
+
+@receiver(post_delete, sender=Course)
+def unindex_course(sender, instance, using, **kwargs):
+    get_search_backend(using).remove_courses([instance.pk])
+
+
+@receiver(post_save, sender=Teacher)
+def reindex_teacher_courses(sender, instance, using, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    course_ids = Course.objects.using(using).filter(teacher=instance).values_list('pk', flat=True)
+    get_search_backend(using).index_courses(course_ids)
+
+
+# Autocomplete index (applied once the transaction commits)
+@receiver(post_save, sender=Course)
+def autocomplete_add_course(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    transaction.on_commit(lambda: autocomplete_index.add(
+        COURSE, instance.pk, instance.title, instance.course_code
+    ))
+
+
+@receiver(post_delete, sender=Course)
+def autocomplete_remove_course(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: autocomplete_index.remove(COURSE, pk))
+
+
+@receiver(post_save, sender=Teacher)
+def autocomplete_add_teacher(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    transaction.on_commit(lambda: autocomplete_index.add(TEACHER, instance.pk, instance.name))
+
+
+@receiver(post_delete, sender=Teacher)
+def autocomplete_remove_teacher(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: autocomplete_index.remove(TEACHER, pk))
+
+
+# Conditional GET validators: semester membership is part of a course's
+# representation, so changing it touches the course's ``updated_at``.
+@receiver(m2m_changed, sender=Course.semesters.through)
+def touch_course_semesters(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            Course.objects.using(using).filter(pk=instance.pk).update(updated_at=timezone.now())
+        return
+    if action == 'pre_clear':
+        # The affected courses are gone from the relation after the clear.
+        instance._cleared_course_ids = list(instance.courses.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if action == 'post_clear':
+            pk_set = instance.__dict__.pop('_cleared_course_ids', [])
+        if pk_set:
+            Course.objects.using(using).filter(pk__in=pk_set).update(updated_at=timezone.now())
+
+
+# Response cache versions. Bumped immediately and again after commit, so
+# a response rendered from pre-commit data is never cached as current.
+def _bump(model, using):
+    bump_model_version(model)
+    transaction.on_commit(lambda: bump_model_version(model), using=using)
+
+
+@receiver([post_save, post_delete])
+def bump_cache_version(sender, using, raw=False, **kwargs):
+    if sender._meta.app_label == 'api':
+        _bump(sender, using)
+
+
+@receiver(m2m_changed)
+def bump_cache_version_m2m(sender, instance, model, action, using, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        _bump(type(instance), using)
+        _bump(model, using)
+
+
+# SQLite pragmas, slow query log and per-request query counts on every
+# database connection
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    apply_pragmas(connection)
+
+
+@receiver(connection_created)
+def add_slow_query_log(sender, connection, **kwargs):
+    install_slow_query_log(connection)
+
+
+@receiver(connection_created)
+def add_query_counter(sender, connection, **kwargs):
+    install_query_counter(connection)
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    connection_metrics.connection_created(connection)
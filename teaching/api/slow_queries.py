@@ -0,0 +1,183 @@
+"""
+Slow Query Log
+==============
+
+An ``execute_wrapper`` installed on every database connection (see
+``api.signals``) that times each query and, for queries slower than
+``settings.SLOW_QUERY_THRESHOLD_MS``:
+
+- logs them to the ``api.slow_queries`` logger
+- fingerprints them by their normalized SQL (placeholder lists and
+  literals collapsed, whitespace squeezed), so the same statement with
+  different parameters is one entry
+- runs ``EXPLAIN`` (``EXPLAIN QUERY PLAN`` on SQLite) for the first slow
+  ``SELECT`` of every fingerprint and a sample
+  (``SLOW_QUERY_EXPLAIN_RATE``) of the repeats
+- keeps the ``SLOW_QUERY_TOP_N`` fingerprints with the most total time
+  in an in-process table, readable at ``/api/_slow-queries``
+
+Queries under the threshold only pay for two ``perf_counter`` calls.
+A threshold of ``None`` disables the hook.
+"""
+
+import hashlib
+import logging
+import random
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+
+logger = logging.getLogger('api.slow_queries')
+
+DEFAULT_THRESHOLD_MS = 200
+DEFAULT_EXPLAIN_RATE = 0.1
+DEFAULT_TOP_N = 50
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b')
+_LIST_RE = re.compile(r'\(\s*(?:(?:%s|\?)\s*,\s*)+(?:%s|\?)\s*\)')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """Collapse literals and placeholder lists so equivalent queries match."""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _LIST_RE.sub('(...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    return hashlib.sha1(normalize_sql(sql).encode('utf-8')).hexdigest()[:16]
+
+
+class SlowQueryLog:
+    """Top-N table of slow query fingerprints (shared by all threads)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def record(self, sql, duration_ms, alias, plan=None, top_n=DEFAULT_TOP_N):
+        key = fingerprint(sql)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= top_n:
+                    # Make room by dropping the entry with the least total time.
+                    smallest = min(self._entries.values(), key=lambda item: item['total_ms'])
+                    if smallest['total_ms'] > duration_ms:
+                        return
+                    del self._entries[smallest['fingerprint']]
+                entry = self._entries[key] = {
+                    'fingerprint': key,
+                    'sql': normalize_sql(sql),
+                    'database': alias,
+                    'count': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'last_seen': now,
+                    'plan': None,
+                }
+            entry['count'] += 1
+            entry['total_ms'] += duration_ms
+            entry['max_ms'] = max(entry['max_ms'], duration_ms)
+            entry['last_seen'] = now
+            if plan is not None:
+                entry['plan'] = plan
+
+    def has_plan(self, sql):
+        entry = self._entries.get(fingerprint(sql))
+        return entry is not None and entry['plan'] is not None
+
+    def top(self, limit=None, order='total_ms'):
+        with self._lock:
+            entries = [dict(entry) for entry in self._entries.values()]
+        entries.sort(key=lambda entry: entry[order], reverse=True)
+        for entry in entries:
+            entry['avg_ms'] = entry['total_ms'] / entry['count']
+        return entries[:limit] if limit else entries
+
+    def reset(self):
+        with self._lock:
+            self._entries = {}
+
+
+slow_query_log = SlowQueryLog()
+
+
+def explain(connection, sql, params):
+    """Return the plan of ``sql`` as a list of lines (None if it can't be explained)."""
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    try:
+        # In a savepoint, so a failing EXPLAIN can't break the caller's transaction.
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(prefix + sql, params)
+                rows = cursor.fetchall()
+    except Exception:
+        logger.debug('Could not explain %s', sql, exc_info=True)
+        return None
+    return [' | '.join(str(value) for value in row) for row in rows]
+
+
+class SlowQueryWrapper:
+    """The ``execute_wrapper`` installed on each connection."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(self._local, 'active', False):
+            # Our own EXPLAIN (and its savepoint) queries.
+            return execute(sql, params, many, context)
+
+        threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', DEFAULT_THRESHOLD_MS)
+        if threshold is None:
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration_ms = (time.perf_counter() - start) * 1000
+        if duration_ms >= threshold:
+            self._local.active = True
+            try:
+                self.slow_query(context['connection'], sql, params, many, duration_ms)
+            finally:
+                self._local.active = False
+        return result
+
+    def slow_query(self, connection, sql, params, many, duration_ms):
+        logger.warning(
+            'Slow query (%.1f ms, %s) on %s: %s',
+            duration_ms, fingerprint(sql), connection.alias, normalize_sql(sql)[:1000],
+        )
+        plan = None
+        rate = getattr(settings, 'SLOW_QUERY_EXPLAIN_RATE', DEFAULT_EXPLAIN_RATE)
+        head = sql.lstrip()[:7].upper()
+        if (
+            rate and not many and head.startswith(('SELECT', 'WITH '))
+            and not connection.needs_rollback
+            # Every new fingerprint gets a plan, repeats are sampled.
+            and (not slow_query_log.has_plan(sql) or random.random() < rate)
+        ):
+            plan = explain(connection, sql, params)
+        slow_query_log.record(
+            sql, duration_ms, connection.alias, plan,
+            top_n=getattr(settings, 'SLOW_QUERY_TOP_N', DEFAULT_TOP_N),
+        )
+
+
+slow_query_wrapper = SlowQueryWrapper()
+
+
+def install(connection):
+    """Add the slow query wrapper to ``connection`` (once)."""
+    if slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_wrapper)
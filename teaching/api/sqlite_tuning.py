@@ -0,0 +1,73 @@
+"""
+SQLite Tuning
+=============
+
+Pragmas applied to every new SQLite connection (``connection_created``,
+see ``api.signals``), taken from ``settings.SQLITE_PRAGMAS``:
+
+- ``journal_mode=WAL``: readers keep reading the last committed data
+  while a writer (``scrape_courses``, ``import_catalog``) works, instead
+  of waiting for its lock. Stored in the database file, so it's skipped
+  for databases inside a git checkout (the tracked ``db.sqlite3``):
+  switching would modify the committed file and leave ``-wal``/``-shm``
+  files next to it. The container image has no ``.git`` and gets WAL.
+- ``synchronous=NORMAL``: with WAL, syncs at checkpoints instead of every
+  commit. Still consistent after a crash; a power loss may lose the
+  last commits.
+- ``mmap_size``: read the database through memory-mapped I/O.
+- ``cache_size``: page cache per connection (negative values are KiB).
+- ``temp_store=MEMORY``: temporary tables and indexes (sorts, DISTINCT)
+  in memory.
+- ``busy_timeout``: milliseconds a writer waits for the lock before
+  "database is locked".
+
+An empty ``SQLITE_PRAGMAS`` (``SQLITE_TUNING=false``) leaves new
+connections alone; ``STOCK_PRAGMAS`` restores SQLite's defaults. The
+pragmas are run on the DB-API connection, so they aren't counted as
+queries of the request that opened the connection.
+"""
+
+from pathlib import Path
+
+from django.conf import settings
+
+
+# SQLite's (and Python's sqlite3 module's) defaults.
+STOCK_PRAGMAS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'mmap_size': 0,
+    'cache_size': -2000,
+    'temp_store': 'DEFAULT',
+    'busy_timeout': 5000,
+}
+
+
+def get_pragmas():
+    return getattr(settings, 'SQLITE_PRAGMAS', None) or {}
+
+
+def in_checkout(name):
+    """Whether the database file ``name`` lies inside a git checkout."""
+    path = Path(name).resolve()
+    return any((parent / '.git').exists() for parent in path.parents)
+
+
+def apply_pragmas(connection, pragmas=None):
+    """Run ``pragmas`` (default: ``settings.SQLITE_PRAGMAS``) on a SQLite connection."""
+    if connection.vendor != 'sqlite':
+        return
+    if pragmas is None:
+        pragmas = get_pragmas()
+    if 'journal_mode' in pragmas and not connection.is_in_memory_db() and in_checkout(connection.settings_dict['NAME']):
+        pragmas = {name: value for name, value in pragmas.items() if name != 'journal_mode'}
+    for name, value in pragmas.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def read_pragmas(connection, names=STOCK_PRAGMAS):
+    """Return ``{name: current value}``."""
+    return {
+        name: connection.connection.execute(f'PRAGMA {name}').fetchone()[0]
+        for name in names
+    }
@@ -1,3 +1,1790 @@
-from django.test import TestCase
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import tag, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .models import (
+	Course, CourseType, Teacher, Institute, Department, StudyProgram,
+	Semester, CurriculumSubject, StudySubject
+)
+from .search import search_courses
 
 # Create your tests here.
+
+def create_courses(count, start=0):
+	"""Create ``count`` courses with every relation populated."""
+	course_type, _ = CourseType.objects.get_or_create(name='Seminar', defaults={'description': 'Seminar'})
+	institute, _ = Institute.objects.get_or_create(name='Institute of Design', defaults={'description': 'Design'})
+	department, _ = Department.objects.get_or_create(name='Graphics', institute=institute)
+	study_program, _ = StudyProgram.objects.get_or_create(
+		name='Bachelor Design', department=department, defaults={'description': 'Design', 'year': 2025}
+	)
+	curriculum_subject, _ = CurriculumSubject.objects.get_or_create(
+		name='Typography', study_program=study_program, defaults={'semester_number': 1}
+	)
+	study_subject, _ = StudySubject.objects.get_or_create(
+		name='Typography I', curriculum_subject=curriculum_subject
+	)
+	winter, _ = Semester.objects.get_or_create(year=2025, season='W', defaults={'name': '2025W'})
+	summer, _ = Semester.objects.get_or_create(year=2026, season='S', defaults={'name': '2026S'})
+
+	courses = []
+	for i in range(start, start + count):
+		teacher = Teacher.objects.create(
+			name=f'Teacher {i}', email=f'teacher{i}@uni-ak.ac.at', subject='Design'
+		)
+		course = Course.objects.create(
+			title=f'Course {i}',
+			course_code=f'S{i:05d}',
+			description='Description',
+			type=course_type,
+			teacher=teacher,
+			institute=institute,
+			department=department,
+			study_program=study_program,
+			curriculum_subject=curriculum_subject,
+			study_subject=study_subject,
+		)
+		course.semesters.set([winter, summer])
+		courses.append(course)
+	return courses
+
+
+class EagerLoadingQueryCountTests(TestCase):
+	"""Serializing nested relations must not issue a query per row."""
+
+	def setUp(self):
+		self.client = APIClient()
+
+	def count_queries(self, url):
+		with CaptureQueriesContext(connection) as ctx:
+			response = self.client.get(url)
+		self.assertEqual(response.status_code, 200)
+		return len(ctx.captured_queries)
+
+	def test_course_list_query_count_is_constant(self):
+		create_courses(2)
+		small = self.count_queries(reverse('course-list'))
+
+		create_courses(25, start=100)
+		large = self.count_queries(reverse('course-list'))
+
+		self.assertEqual(small, large)
+
+	def test_course_list_uses_joins_and_one_prefetch(self):
+		create_courses(10)
+		# courses with joins, semesters prefetch
+		with self.assertNumQueries(2):
+			response = self.client.get(reverse('course-list'))
+		self.assertEqual(len(response.data['results']), 10)
+		first = response.data['results'][0]
+		self.assertEqual(first['teacher']['name'], 'Teacher 0')
+		self.assertEqual(first['study_subject']['name'], 'Typography I')
+		self.assertEqual(len(first['semesters']), 2)
+
+	def test_course_detail_query_count(self):
+		course = create_courses(1)[0]
+		with self.assertNumQueries(2):
+			response = self.client.get(reverse('course-detail', args=[course.pk]))
+		self.assertEqual(response.data['type']['name'], 'Seminar')
+
+	def test_study_subject_list_query_count_is_constant(self):
+		create_courses(1)
+		curriculum_subject = CurriculumSubject.objects.get()
+		small = self.count_queries(reverse('study-subject-list'))
+		StudySubject.objects.bulk_create([
+			StudySubject(name=f'Subject {i}', curriculum_subject=curriculum_subject)
+			for i in range(20)
+		])
+		self.assertEqual(small, self.count_queries(reverse('study-subject-list')))
+
+
+class KeysetPaginationTests(TestCase):
+	"""List endpoints page with opaque cursors instead of OFFSET."""
+
+	def setUp(self):
+		self.client = APIClient()
+		create_courses(25)
+
+	def test_pages_follow_course_ordering_without_gaps(self):
+		url = reverse('course-list') + '?page_size=10'
+		codes = []
+		while url:
+			with self.assertNumQueries(2):
+				response = self.client.get(url)
+			codes.extend(course['course_code'] for course in response.data['results'])
+			url = response.data['next']
+		self.assertEqual(codes, sorted(codes))
+		self.assertEqual(len(codes), 25)
+		self.assertEqual(len(set(codes)), 25)
+
+	def test_previous_link_returns_prior_page(self):
+		first = self.client.get(reverse('course-list') + '?page_size=10').data
+		self.assertIsNone(first['previous'])
+		second = self.client.get(first['next']).data
+		back = self.client.get(second['previous']).data
+		self.assertEqual(back['results'], first['results'])
+
+	def test_descending_model_ordering(self):
+		Semester.objects.create(name='2024W', year=2024, season='W')
+		Semester.objects.create(name='2027S', year=2027, season='S')
+		response = self.client.get(reverse('semester-list') + '?page_size=2')
+		names = [semester['name'] for semester in response.data['results']]
+		response = self.client.get(response.data['next'])
+		names += [semester['name'] for semester in response.data['results']]
+		self.assertEqual(names, ['2027S', '2026S', '2025W', '2024W'])
+
+	def test_legacy_shape_opt_in(self):
+		response = self.client.get(reverse('course-list') + '?paginate=false')
+		self.assertIsInstance(response.data, list)
+		self.assertEqual(len(response.data), 25)
+
+	def test_invalid_cursor(self):
+		response = self.client.get(reverse('course-list') + '?cursor=bogus')
+		self.assertEqual(response.status_code, 404)
+
+
+class CourseSearchTests(TestCase):
+	"""Course search goes through the full-text index."""
+
+	def setUp(self):
+		self.client = APIClient()
+		teacher = Teacher.objects.create(name='Maria Schmidt', email='m.schmidt@uni-ak.ac.at', subject='Media')
+		self.photo = Course.objects.create(
+			title='Analog Photography', course_code='S00001', description='Darkroom practice', teacher=teacher
+		)
+		self.media = Course.objects.create(
+			title='Media Theory', course_code='S00002', description='Readings on photography and film'
+		)
+		Course.objects.create(title='Ceramics', course_code='S00003', description='Clay')
+
+	def search(self, term):
+		response = self.client.get(reverse('course-list'), {'search': term, 'paginate': 'false'})
+		self.assertEqual(response.status_code, 200)
+		return [course['course_code'] for course in response.data]
+
+	def test_title_match_ranks_above_description_match(self):
+		self.assertEqual(self.search('photography'), ['S00001', 'S00002'])
+
+	def test_prefix_and_teacher_name(self):
+		self.assertEqual(self.search('phot'), ['S00001', 'S00002'])
+		self.assertEqual(self.search('schmidt'), ['S00001'])
+		self.assertEqual(self.search('S00003'), ['S00003'])
+
+	def test_index_follows_updates_and_deletes(self):
+		self.media.title = 'Sound Studies'
+		self.media.description = 'Listening'
+		self.media.save()
+		self.assertEqual(self.search('photography'), ['S00001'])
+
+		teacher = Teacher.objects.get(pk=self.photo.teacher_id)
+		teacher.name = 'Anna Weber'
+		teacher.save()
+		self.assertEqual(self.search('weber'), ['S00001'])
+
+		self.photo.delete()
+		self.assertEqual(self.search('photography'), [])
+
+	def test_query_syntax_is_ignored(self):
+		self.assertEqual(self.search('"photo* ('), ['S00001', 'S00002'])
+		self.assertEqual(self.search('  '), ['S00001', 'S00002', 'S00003'])
+
+	def test_rebuild_command_restores_index(self):
+		from .search import get_search_backend
+		get_search_backend().remove_courses([self.photo.pk, self.media.pk])
+		self.assertEqual(self.search('photography'), [])
+		call_command('rebuild_search_index', stdout=StringIO())
+		self.assertEqual(self.search('photography'), ['S00001', 'S00002'])
+
+	def test_search_results_paginate(self):
+		response = self.client.get(reverse('course-list'), {'search': 'photography', 'page_size': 1})
+		codes = [course['course_code'] for course in response.data['results']]
+		response = self.client.get(response.data['next'])
+		codes += [course['course_code'] for course in response.data['results']]
+		self.assertEqual(codes, ['S00001', 'S00002'])
+
+
+class AutocompleteTests(TestCase):
+	"""Autocomplete answers from the in-process index."""
+
+	def setUp(self):
+		from .autocomplete import autocomplete_index
+		self.index = autocomplete_index
+		self.client = APIClient()
+		self.teacher = Teacher.objects.create(name='Maria Schmidt', email='m.schmidt@uni-ak.ac.at', subject='Media')
+		Course.objects.create(title='Analog Photography', course_code='S00001', description='-', teacher=self.teacher)
+		Course.objects.create(title='Photo Books', course_code='S00002', description='-')
+		Course.objects.create(title='Übungen zur Malerei', course_code='S00003', description='-')
+		self.index.build()
+
+	def tearDown(self):
+		self.index.clear()
+
+	def suggest(self, q, **params):
+		with self.assertNumQueries(0):
+			response = self.client.get(reverse('autocomplete'), {'q': q, **params})
+		self.assertEqual(response.status_code, 200)
+		return [result['label'] for result in response.data['results']]
+
+	def test_prefix_matches_rank_whole_label_first(self):
+		self.assertEqual(self.suggest('photo'), ['Photo Books', 'Analog Photography'])
+		self.assertEqual(self.suggest('S0000', limit=2), ['Photo Books', 'Analog Photography'])
+		self.assertEqual(self.suggest('schm'), ['Maria Schmidt'])
+		self.assertEqual(self.suggest('ubung'), ['Übungen zur Malerei'])
+
+	def test_fuzzy_match(self):
+		self.assertEqual(self.suggest('photgraphy'), ['Analog Photography'])
+
+	def test_type_filter(self):
+		self.assertEqual(self.suggest('maria', type='course'), [])
+		self.assertEqual(self.suggest('maria', type='teacher'), ['Maria Schmidt'])
+
+	def test_index_follows_saves_and_deletes(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			course = Course.objects.create(title='Sculpture Basics', course_code='S00004', description='-')
+		self.assertEqual(self.suggest('sculp'), ['Sculpture Basics'])
+
+		with self.captureOnCommitCallbacks(execute=True):
+			course.title = 'Ceramics Basics'
+			course.save()
+		self.assertEqual(self.suggest('sculp'), [])
+		self.assertEqual(self.suggest('ceram'), ['Ceramics Basics'])
+
+		with self.captureOnCommitCallbacks(execute=True):
+			self.teacher.delete()
+		self.assertEqual(self.suggest('schmidt'), [])
+		self.assertEqual(self.suggest('analog'), [])
+
+	def test_rebuilds_after_changes_in_other_processes(self):
+		from .autocomplete import publish_change
+		# Written by another worker: no signal reaches this process's index
+		Course.objects.bulk_create([Course(title='Sculpture Basics', course_code='S00004', description='-')])
+		Course.objects.filter(course_code='S00002').update(title='Photo Zines')
+		self.assertEqual(self.suggest('sculp'), [])
+
+		publish_change()
+		with self.settings(AUTOCOMPLETE_REFRESH_INTERVAL=0), self.assertNumQueries(2):
+			response = self.client.get(reverse('autocomplete'), {'q': 'sculp'})
+		self.assertEqual([result['label'] for result in response.data['results']], ['Sculpture Basics'])
+		self.assertEqual(self.suggest('photo'), ['Photo Zines', 'Analog Photography'])
+
+	def test_version_checks_are_throttled(self):
+		from .autocomplete import publish_change
+		Course.objects.bulk_create([Course(title='Sculpture Basics', course_code='S00004', description='-')])
+		publish_change()
+		with self.settings(AUTOCOMPLETE_REFRESH_INTERVAL=60):
+			self.assertEqual(self.suggest('sculp'), [])
+		with self.settings(AUTOCOMPLETE_REFRESH_INTERVAL=0), self.assertNumQueries(2):
+			response = self.client.get(reverse('autocomplete'), {'q': 'sculp'})
+		self.assertEqual([result['label'] for result in response.data['results']], ['Sculpture Basics'])
+
+	def test_own_change_is_kept_only_with_an_atomic_counter(self):
+		# The file cache's incr is a get and a set: a concurrent increment
+		# in another worker could have been lost, so the index rebuilds.
+		with self.settings(AUTOCOMPLETE_REFRESH_INTERVAL=0):
+			with self.captureOnCommitCallbacks(execute=True):
+				Course.objects.create(title='Sculpture Basics', course_code='S00004', description='-')
+			with self.assertNumQueries(2):
+				response = self.client.get(reverse('autocomplete'), {'q': 'sculp'})
+			self.assertEqual([result['label'] for result in response.data['results']], ['Sculpture Basics'])
+
+			locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+			with self.settings(CACHES=locmem):
+				self.index.build()
+				with self.captureOnCommitCallbacks(execute=True):
+					Course.objects.create(title='Ceramics Basics', course_code='S00005', description='-')
+				self.assertEqual(self.suggest('ceram'), ['Ceramics Basics'])
+
+
+class CourseFacetsTests(TestCase):
+	"""Facet counts honour every filter except the facet's own."""
+
+	def setUp(self):
+		self.client = APIClient()
+		create_courses(3)
+		self.lecture = CourseType.objects.create(name='Lecture', description='Lecture')
+		Course.objects.filter(course_code='S00002').update(type=self.lecture, gender_diversity=True)
+		self.seminar = CourseType.objects.get(name='Seminar')
+
+	def get_facets(self, **params):
+		response = self.client.get(reverse('course-facets'), params)
+		self.assertEqual(response.status_code, 200)
+		return response.data
+
+	def counts(self, data, facet):
+		return {option['name']: option['count'] for option in data['facets'][facet]}
+
+	def test_unfiltered_counts(self):
+		with self.assertNumQueries(8):
+			data = self.get_facets()
+		self.assertEqual(data['total'], 3)
+		self.assertEqual(self.counts(data, 'type'), {'Lecture': 1, 'Seminar': 2})
+		self.assertEqual(self.counts(data, 'semester'), {'2026S': 3, '2025W': 3})
+		self.assertEqual(len(data['facets']['teacher']), 3)
+		self.assertEqual(data['facets']['gender_diversity'], [
+			{'value': True, 'count': 1}, {'value': False, 'count': 2},
+		])
+
+	def test_own_filter_is_excluded_from_its_facet(self):
+		data = self.get_facets(type=self.lecture.pk)
+		self.assertEqual(data['total'], 1)
+		self.assertEqual(self.counts(data, 'type'), {'Lecture': 1, 'Seminar': 2})
+		self.assertEqual(sum(self.counts(data, 'teacher').values()), 1)
+		self.assertEqual(data['facets']['gender_diversity'][1]['count'], 0)
+
+	def test_zero_count_options_are_listed(self):
+		Teacher.objects.create(name='Idle Teacher', email='idle@uni-ak.ac.at', subject='-')
+		data = self.get_facets(search='Course 1')
+		self.assertEqual(data['total'], 1)
+		self.assertEqual(self.counts(data, 'teacher')['Idle Teacher'], 0)
+		self.assertEqual(self.counts(data, 'teacher')['Teacher 1'], 1)
+
+
+class VersionedCacheTests(TestCase):
+	"""Taxonomy lists are cached until one of their models changes."""
+
+	def setUp(self):
+		self.client = APIClient()
+		self.institute = Institute.objects.create(name='Institute of Design', description='Design')
+		Department.objects.create(name='Graphics', institute=self.institute)
+
+	def test_second_request_is_served_from_cache(self):
+		url = reverse('department-list')
+		first = self.client.get(url)
+		self.assertEqual(first['X-Cache'], 'MISS')
+		with self.assertNumQueries(0):
+			second = self.client.get(url)
+		self.assertEqual(second['X-Cache'], 'HIT')
+		self.assertEqual(second.content, first.content)
+		self.assertEqual(second['ETag'], first['ETag'])
+
+	def test_if_none_match_returns_304(self):
+		url = reverse('department-list')
+		etag = self.client.get(url)['ETag']
+		with self.assertNumQueries(0):
+			response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, 304)
+		self.assertEqual(response.content, b'')
+
+	def test_change_to_dependency_invalidates(self):
+		url = reverse('department-list')
+		etag = self.client.get(url)['ETag']
+		self.institute.name = 'Institute of Applied Design'
+		self.institute.save()
+		response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response['X-Cache'], 'MISS')
+		self.assertEqual(response.data['results'][0]['institute']['name'], 'Institute of Applied Design')
+
+	def test_query_parameters_are_part_of_the_key(self):
+		Semester.objects.create(name='2025W', year=2025, season='W')
+		Semester.objects.create(name='2026S', year=2026, season='S')
+		url = reverse('semester-list')
+		self.assertEqual(len(self.client.get(url).data['results']), 2)
+		self.assertEqual(len(self.client.get(url, {'season': 'W'}).data['results']), 1)
+
+	def test_m2m_change_bumps_version(self):
+		from .caching import get_model_versions
+		semester = Semester.objects.create(name='2025W', year=2025, season='W')
+		course = Course.objects.create(title='Typography', course_code='S00001', description='-')
+		before = get_model_versions([Semester])
+		course.semesters.add(semester)
+		self.assertNotEqual(get_model_versions([Semester]), before)
+
+
+class ConditionalGetTests(TestCase):
+	"""Unchanged lists and details are revalidated from their rows with one aggregate query."""
+
+	def setUp(self):
+		self.client = APIClient()
+		self.courses = create_courses(3)
+
+	def test_detail_not_modified_without_loading_rows(self):
+		url = reverse('course-detail', args=[self.courses[0].pk])
+		first = self.client.get(url)
+		self.assertEqual(first.status_code, 200)
+		self.assertIn('Last-Modified', first)
+		with self.assertNumQueries(1):
+			response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+		self.assertEqual(response.status_code, 304)
+		self.assertEqual(response['ETag'], first['ETag'])
+
+	def test_if_modified_since(self):
+		url = reverse('teacher-detail', args=[self.courses[0].teacher_id])
+		first = self.client.get(url)
+		response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+		self.assertEqual(response.status_code, 304)
+
+	def test_list_not_modified(self):
+		url = reverse('course-list')
+		first = self.client.get(url, {'teacher': self.courses[0].teacher_id})
+		with self.assertNumQueries(1):
+			response = self.client.get(
+				url, {'teacher': self.courses[0].teacher_id}, HTTP_IF_NONE_MATCH=first['ETag']
+			)
+		self.assertEqual(response.status_code, 304)
+		other = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+		self.assertEqual(other.status_code, 200)
+
+	def test_related_change_invalidates(self):
+		course = self.courses[0]
+		url = reverse('course-detail', args=[course.pk])
+		etag = self.client.get(url)['ETag']
+		course.teacher.name = 'Renamed Teacher'
+		course.teacher.save()
+		response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.data['teacher']['name'], 'Renamed Teacher')
+
+	def test_semester_membership_change_invalidates(self):
+		url = reverse('course-list')
+		etag = self.client.get(url)['ETag']
+		semester = Semester.objects.create(name='2026W', year=2026, season='W')
+		semester.courses.add(self.courses[1])
+		self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+		etag = self.client.get(url)['ETag']
+		semester.courses.clear()
+		self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+	def test_deletion_invalidates_list(self):
+		url = reverse('course-list')
+		etag = self.client.get(url)['ETag']
+		Course.objects.filter(pk=self.courses[0].pk).delete()
+		self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+	def test_validators_cost_no_query_without_conditional_headers(self):
+		url = reverse('course-list')
+		with self.assertNumQueries(2):
+			response = self.client.get(url, {'page_size': 1})
+		self.assertIn('ETag', response)
+		self.assertIn('Last-Modified', response)
+
+	def test_bulk_write_invalidates(self):
+		from django.utils import timezone
+		url = reverse('course-list')
+		etag = self.client.get(url)['ETag']
+		Teacher.objects.filter(pk=self.courses[0].teacher_id).update(name='Bulk Renamed', updated_at=timezone.now())
+		response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, 200)
+
+	def test_validators_cover_only_the_served_rows(self):
+		url = reverse('course-detail', args=[self.courses[0].pk])
+		etag = self.client.get(url)['ETag']
+		other = self.courses[2]
+		other.title = 'Renamed Course'
+		other.save()
+		self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+		# The first page (and the row after it) is unaffected by rows further on.
+		url = reverse('course-list')
+		etag = self.client.get(url, {'page_size': 1})['ETag']
+		other.title = 'Renamed Again'
+		other.save()
+		self.assertEqual(self.client.get(url, {'page_size': 1}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+		self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+	def test_missing_detail_is_404(self):
+		url = reverse('course-detail', args=[0])
+		response = self.client.get(url, HTTP_IF_NONE_MATCH='*')
+		self.assertEqual(response.status_code, 404)
+
+
+class CourseBulkTests(TestCase):
+	"""Bulk endpoint validates set-based and writes in one transaction."""
+
+	def setUp(self):
+		from django.contrib.auth.models import User
+		self.client = APIClient()
+		self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@uni-ak.ac.at', 'pw'))
+		self.url = reverse('course-bulk')
+		self.existing = create_courses(1)[0]
+		self.semester = Semester.objects.get(name='2025W')
+
+	def items(self, count, start=100):
+		return [
+			{
+				'title': f'Bulk {i}', 'course_code': f'S{i:05d}', 'description': '-',
+				'teacher': self.existing.teacher_id, 'type': self.existing.type_id,
+				'semesters': [self.semester.pk],
+			}
+			for i in range(start, start + count)
+		]
+
+	def test_create_does_not_query_per_item(self):
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.post(self.url, self.items(200), format='json')
+		self.assertEqual(response.status_code, 201)
+		self.assertEqual(response.data['count'], 200)
+		# Inserts are split only by the database's parameter limit.
+		self.assertLess(len(queries), 20)
+		course = Course.objects.get(course_code='S00100')
+		self.assertEqual(list(course.semesters.all()), [self.semester])
+		matches = search_courses(Course.objects.all(), 'Bulk 100')
+		self.assertEqual([course.course_code for course in matches], ['S00100'])
+
+	def test_errors_are_reported_per_item_and_nothing_is_written(self):
+		items = self.items(4)
+		items[1]['course_code'] = self.existing.course_code
+		items[2]['course_code'] = items[3]['course_code']
+		items[3]['teacher'] = 999999
+		items.append({'title': 'Broken', 'course_code': 'X1', 'description': '-'})
+		response = self.client.post(self.url, items, format='json')
+		self.assertEqual(response.status_code, 400)
+		errors = response.data['errors']
+		self.assertEqual(errors[0], {})
+		self.assertIn('course_code', errors[1])
+		self.assertIn('course_code', errors[2])
+		self.assertEqual(set(errors[3]), {'course_code', 'teacher'})
+		self.assertIn('course_code', errors[4])
+		self.assertEqual(Course.objects.count(), 1)
+
+	def test_update_and_delete(self):
+		created = self.client.post(self.url, self.items(3), format='json').data['ids']
+		response = self.client.patch(self.url, [
+			{'id': created[0], 'title': 'Renamed', 'semesters': []},
+			{'id': created[1], 'course_code': 'S09999'},
+		], format='json')
+		self.assertEqual(response.status_code, 200)
+		first = Course.objects.get(pk=created[0])
+		self.assertEqual(first.title, 'Renamed')
+		self.assertEqual(first.course_code, 'S00100')
+		self.assertFalse(first.semesters.exists())
+		self.assertEqual(Course.objects.get(pk=created[1]).course_code, 'S09999')
+
+		response = self.client.patch(self.url, [{'id': created[2], 'course_code': 'S09999'}], format='json')
+		self.assertEqual(response.status_code, 400)
+
+		response = self.client.delete(self.url, {'ids': created + [999999]}, format='json')
+		self.assertEqual(response.status_code, 400)
+		self.assertEqual(response.data['errors'][-1], {'id': ['Course not found.']})
+		response = self.client.delete(self.url, {'ids': created}, format='json')
+		self.assertEqual(response.data['count'], 3)
+		self.assertEqual(Course.objects.count(), 1)
+
+	def test_requires_admin(self):
+		response = APIClient().post(self.url, self.items(1), format='json')
+		self.assertIn(response.status_code, (401, 403))
+
+
+class CourseFixtureServer:
+	"""Local HTTP server serving generated course listing pages."""
+
+	def __init__(self, pages, per_page=3):
+		import hashlib
+		import threading
+		from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+		from urllib.parse import parse_qs, urlparse
+
+		self.pages = pages
+		self.per_page = per_page
+		self.failing = set()
+		self.titles = {}
+		self.summer = True
+		self.requests = []
+		self.statuses = []
+		server = self
+
+		class Handler(BaseHTTPRequestHandler):
+			def do_GET(self):
+				query = parse_qs(urlparse(self.path).query)
+				page = int(query.get('page', ['1'])[0])
+				server.requests.append(page)
+				if page in server.failing:
+					self.send_response(500)
+					self.end_headers()
+					return
+				body = server.render(page).encode('utf-8')
+				etag = '"%s"' % hashlib.sha1(body).hexdigest()
+				if self.headers.get('If-None-Match') == etag:
+					server.statuses.append(304)
+					self.send_response(304)
+					self.end_headers()
+					return
+				server.statuses.append(200)
+				self.send_response(200)
+				self.send_header('ETag', etag)
+				self.send_header('Content-Type', 'text/html; charset=utf-8')
+				self.send_header('Content-Length', str(len(body)))
+				self.end_headers()
+				self.wfile.write(body)
+
+			def log_message(self, *args):
+				pass
+
+		self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+		self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+		self.thread.start()
+		self.base_url = f'http://127.0.0.1:{self.httpd.server_port}/courses/'
+
+	def render(self, page):
+		items = []
+		if page > self.pages:
+			# Past the end of the listing
+			return '<html><body><ul></ul></body></html>'
+		for i in range((page - 1) * self.per_page, page * self.per_page):
+			items.append(
+				f'<li><a href="/courses/2025W/S{i:05d}/">{self.titles.get(i, f"Course {i}")}</a><span>Teacher {i % 2}</span>'
+				f' Studio work on topic {i}. 2025W 3 ECTS Vorlesung</li>'
+			)
+		# Course 0 is offered in the summer semester as well, listed on the last page only.
+		if self.summer and page == self.pages:
+			items.append('<li><a href="/courses/2026S/S00000/">Course 0</a><span>Teacher 0</span> 2026S</li>')
+		return f'<html><body><ul>{"".join(items)}</ul></body></html>'
+
+	def close(self):
+		self.httpd.shutdown()
+		self.httpd.server_close()
+
+
+class ScrapeCoursesTests(TestCase):
+	"""scrape_courses pipeline against a local fixture server."""
+
+	def setUp(self):
+		self.server = CourseFixtureServer(pages=4)
+		self.addCleanup(self.server.close)
+
+	def scrape(self, **options):
+		out = StringIO()
+		options.setdefault('pages', 4)
+		call_command(
+			'scrape_courses', base_url=self.server.base_url,
+			concurrency=3, stdout=out, **options
+		)
+		return out.getvalue()
+
+	def test_scrape_upserts_courses(self):
+		output = self.scrape(parse_workers=0)
+		self.assertIn('Successfully scraped 12 courses', output)
+		self.assertEqual(Course.objects.count(), 12)
+		self.assertEqual(Teacher.objects.count(), 2)
+		course = Course.objects.get(course_code='S00005')
+		self.assertEqual(course.title, 'Course 5')
+		self.assertEqual(course.teacher.name, 'Teacher 1')
+		self.assertEqual(course.type.name, 'Vorlesung')
+		self.assertEqual(course.credits, 3)
+		self.assertEqual(course.description, 'Studio work on topic 5.')
+		self.assertEqual(
+			sorted(Course.objects.get(course_code='S00000').semesters.values_list('name', flat=True)),
+			['2025W', '2026S'],
+		)
+
+		# A second run updates in place instead of duplicating.
+		self.scrape(parse_workers=0)
+		self.assertEqual(Course.objects.count(), 12)
+
+	def semesters(self, code='S00000'):
+		return sorted(Course.objects.get(course_code=code).semesters.values_list('name', flat=True))
+
+	def test_partial_runs_keep_semester_links(self):
+		self.scrape(parse_workers=0, batch_size=1, full=True)
+		self.assertEqual(self.semesters(), ['2025W', '2026S'])
+
+		# Course 0's summer listing (page 4) isn't parsed: its link stays.
+		self.server.titles[0] = 'Renamed course'
+		output = self.scrape(parse_workers=0, pages=2, restart=True, full=True)
+		self.assertIn('Successfully scraped 6 courses', output)
+		self.assertEqual(Course.objects.get(course_code='S00000').title, 'Renamed course')
+		self.assertEqual(self.semesters(), ['2025W', '2026S'])
+
+		# Neither in a run that stops at the last page without seeing the end.
+		self.server.summer = False
+		self.scrape(parse_workers=0, restart=True, full=True)
+		self.assertEqual(self.semesters(), ['2025W', '2026S'])
+
+	def test_incremental_runs_keep_semester_links(self):
+		self.scrape(parse_workers=0, full=True)
+		# Course 0's winter listing is on page 1 (304), the summer one on the
+		# changed page 4, and page 5 ends the listing.
+		self.server.titles[9] = 'Renamed course'
+		output = self.scrape(parse_workers=0, pages=5)
+		self.assertIn('Skipped 3 unchanged pages', output)
+		self.assertEqual(Course.objects.get(course_code='S00009').title, 'Renamed course')
+		self.assertEqual(self.semesters(), ['2025W', '2026S'])
+
+		self.server.summer = False
+		self.scrape(parse_workers=0, pages=5)
+		self.assertEqual(self.semesters(), ['2025W', '2026S'])
+
+	def test_complete_run_deletes_stale_semester_links(self):
+		self.scrape(parse_workers=0, full=True)
+		self.server.summer = False
+		output = self.scrape(parse_workers=0, pages=5, full=True)
+		self.assertIn('Removed 1 links', output)
+		self.assertEqual(self.semesters(), ['2025W'])
+		self.assertEqual(self.semesters('S00011'), ['2025W'])
+
+	def test_parsing_in_process_pool(self):
+		self.scrape(parse_workers=1)
+		self.assertEqual(Course.objects.count(), 12)
+
+	def test_rerun_resumes_after_failed_page(self):
+		from .models import ScrapeCheckpoint
+		from .scraping import ScrapePipeline, make_session
+
+		self.server.failing = {3}
+		pipeline = ScrapePipeline(
+			base_url=self.server.base_url, concurrency=2, parse_workers=0,
+			batch_size=1, session=make_session(2, retries=0), log=lambda message: None,
+		)
+		pipeline.run(4)
+		self.assertEqual(pipeline.failed_pages, [3])
+		checkpoint = ScrapeCheckpoint.objects.get(base_url=self.server.base_url)
+		self.assertEqual(checkpoint.last_page, 2)
+		self.assertFalse(checkpoint.completed)
+
+		self.server.failing = set()
+		self.server.requests = []
+		output = self.scrape(parse_workers=0)
+		self.assertIn('Resuming after page 2', output)
+		self.assertEqual(sorted(self.server.requests), [3, 4])
+		self.assertEqual(Course.objects.count(), 12)
+		checkpoint.refresh_from_db()
+		self.assertTrue(checkpoint.completed)
+
+	def test_unchanged_pages_and_courses_are_skipped(self):
+		self.scrape(parse_workers=0)
+		self.server.statuses = []
+		output = self.scrape(parse_workers=0)
+		self.assertEqual(self.server.statuses, [304] * 4)
+		self.assertIn('Successfully scraped 0 courses', output)
+
+		# One changed title re-parses its page but writes only that course.
+		self.server.titles[4] = 'Renamed course'
+		self.server.statuses = []
+		output = self.scrape(parse_workers=0)
+		self.assertEqual(sorted(self.server.statuses), [200, 304, 304, 304])
+		self.assertIn('Successfully scraped 1 courses', output)
+		self.assertIn('Skipped 3 unchanged pages and 2 unchanged courses', output)
+		self.assertEqual(Course.objects.get(course_code='S00004').title, 'Renamed course')
+
+		output = self.scrape(parse_workers=0, full=True)
+		self.assertIn('Successfully scraped 12 courses', output)
+
+
+class DimensionCacheTests(TestCase):
+	"""Imports resolve types/teachers/semesters from memory."""
+
+	def test_lookups_are_served_from_memory(self):
+		from .dimensions import DimensionCache
+
+		create_courses(2)
+		dimensions = DimensionCache()
+		with self.assertNumQueries(3):
+			dimensions.preload()
+		with self.assertNumQueries(0):
+			seminar = dimensions.course_type('Seminar')
+			workshop = dimensions.course_type('Workshop')
+			teacher = dimensions.teacher('Teacher 1')
+			new_teacher = dimensions.teacher('New Teacher')
+			winter = dimensions.semester('2025W')
+			new_semester = dimensions.semester('2027S')
+			self.assertIs(dimensions.course_type('Workshop'), workshop)
+		self.assertIsNotNone(seminar.pk)
+		self.assertIsNotNone(teacher.pk)
+		self.assertEqual(winter.name, '2025W')
+		self.assertIsNone(workshop.pk)
+
+		# One insert per model with new rows.
+		with self.assertNumQueries(3):
+			self.assertEqual(dimensions.flush(), 3)
+		self.assertEqual(Teacher.objects.get(pk=new_teacher.pk).email, 'new.teacher@uni-ak.ac.at')
+		self.assertEqual(Semester.objects.get(pk=new_semester.pk).season, 'S')
+		with self.assertNumQueries(0):
+			self.assertEqual(dimensions.flush(), 0)
+
+	def test_names_with_the_same_placeholder_email_share_a_teacher(self):
+		from .dimensions import DimensionCache
+
+		existing = Teacher.objects.create(name='Anna Berg', email='anna.berg@uni-ak.ac.at', subject='Art')
+		dimensions = DimensionCache()
+		first = dimensions.teacher('Dr. Jan Novak')
+		second = dimensions.teacher('Dr Jan Novak')
+		self.assertIs(second, first)
+		self.assertEqual(dimensions.teacher('Anna  Berg').pk, existing.pk)
+
+		self.assertEqual(dimensions.flush(), 1)
+		self.assertEqual(list(Teacher.objects.filter(email='dr.jan.novak@uni-ak.ac.at').values_list('name', flat=True)), ['Dr. Jan Novak'])
+		self.assertEqual(Teacher.objects.count(), 2)
+
+	def test_flush_invalidates_cached_lists(self):
+		from .dimensions import DimensionCache
+
+		client = APIClient()
+		create_courses(1)
+		self.assertNotIn('Workshop', [row['name'] for row in client.get(reverse('course-type-list')).json()['results']])
+		self.assertNotIn('New Teacher', [row['name'] for row in client.get(reverse('teacher-list')).json()['results']])
+
+		dimensions = DimensionCache()
+		dimensions.course_type('Workshop')
+		dimensions.teacher('New Teacher')
+		with self.captureOnCommitCallbacks(execute=True):
+			dimensions.flush()
+		self.assertIn('Workshop', [row['name'] for row in client.get(reverse('course-type-list')).json()['results']])
+		self.assertIn('New Teacher', [row['name'] for row in client.get(reverse('teacher-list')).json()['results']])
+
+	def test_scrape_query_count_does_not_grow_with_rows(self):
+		def count(per_page):
+			Course.objects.all().delete()
+			server = CourseFixtureServer(pages=2, per_page=per_page)
+			self.addCleanup(server.close)
+			with CaptureQueriesContext(connection) as queries:
+				call_command(
+					'scrape_courses', pages=2, base_url=server.base_url, parse_workers=0,
+					batch_size=1000, stdout=StringIO(),
+				)
+			return len(queries)
+
+		count(3)  # creates the types, teachers and semesters
+		self.assertEqual(count(3), count(25))
+
+
+class CourseExportTests(TestCase):
+	"""The export streams filtered rows in chunks."""
+
+	def setUp(self):
+		self.client = APIClient()
+		self.courses = create_courses(25)
+		self.url = reverse('course-export')
+
+	def read(self, response):
+		return b''.join(response.streaming_content).decode('utf-8')
+
+	def test_ndjson_streams_in_chunks(self):
+		import json
+		response = self.client.get(self.url, {'chunk_size': 10})
+		self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+		# one streamed SELECT plus one semester query per chunk
+		with self.assertNumQueries(4):
+			lines = self.read(response).splitlines()
+		self.assertEqual(len(lines), 25)
+		row = json.loads(lines[0])
+		self.assertEqual(row['course_code'], 'S00000')
+		self.assertEqual(row['teacher'], 'Teacher 0')
+		self.assertEqual(row['study_subject'], 'Typography I')
+		self.assertEqual(row['semesters'], ['2025W', '2026S'])
+
+	def test_filters_are_applied(self):
+		teacher_ids = [self.courses[3].teacher_id, self.courses[7].teacher_id]
+		response = self.client.get(self.url, {'teacher': teacher_ids, 'output': 'csv'})
+		self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+		lines = self.read(response).splitlines()
+		self.assertTrue(lines[0].startswith('id,course_code,title,'))
+		self.assertEqual(len(lines), 3)
+		self.assertIn('S00003,Course 3', lines[1])
+		self.assertTrue(lines[1].endswith('2025W;2026S'))
+
+	def test_unknown_output(self):
+		self.assertEqual(self.client.get(self.url, {'output': 'xml'}).status_code, 400)
+
+
+class ImportCatalogTests(TestCase):
+	"""import_catalog loads CSV/NDJSON files in chunks."""
+
+	def write(self, name, content):
+		import os
+		import tempfile
+		directory = tempfile.mkdtemp()
+		self.addCleanup(__import__('shutil').rmtree, directory)
+		path = os.path.join(directory, name)
+		with open(path, 'w', encoding='utf-8') as handle:
+			handle.write(content)
+		return path
+
+	def run_import(self, *files, **options):
+		out, err = StringIO(), StringIO()
+		call_command('import_catalog', *files, stdout=out, stderr=err, **options)
+		return out.getvalue() + err.getvalue()
+
+	def test_hierarchy_from_ndjson(self):
+		import json
+		lines = lambda records: ''.join(json.dumps(record) + '\n' for record in records)
+		files = [
+			# Given in reverse; they are imported in dependency order.
+			self.write('study_subjects.ndjson', lines([
+				{'name': 'Typography I', 'study_program': 'Bachelor Design', 'curriculum_subject': 'Typography', 'subject_type': 'seminar'},
+				{'name': 'Orphan', 'study_program': 'Bachelor Design', 'curriculum_subject': 'Unknown'},
+			])),
+			self.write('curriculum_subjects.ndjson', lines([
+				{'name': 'Typography', 'study_program': 'Bachelor Design', 'semester_number': 1, 'credits': 6},
+			])),
+			self.write('study_programs.ndjson', lines([
+				{'name': 'Bachelor Design', 'department': 'Graphics', 'description': 'Design', 'year': 2025},
+			])),
+			self.write('departments.ndjson', lines([{'name': 'Graphics', 'institute': 'Institute of Design'}])),
+			self.write('institutes.ndjson', lines([{'name': 'Institute of Design', 'description': 'Design'}])),
+		]
+		output = self.run_import(*files)
+		self.assertIn('1 invalid record(s) skipped', output)
+		self.assertIn('Unknown curriculum subject "Unknown"', output)
+		subject = StudySubject.objects.select_related('curriculum_subject__study_program__department__institute').get()
+		self.assertEqual(subject.subject_type, 'seminar')
+		self.assertEqual(subject.curriculum_subject.credits, 6)
+		self.assertEqual(subject.curriculum_subject.study_program.department.institute.name, 'Institute of Design')
+
+		# Re-importing updates rows in place.
+		self.run_import(self.write('institutes.ndjson', lines([{'name': 'Institute of Design', 'description': 'New'}])))
+		self.assertEqual(Institute.objects.filter(name='Institute of Design').get().description, 'New')
+
+	def test_export_round_trip(self):
+		create_courses(3)
+		response = APIClient().get(reverse('course-export'), {'output': 'csv'})
+		content = b''.join(response.streaming_content).decode('utf-8')
+		content = content.replace('S00001,Course 1,', 'S00001,Renamed,')
+		from .export import COLUMNS
+		new_rows = [
+			{'course_code': 'S00100', 'title': 'New course', 'type': 'Workshop', 'teacher': 'New Teacher', 'semesters': '2027S'},
+			{'course_code': 'bad', 'title': 'Invalid'},
+		]
+		for row in new_rows:
+			content += ','.join(row.get(column, '') for column in COLUMNS) + '\n'
+
+		output = self.run_import(self.write('courses.csv', content), chunk_size=2)
+		self.assertIn('1 created, 3 updated, 1 skipped', output)
+		self.assertIn('"course_code" must be S followed by 5 digits', output)
+		self.assertEqual(Course.objects.count(), 4)
+		self.assertEqual(Course.objects.get(course_code='S00001').title, 'Renamed')
+		course = Course.objects.get(course_code='S00100')
+		self.assertEqual(course.type.name, 'Workshop')
+		self.assertEqual(course.teacher.name, 'New Teacher')
+		self.assertEqual(list(course.semesters.values_list('name', flat=True)), ['2027S'])
+		self.assertEqual(
+			sorted(Course.objects.get(course_code='S00002').semesters.values_list('name', flat=True)),
+			['2025W', '2026S'],
+		)
+		self.assertEqual(Course.objects.get(course_code='S00002').study_subject.name, 'Typography I')
+		# The search index was rebuilt.
+		self.assertEqual([c.course_code for c in search_courses(Course.objects.all(), 'Renamed')], ['S00001'])
+
+	def test_query_count_grows_with_chunks_not_rows(self):
+		def count(rows):
+			Course.objects.all().delete()
+			content = 'course_code,title,teacher,semesters\n' + ''.join(
+				f'S{i:05d},Course {i},Teacher {i % 3},2025W\n' for i in range(rows)
+			)
+			with CaptureQueriesContext(connection) as queries:
+				self.run_import(self.write('courses.csv', content), chunk_size=1000)
+			return len(queries)
+
+		count(3)  # creates the teachers and semesters
+		self.assertEqual(count(3), count(300))
+
+	def test_teachers_upsert_on_email(self):
+		path = self.write('teachers.csv', 'name,email,subject\nAnna,anna@uni-ak.ac.at,Art\nBen,,Design\n')
+		self.run_import(path)
+		self.run_import(self.write('teachers.csv', 'name,email,subject\nAnna Maria,anna@uni-ak.ac.at,Art\n'))
+		self.assertEqual(Teacher.objects.count(), 2)
+		self.assertEqual(Teacher.objects.get(email='anna@uni-ak.ac.at').name, 'Anna Maria')
+		self.assertEqual(Teacher.objects.get(name='Ben').email, 'ben@uni-ak.ac.at')
+
+
+class HierarchyTests(TestCase):
+	"""/api/hierarchy/ serves a materialized tree."""
+
+	def setUp(self):
+		from django.core.cache import cache
+		cache.clear()
+		self.client = APIClient()
+		create_courses(1)
+		self.study_subject = StudySubject.objects.get()
+		self.curriculum_subject = self.study_subject.curriculum_subject
+		self.department = Department.objects.get(name='Graphics')
+
+	def test_full_tree_one_query_per_level(self):
+		import json
+		# One query per level.
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get(reverse('hierarchy'))
+		self.assertEqual(len(queries), 5)
+		tree = json.loads(response.content)
+		institute = next(node for node in tree if node['name'] == 'Institute of Design')
+		self.assertEqual(institute['type'], 'institutes')
+		path = institute['children'][0]['children'][0]['children'][0]['children'][0]
+		self.assertEqual(path['name'], 'Typography I')
+		self.assertNotIn('children', path)
+
+		# Served from the cache until a hierarchy model changes.
+		with self.assertNumQueries(0):
+			cached = self.client.get(reverse('hierarchy'))
+		self.assertEqual(cached.content, response.content)
+		with self.assertNumQueries(0):
+			self.assertEqual(
+				self.client.get(reverse('hierarchy'), HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304
+			)
+
+		self.study_subject.name = 'Typography II'
+		self.study_subject.save()
+		response = self.client.get(reverse('hierarchy'))
+		self.assertIn(b'Typography II', response.content)
+
+	def test_rows_added_while_building_are_skipped(self):
+		from .hierarchy import build_tree
+
+		def add_institute_before_second_query(execute, sql, params, many, context):
+			calls.append(sql)
+			if len(calls) == 2:
+				# Committed by another process between two level queries
+				institute = Institute.objects.create(name=f'Institute of Sound {len(calls)}')
+				Department.objects.create(name='Acoustics', institute=institute)
+			return execute(sql, params, many, context)
+
+		calls = []
+		with connection.execute_wrapper(add_institute_before_second_query):
+			tree = build_tree()
+		self.assertNotIn('Acoustics', [child['name'] for node in tree for child in node['children']])
+
+		calls.clear()
+		design = Institute.objects.get(name='Institute of Design')
+		with connection.execute_wrapper(add_institute_before_second_query):
+			tree = build_tree('institutes', design.pk)
+		self.assertEqual([child['name'] for child in tree['children']], ['Graphics'])
+
+	def test_subtree(self):
+		import json
+		url = reverse('hierarchy-subtree', args=['departments', self.department.pk])
+		with CaptureQueriesContext(connection) as queries:
+			node = json.loads(self.client.get(url).content)
+		self.assertEqual(len(queries), 4)
+		# Each level is filtered on the ids of the one above, not on nested subqueries.
+		for query in queries.captured_queries:
+			self.assertEqual(query['sql'].count('SELECT'), 1)
+		self.assertEqual(node['name'], 'Graphics')
+		self.assertEqual(node['children'][0]['children'][0]['name'], 'Typography')
+
+		url = reverse('hierarchy-subtree', args=['curriculum-subjects', self.curriculum_subject.pk])
+		node = json.loads(self.client.get(url).content)
+		self.assertEqual([child['name'] for child in node['children']], ['Typography I'])
+
+		self.assertEqual(self.client.get(reverse('hierarchy-subtree', args=['departments', 0])).status_code, 404)
+		self.assertEqual(self.client.get(reverse('hierarchy-subtree', args=['courses', 1])).status_code, 404)
+
+
+@tag('benchmark')
+class StudySubjectBenchmarkTests(TestCase):
+	"""
+	Regression benchmark: listing study subjects (API and admin) runs the
+	same number of queries with 10k rows as with 10. Latency isn't
+	asserted (wall-clock time is too noisy for CI); it's reported by
+	``manage.py benchmark_api --endpoint study-subject``.
+	"""
+
+	@classmethod
+	def setUpTestData(cls):
+		from django.contrib.auth.models import User
+		create_courses(1)
+		cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+		cls.study_program = StudyProgram.objects.get()
+
+	def seed(self, count):
+		StudySubject.objects.all().delete()
+		CurriculumSubject.objects.all().delete()
+		# 100 curriculum subjects, so every row has its own parents to load.
+		CurriculumSubject.objects.bulk_create([
+			CurriculumSubject(name=f'Subject {i}', study_program=self.study_program, semester_number=1)
+			for i in range(100)
+		])
+		curriculum_subjects = list(CurriculumSubject.objects.all())
+		StudySubject.objects.bulk_create(
+			[
+				StudySubject(name=f'Study subject {i}', curriculum_subject=curriculum_subjects[i % 100])
+				for i in range(count)
+			],
+			batch_size=1000,
+		)
+
+	def measure(self, client, url, repeat=5):
+		"""Return the number of queries of the last of ``repeat`` requests to ``url``."""
+		for _ in range(repeat):
+			with CaptureQueriesContext(connection) as queries:
+				response = client.get(url)
+			self.assertEqual(response.status_code, 200)
+		return len(queries)
+
+	def compare(self, client, url):
+		self.seed(10)
+		small_queries = self.measure(client, url)
+		self.seed(10000)
+		large_queries = self.measure(client, url)
+		self.assertEqual(small_queries, large_queries)
+		return large_queries
+
+	def test_api_lists(self):
+		client = APIClient()
+		self.assertEqual(self.compare(client, reverse('study-subject-list')), 1)
+		self.assertEqual(self.compare(client, reverse('curriculum-subject-list')), 1)
+
+	def test_admin_changelists(self):
+		from django.test import Client
+		client = Client()
+		client.force_login(self.admin)
+		self.compare(client, reverse('admin:api_studysubject_changelist'))
+		self.compare(client, reverse('admin:api_curriculumsubject_changelist'))
+
+	def test_admin_form_choices_are_joined(self):
+		from django.test import Client
+		client = Client()
+		client.force_login(self.admin)
+		self.seed(100)
+		# 100 curriculum subject options, each shown with its study program.
+		queries = self.measure(client, reverse('admin:api_studysubject_add'), repeat=1)
+		self.assertLess(queries, 10)
+
+
+class CourseAdminPerformanceTests(TestCase):
+	"""The Course changelist in performance mode."""
+
+	def setUp(self):
+		from django.contrib.auth.models import User
+		from django.test import Client
+		self.client = Client()
+		self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+		self.url = reverse('admin:api_course_changelist')
+
+	def count_queries(self, params=None):
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get(self.url, params or {})
+		self.assertEqual(response.status_code, 200)
+		return len(queries), response
+
+	def test_query_count_does_not_grow_with_rows_or_options(self):
+		create_courses(2)
+		small, _ = self.count_queries()
+		# Every course has its own teacher: none of them is loaded into the sidebar.
+		create_courses(30, start=100)
+		large, response = self.count_queries()
+		self.assertEqual(small, large)
+		self.assertContains(response, '2025W')
+		self.assertNotContains(response, 'Teacher 120</a>')
+		self.assertContains(response, 'admin-autocomplete')
+
+	def test_autocomplete_filter(self):
+		courses = create_courses(3)
+		teacher = courses[1].teacher
+		_, response = self.count_queries({'teacher__id__exact': teacher.pk})
+		self.assertEqual(list(response.context['cl'].result_list), [courses[1]])
+		# The selected teacher is rendered as the box's only option.
+		self.assertContains(response, f'<option value="{teacher.pk}" selected>Teacher 1</option>', html=True)
+
+		winter = Semester.objects.get(name='2025W')
+		_, response = self.count_queries({'semesters__id__exact': winter.pk})
+		self.assertEqual(response.context['cl'].result_count, 3)
+
+	def test_estimated_count(self):
+		from unittest import mock
+		from .admin import EstimatedCountPaginator
+		create_courses(3)
+		with mock.patch('api.admin.estimate_count', return_value=25000):
+			_, response = self.count_queries()
+			self.assertEqual(response.context['cl'].result_count, 25000)
+			self.assertFalse(response.context['cl'].show_full_result_count)
+			# Filtered lists are counted exactly.
+			_, response = self.count_queries({'q': 'Course 1'})
+			self.assertEqual(response.context['cl'].result_count, 1)
+		self.assertIsInstance(response.context['cl'].paginator, EstimatedCountPaginator)
+
+	def test_sqlite_statistics(self):
+		from .admin import estimate_count
+		if connection.vendor != 'sqlite':
+			self.skipTest('SQLite only')
+		create_courses(3)
+		with connection.cursor() as cursor:
+			cursor.execute('ANALYZE')
+		self.assertEqual(estimate_count(Course.objects.all()), 3)
+
+	def test_sqlite_statistics_skip_partial_indexes(self):
+		from .admin import estimate_count
+		if connection.vendor != 'sqlite':
+			self.skipTest('SQLite only')
+		create_courses(3)
+		Course.objects.filter(pk=Course.objects.first().pk).update(gender_diversity=True)
+		with connection.cursor() as cursor:
+			cursor.execute('ANALYZE')
+			# Put the partial index's row (1 course) first.
+			cursor.execute("SELECT idx, stat FROM sqlite_stat1 WHERE tbl = 'api_course'")
+			rows = cursor.fetchall()
+			cursor.execute("SELECT name FROM pragma_index_list('api_course') WHERE partial")
+			partial = {name for name, in cursor.fetchall()}
+			self.assertTrue(partial & {idx for idx, _ in rows})
+			cursor.execute("DELETE FROM sqlite_stat1 WHERE tbl = 'api_course'")
+			for idx, stat in sorted(rows, key=lambda row: row[0] not in partial):
+				cursor.execute("INSERT INTO sqlite_stat1 (tbl, idx, stat) VALUES ('api_course', %s, %s)", [idx, stat])
+		self.assertEqual(estimate_count(Course.objects.all()), 3)
+
+	def test_performance_mode_off(self):
+		create_courses(2)
+		with self.settings(ADMIN_PERFORMANCE_MODE=False):
+			_, response = self.count_queries()
+		self.assertNotContains(response, 'admin-autocomplete')
+		self.assertContains(response, 'Teacher 1</a>')
+		self.assertTrue(response.context['cl'].show_full_result_count)
+
+
+class MetricsTests(TestCase):
+	"""MetricsMiddleware records per-endpoint stats for /api/_metrics."""
+
+	def setUp(self):
+		from . import metrics
+		metrics.reset()
+		self.addCleanup(metrics.reset)
+		self.client = APIClient()
+		create_courses(3)
+
+	def scrape(self):
+		response = self.client.get(reverse('metrics'))
+		self.assertEqual(response.status_code, 200)
+		self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+		return response.content.decode('utf-8')
+
+	def test_requests_are_recorded_per_url_name(self):
+		self.client.get(reverse('course-list'))
+		self.client.get(reverse('course-list'))
+		self.client.get('/api/does-not-exist/')
+		text = self.scrape()
+		self.assertIn('api_requests_total{view="course-list",method="GET",status="200"} 2', text)
+		self.assertIn('api_requests_total{view="<unresolved>",method="GET",status="404"} 1', text)
+		self.assertIn('api_request_duration_seconds_count{view="course-list"} 2', text)
+		# Two queries per course list request (rows, semesters).
+		self.assertIn('api_request_db_queries_bucket{view="course-list",le="1"} 0', text)
+		self.assertIn('api_request_db_queries_bucket{view="course-list",le="2"} 2', text)
+		self.assertIn('api_request_db_queries_sum{view="course-list"} 4', text)
+		self.assertIn('api_response_size_bytes_count{view="course-list"} 2', text)
+		self.assertIn('# TYPE api_request_db_duration_seconds histogram', text)
+
+	def test_threads_write_to_their_own_shards(self):
+		import threading
+		from .metrics import Histogram
+		histogram = Histogram('test_seconds', 'Test.', ('view',), buckets=(1, 2))
+
+		def work():
+			for _ in range(1000):
+				histogram.observe(('a',), 1.5)
+
+		threads = [threading.Thread(target=work) for _ in range(4)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		self.assertEqual(histogram.collect()[('a',)], [0, 4000, 0, 6000.0])
+		self.assertIn('test_seconds_bucket{view="a",le="+Inf"} 4000', histogram.render())
+
+	def test_debug_headers(self):
+		with self.settings(METRICS_HEADERS=True):
+			response = APIClient().get(reverse('course-list'))
+		self.assertEqual(response['X-Query-Count'], '2')
+		self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="2 queries", total;dur=[\d.]+$')
+
+		with self.settings(METRICS_HEADERS=False):
+			response = APIClient().get(reverse('course-list'))
+		self.assertNotIn('X-Query-Count', response)
+
+	def test_disabled(self):
+		from . import metrics
+		with self.settings(METRICS_ENABLED=False):
+			client = APIClient()
+			client.get(reverse('course-list'))
+			self.assertEqual(client.get(reverse('metrics')).status_code, 404)
+		self.assertEqual(metrics.REQUESTS.collect(), {})
+
+
+class SlowQueryLogTests(TestCase):
+	"""Queries over the threshold are fingerprinted, explained and listed."""
+
+	def setUp(self):
+		from .slow_queries import slow_query_log
+		slow_query_log.reset()
+		self.addCleanup(slow_query_log.reset)
+		self.log = slow_query_log
+
+	def test_normalized_fingerprints(self):
+		from .slow_queries import fingerprint, normalize_sql
+		self.assertEqual(
+			normalize_sql('SELECT "a"."id" FROM "a"\n WHERE "a"."id" IN (%s, %s, %s) AND "a"."name" = \'x\' LIMIT 21'),
+			'SELECT "a"."id" FROM "a" WHERE "a"."id" IN (...) AND "a"."name" = ? LIMIT ?',
+		)
+		self.assertEqual(
+			fingerprint('SELECT * FROM "t2" WHERE id IN (%s, %s) LIMIT 1'),
+			fingerprint('SELECT * FROM "t2" WHERE id IN (%s, %s, %s, %s) LIMIT 50'),
+		)
+
+	def test_slow_queries_are_captured_and_explained(self):
+		create_courses(2)
+		with self.settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_EXPLAIN_RATE=0.5):
+			with self.assertLogs('api.slow_queries', 'WARNING'):
+				list(Course.objects.filter(title__startswith='Course'))
+				list(Course.objects.filter(title__startswith='Other'))
+		entries = [entry for entry in self.log.top() if 'FROM "api_course"' in entry['sql']]
+		self.assertEqual(len(entries), 1)
+		self.assertEqual(entries[0]['count'], 2)
+		self.assertTrue(entries[0]['plan'])
+
+	def test_top_n_keeps_the_most_expensive(self):
+		with self.settings(SLOW_QUERY_TOP_N=2):
+			from django.conf import settings
+			for index, duration in enumerate([5, 50, 20]):
+				self.log.record(f'SELECT * FROM t{"abc"[index]}', duration, 'default', top_n=settings.SLOW_QUERY_TOP_N)
+		self.assertEqual([entry['sql'] for entry in self.log.top()], ['SELECT * FROM tb', 'SELECT * FROM tc'])
+
+	def test_fast_queries_are_ignored(self):
+		with self.settings(SLOW_QUERY_THRESHOLD_MS=10000):
+			list(Course.objects.all())
+		self.assertEqual(self.log.top(), [])
+
+	def test_endpoint_is_admin_only(self):
+		from django.contrib.auth.models import User
+		self.log.record('SELECT 1', 300, 'default')
+		client = APIClient()
+		self.assertIn(client.get(reverse('slow-queries')).status_code, (401, 403))
+		client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+		response = client.get(reverse('slow-queries'), {'order': 'max'})
+		self.assertEqual(response.data['results'][0]['sql'], 'SELECT ?')
+		self.assertEqual(response.data['results'][0]['avg_ms'], 300)
+		self.assertEqual(client.delete(reverse('slow-queries')).status_code, 204)
+		self.assertEqual(self.log.top(), [])
+
+
+class CourseIndexPlanTests(TestCase):
+	"""The course list's filter + order paths are answered from indexes."""
+
+	@classmethod
+	def setUpTestData(cls):
+		from .dataset import DatasetGenerator, DatasetSize
+		size = DatasetSize(courses=2000, teachers=50, institutes=2, curriculum_subjects_per_program=2)
+		DatasetGenerator(size, seed=1).generate()
+		with connection.cursor() as cursor:
+			cursor.execute('ANALYZE')
+
+	def test_filters_use_composite_indexes(self):
+		from .management.commands.benchmark_course_indexes import course_list_cases
+		from .slow_queries import explain
+		if connection.vendor != 'sqlite':
+			self.skipTest('checks SQLite plans')
+		expected = {
+			'teacher': 'course_teacher_order_idx',
+			'type': 'course_type_order_idx',
+			'institute': 'course_institute_order_idx',
+			'department': 'course_department_order_idx',
+			'study_program': 'course_program_order_idx',
+			'gender_diversity': 'course_diverse_order_idx',
+			'semester': 'course_semesters_cover_idx',
+		}
+		for label, queryset in course_list_cases('default'):
+			sql, params = queryset[:50].query.get_compiler('default').as_sql()
+			plan = '\n'.join(explain(connection, sql, params))
+			if label in expected:
+				self.assertIn(expected[label], plan, label)
+			if label != 'semester':
+				# Rows come out of the index in list order, no sort step.
+				self.assertNotIn('TEMP B-TREE', plan, label)
+
+	def test_dataset_is_seeded(self):
+		from .dataset import DatasetGenerator, DatasetSize
+		size = DatasetSize(courses=20, teachers=50, institutes=2, curriculum_subjects_per_program=2)
+		generated = []
+		for _ in range(2):
+			for model in (Course, Teacher, CourseType, Institute):
+				model.objects.all().delete()
+			DatasetGenerator(size, seed=7).generate()
+			generated.append(list(Course.objects.order_by('pk').values_list(
+				'course_code', 'title', 'teacher__name', 'study_program__name', 'year', 'gender_diversity',
+			)))
+		self.assertEqual(len(generated[0]), 20)
+		self.assertEqual(generated[0], generated[1])
+
+
+class BenchmarkSuiteTests(TestCase):
+	"""``generate_dataset`` and the ``benchmark_api`` runner."""
+
+	def generate(self, **sizes):
+		options = {
+			'courses': 300, 'teachers': 20, 'institutes': 2, 'departments_per_institute': 2,
+			'programs_per_department': 2, 'curriculum_subjects_per_program': 2, 'years': 2,
+		}
+		options.update(sizes)
+		out = StringIO()
+		call_command('generate_dataset', seed=3, stdout=out, **options)
+		return out.getvalue()
+
+	def test_generate_dataset(self):
+		from django.core.management.base import CommandError
+		output = self.generate()
+		self.assertIn('300 courses', output)
+		self.assertEqual(Course.objects.count(), 300)
+		# Valid codes, so the courses can be edited like any other
+		self.assertFalse(Course.objects.exclude(course_code__regex=r'^S\d{5}$').exists())
+		Course.objects.first().full_clean()
+		self.assertEqual(Teacher.objects.count(), 20)
+		self.assertEqual(StudyProgram.objects.count(), 8)
+		self.assertEqual(StudySubject.objects.count(), 8 * 2 * 3)
+		# Every course sits in a consistent branch of the hierarchy.
+		course = Course.objects.select_related('study_subject__curriculum_subject__study_program__department').first()
+		program = course.study_subject.curriculum_subject.study_program
+		self.assertEqual(course.study_program, program)
+		self.assertEqual(course.department, program.department)
+		self.assertEqual(course.institute_id, program.department.institute_id)
+		self.assertTrue(course.semesters.exists())
+
+		# A second run adds to the catalog instead of clashing with it.
+		self.generate(courses=10)
+		self.assertEqual(Course.objects.count(), 310)
+		with self.assertRaisesMessage(CommandError, 'Only 99690 free course codes left'):
+			self.generate(courses=100000)
+		self.assertEqual(Course.objects.count(), 310)
+
+	def test_benchmark_api(self):
+		import json
+		import os
+		import tempfile
+		from .benchmark import discover_endpoints
+		self.generate()
+		names = [endpoint.name for endpoint in discover_endpoints()]
+		for name in ('course-list', 'course-detail', 'course-list?teacher', 'course-list?semester', 'hierarchy'):
+			self.assertIn(name, names)
+		# Admin-only detail views are left out.
+		self.assertNotIn('institute-detail', names)
+
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, 'baseline.json')
+			out = StringIO()
+			call_command('benchmark_api', requests=3, warmup=0, save=path, stdout=out)
+			self.assertIn('Benchmark finished', out.getvalue())
+			with open(path) as file:
+				report = json.load(file)
+			self.assertEqual(list(report['results']), names)
+			result = report['results']['course-list?teacher']
+			self.assertEqual(result['requests'], 3)
+			self.assertEqual(result['errors'], 0)
+			self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+			self.assertGreater(result['queries'], 0)
+
+			out = StringIO()
+			call_command('benchmark_api', requests=2, warmup=0, endpoint=['course-detail'], compare=path, stdout=out)
+			self.assertIn('course-detail', out.getvalue())
+			self.assertIn('p50 ', out.getvalue())
+			self.assertNotIn('course-list', out.getvalue())
+
+
+class AsyncReadViewTests(TestCase):
+	"""The async read views answer exactly like their sync counterparts."""
+
+	def setUp(self):
+		self.client = APIClient()
+		self.courses = create_courses(12)
+
+	async def call(self, path, method='get', **extra):
+		"""
+		Request ``path`` from the async variant of the view it resolves to;
+		the number of queries it ran is kept in ``self.queries``.
+		"""
+		from django.test import AsyncRequestFactory
+		from django.urls import resolve
+		from .middleware import QueryStats, request_query_stats
+		from .views import ASYNC_VARIANTS
+		match = resolve(path.split('?')[0])
+		request = getattr(AsyncRequestFactory(), method)(path, **extra)
+		stats = QueryStats()
+		token = request_query_stats.set(stats)
+		try:
+			response = await ASYNC_VARIANTS[match.func.view_class].as_view()(request, **match.kwargs)
+		finally:
+			request_query_stats.reset(token)
+		self.queries = stats.count
+		if hasattr(response, 'render'):
+			response.render()
+		return response
+
+	async def sync_get(self, path, **extra):
+		from asgiref.sync import sync_to_async
+		return await sync_to_async(self.client.get)(path, **extra)
+
+	def test_variants_are_async(self):
+		from .views import ASYNC_VARIANTS, read_view, CourseListView, AsyncCourseListView
+		for sync_view, async_view in ASYNC_VARIANTS.items():
+			self.assertTrue(issubclass(async_view, sync_view))
+			self.assertTrue(async_view.view_is_async, async_view)
+		with self.settings(ASYNC_VIEWS=True):
+			self.assertIs(read_view(CourseListView), AsyncCourseListView)
+		with self.settings(ASYNC_VIEWS=False):
+			self.assertIs(read_view(CourseListView), CourseListView)
+
+	async def test_lists_match_sync_views(self):
+		import json
+		course = self.courses[3]
+		first = await self.call(reverse('course-list') + '?page_size=5')
+		paths = [
+			reverse('course-list') + '?page_size=5',
+			first.data['next'].replace('http://testserver', ''),
+			reverse('course-list') + f'?teacher={course.teacher_id}',
+			reverse('course-list') + '?search=Course&page_size=3',
+			reverse('course-list') + '?paginate=false',
+			reverse('teacher-list') + '?search=Teacher 1',
+			reverse('semester-list') + '?season=W',
+			reverse('course-type-list'), reverse('study-program-list'), reverse('department-list'),
+			reverse('institute-list'), reverse('curriculum-subject-list'), reverse('study-subject-list'),
+		]
+		for path in paths:
+			expected = await self.sync_get(path)
+			response = await self.call(path)
+			self.assertEqual(response.status_code, 200, path)
+			self.assertEqual(json.loads(response.content), json.loads(expected.content), path)
+
+	async def test_detail_fetches_course_and_semesters_together(self):
+		url = reverse('course-detail', args=[self.courses[0].pk])
+		expected = await self.sync_get(url)
+		response = await self.call(url)
+		self.assertEqual(self.queries, 2)
+		self.assertEqual(response.data, expected.data)
+		self.assertEqual(len(response.data['semesters']), 2)
+		self.assertEqual(response['ETag'], expected['ETag'])
+
+		missing = await self.call(reverse('course-detail', args=[self.courses[-1].pk + 100]))
+		self.assertEqual(missing.status_code, 404)
+		write = await self.call(url, method='patch', data={'title': 'Changed'}, content_type='application/json')
+		self.assertEqual(write.status_code, 401)
+
+	async def test_conditional_get_and_cache(self):
+		url = reverse('course-list')
+		first = await self.call(url)
+		response = await self.call(url, headers={'If-None-Match': first['ETag']})
+		self.assertEqual(response.status_code, 304)
+		self.assertEqual(self.queries, 1)
+
+		url = reverse('course-type-list')
+		self.assertEqual((await self.call(url))['X-Cache'], 'MISS')
+		cached = await self.call(url)
+		self.assertEqual(cached['X-Cache'], 'HIT')
+		response = await self.call(url, headers={'If-None-Match': cached['ETag']})
+		self.assertEqual(response.status_code, 304)
+
+	async def test_metrics_count_queries_in_async_requests(self):
+		from django.test import AsyncClient
+		with self.settings(METRICS_HEADERS=True):
+			response = await AsyncClient().get(reverse('course-list'))
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response['X-Query-Count'], '2')
+
+
+class DatabaseConnectionTests(TestCase):
+	"""PostgreSQL connection settings and connection metrics."""
+
+	def load_postgresql_settings(self, pool_available=False, **environ):
+		import importlib
+		from unittest import mock
+		with mock.patch.dict('os.environ', environ), \
+				mock.patch('importlib.util.find_spec', side_effect=lambda name: object() if pool_available else None):
+			module = importlib.import_module('teaching.settings_postgresql')
+			return importlib.reload(module)
+
+	def test_persistent_connections(self):
+		settings = self.load_postgresql_settings(DB_CONN_MAX_AGE='60', DB_CONNECT_TIMEOUT='3')
+		database = settings.DATABASES['default']
+		self.assertFalse(settings.DB_POOL)
+		self.assertEqual(database['CONN_MAX_AGE'], 60)
+		self.assertTrue(database['CONN_HEALTH_CHECKS'])
+		self.assertEqual(database['OPTIONS'], {'connect_timeout': 3})
+
+	def test_pool_when_psycopg_pool_is_installed(self):
+		settings = self.load_postgresql_settings(pool_available=True, DB_POOL_MAX_SIZE='4', DB_POOL_TIMEOUT='2.5')
+		database = settings.DATABASES['default']
+		self.assertTrue(settings.DB_POOL)
+		self.assertEqual(database['CONN_MAX_AGE'], 0)
+		self.assertEqual(database['OPTIONS']['pool']['max_size'], 4)
+		self.assertEqual(database['OPTIONS']['pool']['timeout'], 2.5)
+
+		settings = self.load_postgresql_settings(pool_available=True, DB_POOL='false')
+		self.assertNotIn('pool', settings.DATABASES['default']['OPTIONS'])
+
+	def test_metrics(self):
+		from django.db.backends.signals import connection_created
+		from types import SimpleNamespace
+		from .connection_metrics import CONNECTIONS, render_pool_stats
+		before = CONNECTIONS.collect().get(('default',), [0])[0]
+		# A stand-in: the real connection is inside the test's transaction.
+		opened = SimpleNamespace(alias='default', vendor='other', execute_wrappers=[])
+		connection_created.send(sender=type(connection), connection=opened)
+		self.assertEqual(CONNECTIONS.collect()[('default',)][0], before + 1)
+		text = APIClient().get(reverse('metrics')).content.decode('utf-8')
+		self.assertIn(f'api_db_connections_total{{database="default"}} {before + 1}', text)
+
+		lines = render_pool_stats({'default': {'pool_size': 3, 'requests_num': 42}})
+		self.assertIn('# TYPE api_db_pool_pool_size gauge', lines)
+		self.assertIn('api_db_pool_pool_size{database="default"} 3', lines)
+		self.assertIn('# TYPE api_db_pool_requests_num_total counter', lines)
+		self.assertIn('api_db_pool_requests_num_total{database="default"} 42', lines)
+
+
+class SQLiteTuningTests(TestCase):
+	"""Pragmas applied to new SQLite connections."""
+
+	def open_connection(self, checkout=False):
+		import os
+		import tempfile
+		from django.db.backends.sqlite3.base import DatabaseWrapper
+		directory = tempfile.TemporaryDirectory()
+		self.addCleanup(directory.cleanup)
+		if checkout:
+			os.mkdir(os.path.join(directory.name, '.git'))
+		opened = DatabaseWrapper({**connection.settings_dict, 'NAME': os.path.join(directory.name, 'tuning.sqlite3')}, alias='tuning')
+		self.addCleanup(opened.close)
+		opened.ensure_connection()
+		return opened
+
+	def test_pragmas_on_new_connections(self):
+		from .sqlite_tuning import read_pragmas
+		with self.settings(SQLITE_PRAGMAS={'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'temp_store': 'MEMORY', 'busy_timeout': 2000}):
+			pragmas = read_pragmas(self.open_connection())
+		self.assertEqual(pragmas['journal_mode'], 'wal')
+		self.assertEqual(pragmas['synchronous'], 1)
+		self.assertEqual(pragmas['temp_store'], 2)
+		self.assertEqual(pragmas['busy_timeout'], 2000)
+
+	def test_databases_in_a_checkout_keep_their_journal_mode(self):
+		from .sqlite_tuning import read_pragmas
+		with self.settings(SQLITE_PRAGMAS={'journal_mode': 'WAL', 'synchronous': 'NORMAL'}):
+			pragmas = read_pragmas(self.open_connection(checkout=True))
+		self.assertEqual(pragmas['journal_mode'], 'delete')
+		self.assertEqual(pragmas['synchronous'], 1)
+
+	def test_tuning_disabled(self):
+		from .sqlite_tuning import read_pragmas
+		with self.settings(SQLITE_PRAGMAS={}):
+			pragmas = read_pragmas(self.open_connection())
+		self.assertEqual(pragmas['journal_mode'], 'delete')
+		self.assertEqual(pragmas['synchronous'], 2)
+
+
+class ReadReplicaTests(TestCase):
+	"""Public reads from a replica (a second SQLite file), everything else from the primary."""
+
+	@classmethod
+	def setUpClass(cls):
+		import os
+		import tempfile
+		from django.db import connections
+		cls.directory = tempfile.TemporaryDirectory()
+		path = os.path.join(cls.directory.name, 'replica.sqlite3')
+		# A copy of the test database's schema, taken before TestCase opens
+		# its transaction (VACUUM can't run in one).
+		with connection.cursor() as cursor:
+			cursor.execute('VACUUM INTO %s', [path])
+		connections.settings['replica'] = {**connection.settings_dict, 'NAME': path}
+		# Not a class attribute: the test runner checks the databases it names.
+		cls.databases = {'default', 'replica'}
+		super().setUpClass()
+
+	@classmethod
+	def tearDownClass(cls):
+		from django.db import connections
+		super().tearDownClass()
+		connections['replica'].close()
+		del connections['replica']
+		del connections.settings['replica']
+		cls.directory.cleanup()
+
+	def setUp(self):
+		Teacher.objects.create(name='Primary teacher', email='primary@uni-ak.ac.at', subject='Design')
+		Teacher.objects.using('replica').create(name='Replica teacher', email='replica@uni-ak.ac.at', subject='Design')
+
+	def replicas(self, **settings):
+		return self.settings(DATABASE_REPLICAS=['replica'], REPLICA_LAG_CHECK_INTERVAL=0, **settings)
+
+	def teacher_names(self, client):
+		response = client.get(reverse('teacher-list'), {'paginate': 'false'})
+		self.assertEqual(response.status_code, 200)
+		return sorted(teacher['name'] for teacher in response.json())
+
+	def test_public_reads_use_the_replica(self):
+		self.assertEqual(self.teacher_names(APIClient()), ['Primary teacher'])
+		with self.replicas():
+			client = APIClient()
+			self.assertEqual(self.teacher_names(client), ['Replica teacher'])
+			text = client.get(reverse('metrics')).content.decode('utf-8')
+		self.assertIn('api_db_replica_lag_seconds{database="replica"} 0', text)
+		self.assertIn('api_db_replica_requests_total{database="replica"}', text)
+
+	def test_writes_pin_the_client_to_the_primary(self):
+		from django.contrib.auth.models import User
+		with self.replicas():
+			client = APIClient()
+			client.force_authenticate(User.objects.create_superuser('admin', 'admin@uni-ak.ac.at', 'pw'))
+			response = client.post(
+				reverse('teacher-create'), {'name': 'New teacher', 'email': 'new@uni-ak.ac.at', 'subject': 'Art'}
+			)
+			self.assertEqual(response.status_code, 201)
+			self.assertIn('db_pin', response.cookies)
+			self.assertTrue(Teacher.objects.filter(name='New teacher').exists())
+			self.assertFalse(Teacher.objects.using('replica').filter(name='New teacher').exists())
+			# The client's next reads see its write
+			self.assertEqual(self.teacher_names(client), ['New teacher', 'Primary teacher'])
+
+	def test_reads_after_a_write_in_the_same_request(self):
+		from django.contrib.auth.models import User
+		from django.db import router
+		from .db_routing import request_routing, RoutingState
+		state = RoutingState()
+		state.replica = 'replica'
+		token = request_routing.set(state)
+		try:
+			self.assertEqual(router.db_for_read(Teacher), 'replica')
+			self.assertEqual(router.db_for_read(User), 'default')
+			Teacher.objects.filter(name='Primary teacher').update(subject='Art')
+			self.assertEqual(router.db_for_read(Teacher), 'default')
+		finally:
+			request_routing.reset(token)
+
+	def test_lag_guard(self):
+		from unittest import mock
+		from django.db import OperationalError
+		with self.replicas(REPLICA_MAX_LAG=5):
+			with mock.patch('api.db_routing.measure_lag', return_value=60.0):
+				self.assertEqual(self.teacher_names(APIClient()), ['Primary teacher'])
+			with mock.patch('api.db_routing.measure_lag', side_effect=OperationalError('unreachable')):
+				self.assertEqual(self.teacher_names(APIClient()), ['Primary teacher'])
+			with mock.patch('api.db_routing.measure_lag', return_value=1.0):
+				self.assertEqual(self.teacher_names(APIClient()), ['Replica teacher'])
+				# Not cached while the replica is behind
+				for _ in range(2):
+					response = APIClient().get(reverse('course-type-list'))
+					self.assertEqual(response['X-Cache'], 'MISS')
+
+	def test_views_reading_from_the_replica(self):
+		from django.test import RequestFactory
+		from rest_framework.permissions import AllowAny, IsAdminUser
+		from .db_routing import reads_from_replica
+		from .views import CourseCreateView, CourseDetailView, CourseListView, SlowQueriesView
+
+		def reads(view_class, method):
+			return reads_from_replica(view_class.as_view(), RequestFactory().generic(method, '/'), pk=1)
+
+		self.assertTrue(reads(CourseListView, 'GET'))
+		self.assertTrue(reads(CourseDetailView, 'GET'))
+		self.assertFalse(reads(CourseDetailView, 'PATCH'))
+		self.assertFalse(reads(CourseCreateView, 'POST'))
+		self.assertFalse(reads(SlowQueriesView, 'GET'))
+		# get_permissions() decides, not the permission_classes attribute
+		self.assertFalse(reads(CourseDetailView, 'HEAD'))
+
+		class AdminOnlyReadsView(CourseListView):
+			__module__ = CourseListView.__module__
+			permission_classes = [AllowAny]
+
+			def get_permissions(self):
+				return [IsAdminUser()] if self.request.method == 'GET' else super().get_permissions()
+
+		self.assertFalse(reads(AdminOnlyReadsView, 'GET'))
+		self.assertTrue(reads(AdminOnlyReadsView, 'OPTIONS'))
+
+	def test_dimension_cache_uses_its_database(self):
+		from .dimensions import DimensionCache
+		# The replica file stands in for a second database an import targets.
+		dimensions = DimensionCache(using='replica')
+		self.assertIsNotNone(dimensions.teacher('Replica teacher').pk)
+		new_teacher = dimensions.teacher('Primary teacher')
+		self.assertIsNone(new_teacher.pk)
+		with self.captureOnCommitCallbacks(using='replica', execute=True):
+			self.assertEqual(dimensions.flush(), 1)
+		self.assertTrue(Teacher.objects.using('replica').filter(pk=new_teacher.pk, name='Primary teacher').exists())
+		self.assertEqual(Teacher.objects.filter(name='Primary teacher').count(), 1)
@@ -1,6 +1,7 @@
 from django.urls import path, include
 from . import views
 from . import admin_views
+from .views.async_views import read_view
 
 
 urlpatterns = [
@@ -13,64 +14,78 @@ urlpatterns = [
 	path('admin/users/', admin_views.AdminUserListView.as_view(), name='admin-users'),
 	path('admin/users/<int:pk>/', admin_views.AdminUserDetailView.as_view(), name='admin-user-detail'),
 
-	path('courses/', views.CourseListView.as_view(), name='course-list'),
-	path('courses/<int:pk>/', views.CourseDetailView.as_view(), name='course-detail'),
+	# Monitoring
+	path('_metrics', views.MetricsView.as_view(), name='metrics'),
+	path('_slow-queries', views.SlowQueriesView.as_view(), name='slow-queries'),
+
+	# Search
+	path('autocomplete/', views.AutocompleteView.as_view(), name='autocomplete'),
+
+	path('courses/', read_view(views.CourseListView).as_view(), name='course-list'),
+	path('courses/facets/', views.CourseFacetsView.as_view(), name='course-facets'),
+	path('courses/bulk/', views.CourseBulkView.as_view(), name='course-bulk'),
+	path('courses/export/', views.CourseExportView.as_view(), name='course-export'),
+	path('courses/<int:pk>/', read_view(views.CourseDetailView).as_view(), name='course-detail'),
 	path('courses/add/', views.CourseCreateView.as_view(), name='course-create'),
 	path('courses/<int:pk>/update/', views.CourseUpdateView.as_view(), name='course-update'),
 	path('courses/<int:pk>/delete/', views.CourseDeleteView.as_view(), name='course-delete'),
 
 	# Course Types
-	path('course-types/', views.CourseTypeView.as_view(), name='course-type-list'),
+	path('course-types/', read_view(views.CourseTypeView).as_view(), name='course-type-list'),
 	path('course-types/<int:pk>/', views.CourseTypeDetailView.as_view(), name='course-type-detail'),
 	path('course-types/add/', views.CourseTypeCreateView.as_view(), name='course-type-create'),
 	path('course-types/<int:pk>/update/', views.CourseTypeUpdateView.as_view(), name='course-type-update'),
 	path('course-types/<int:pk>/delete/', views.CourseTypeDeleteView.as_view(), name='course-type-delete'),
 
 	# Study Programs
-	path('study-programs/', views.StudyProgramView.as_view(), name='study-program-list'),
+	path('study-programs/', read_view(views.StudyProgramView).as_view(), name='study-program-list'),
 	path('study-programs/<int:pk>/', views.StudyProgramDetailView.as_view(), name='study-program-detail'),
 	path('study-programs/add/', views.StudyProgramCreateView.as_view(), name='study-program-create'),
 	path('study-programs/<int:pk>/update/', views.StudyProgramUpdateView.as_view(), name='study-program-update'),
 	path('study-programs/<int:pk>/delete/', views.StudyProgramDeleteView.as_view(), name='study-program-delete'),
 
 	# Teachers
-	path('teachers/', views.TeacherListView.as_view(), name='teacher-list'),
+	path('teachers/', read_view(views.TeacherListView).as_view(), name='teacher-list'),
 	path('teachers/<int:pk>/', views.TeacherDetailView.as_view(), name='teacher-detail'),
 	path('teachers/add/', views.TeacherCreateView.as_view(), name='teacher-create'),
 	path('teachers/<int:pk>/update/', views.TeacherUpdateView.as_view(), name='teacher-update'),
 	path('teachers/<int:pk>/delete/', views.TeacherDeleteView.as_view(), name='teacher-delete'),
 
 	# Departments
-	path('departments/', views.DepartmentView.as_view(), name='department-list'),
+	path('departments/', read_view(views.DepartmentView).as_view(), name='department-list'),
 	path('departments/<int:pk>/', views.DepartmentDetailView.as_view(), name='department-detail'),
 	path('departments/add/', views.DepartmentCreateView.as_view(), name='department-create'),
 	path('departments/<int:pk>/update/', views.DepartmentUpdateView.as_view(), name='department-update'),
 	path('departments/<int:pk>/delete/', views.DepartmentDeleteView.as_view(), name='department-delete'),
 
 	# Institutes
-	path('institutes/', views.InstituteView.as_view(), name='institute-list'),
+	path('institutes/', read_view(views.InstituteView).as_view(), name='institute-list'),
 	path('institutes/<int:pk>/', views.InstituteDetailView.as_view(), name='institute-detail'),
 	path('institutes/add/', views.InstituteCreateView.as_view(), name='institute-create'),
 	path('institutes/<int:pk>/update/', views.InstituteUpdateView.as_view(), name='institute-update'),
 	path('institutes/<int:pk>/delete/', views.InstituteDeleteView.as_view(), name='institute-delete'),
 
 	# Semesters
-	path('semesters/', views.SemesterListView.as_view(), name='semester-list'),
+	path('semesters/', read_view(views.SemesterListView).as_view(), name='semester-list'),
 	path('semesters/<int:pk>/', views.SemesterDetailView.as_view(), name='semester-detail'),
 	path('semesters/add/', views.SemesterCreateView.as_view(), name='semester-create'),
 	path('semesters/<int:pk>/update/', views.SemesterUpdateView.as_view(), name='semester-update'),
 	path('semesters/<int:pk>/delete/', views.SemesterDeleteView.as_view(), name='semester-delete'),
 
 
+	# Hierarchy
+	path('hierarchy/', views.HierarchyView.as_view(), name='hierarchy'),
+	path('hierarchy/<str:level>/<int:pk>/', views.HierarchyView.as_view(), name='hierarchy-subtree'),
+
 	# Curriculum Subjects
-	path('curriculum-subjects/', views.CurriculumSubjectListView.as_view(), name='curriculum-subject-list'),
+	path('curriculum-subjects/', read_view(views.CurriculumSubjectListView).as_view(), name='curriculum-subject-list'),
 	path('curriculum-subjects/<int:pk>/', views.CurriculumSubjectDetailView.as_view(), name='curriculum-subject-detail'),
 	path('curriculum-subjects/add/', views.CurriculumSubjectCreateView.as_view(), name='curriculum-subject-create'),
 	path('curriculum-subjects/<int:pk>/update/', views.CurriculumSubjectUpdateView.as_view(), name='curriculum-subject-update'),
 	path('curriculum-subjects/<int:pk>/delete/', views.CurriculumSubjectDeleteView.as_view(), name='curriculum-subject-delete'),
 
 	# Study Subjects
-	path('study-subjects/', views.StudySubjectListView.as_view(), name='study-subject-list'),
+	path('study-subjects/', read_view(views.StudySubjectListView).as_view(), name='study-subject-list'),
 	path('study-subjects/<int:pk>/', views.StudySubjectDetailView.as_view(), name='study-subject-detail'),
 	path('study-subjects/add/', views.StudySubjectCreateView.as_view(), name='study-subject-create'),
 	path('study-subjects/<int:pk>/update/', views.StudySubjectUpdateView.as_view(), name='study-subject-update'),
@@ -11,11 +11,15 @@ from .course_views import *
 from .teacher_views import *
 from .academic_structure_views import *
 from .user_views import *
+from .search_views import *
+from .monitoring_views import *
+from .async_views import *
 
 __all__ = [
     # Course related views
     'CourseListView', 'CourseCreateView', 'CourseDetailView', 
-    'CourseUpdateView', 'CourseDeleteView',
+    'CourseUpdateView', 'CourseDeleteView', 'CourseFacetsView', 'CourseBulkView',
+    'CourseExportView',
     'CourseTypeView', 'CourseTypeCreateView', 'CourseTypeDetailView',
     'CourseTypeUpdateView', 'CourseTypeDeleteView',
     
@@ -36,7 +40,19 @@ __all__ = [
 	'CurriculumSubjectUpdateView', 'CurriculumSubjectDeleteView',
     'StudySubjectListView', 'StudySubjectCreateView', 'StudySubjectDetailView',
 	'StudySubjectUpdateView', 'StudySubjectDeleteView',
+    'HierarchyView',
 
     # User views
     'CreateUserView',
+
+    # Search views
+    'AutocompleteView',
+
+    # Monitoring views
+    'MetricsView', 'SlowQueriesView',
+
+    # Async read views
+    'AsyncCourseListView', 'AsyncCourseDetailView', 'AsyncCourseTypeView', 'AsyncTeacherListView',
+    'AsyncStudyProgramView', 'AsyncDepartmentView', 'AsyncInstituteView', 'AsyncSemesterListView',
+    'AsyncCurriculumSubjectListView', 'AsyncStudySubjectListView', 'read_view',
 ]
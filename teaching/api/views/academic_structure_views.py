@@ -6,10 +6,17 @@ This module contains views for academic structure models including:
 - StudyProgram, Department, Institute
 - Semester, CurriculumSubject, StudySubject
 - Curicculum (legacy)
+- The Institute -> ... -> StudySubject hierarchy tree
 """
 
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
 from rest_framework import generics
 from rest_framework.permissions import AllowAny, IsAdminUser
+from .base_views import EagerLoadingMixin
+from ..caching import VersionedCacheMixin
+from ..hierarchy import get_tree_json, LEVEL_NAMES
 from ..models import (
     StudyProgram, Department, Institute, Semester, 
     CurriculumSubject, StudySubject, Curicculum
@@ -25,11 +32,12 @@ from ..serializers import (
 
 
 # Study Program Views
-class StudyProgramView(generics.ListAPIView):
-    """List all study programs."""
+class StudyProgramView(VersionedCacheMixin, EagerLoadingMixin, generics.ListAPIView):
+    """List all study programs (cached, supports If-None-Match)."""
     queryset = StudyProgram.objects.all()
     serializer_class = StudyProgramSerializer
     permission_classes = [AllowAny]
+    cache_models = (StudyProgram, Department)
 
 
 class StudyProgramCreateView(generics.CreateAPIView):
@@ -39,7 +47,7 @@ class StudyProgramCreateView(generics.CreateAPIView):
     permission_classes = [IsAdminUser]
 
 
-class StudyProgramDetailView(generics.RetrieveUpdateDestroyAPIView):
+class StudyProgramDetailView(EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
     """Retrieve, update or delete a specific study program."""
     queryset = StudyProgram.objects.all()
     serializer_class = StudyProgramSerializer
@@ -61,11 +69,12 @@ class StudyProgramDeleteView(generics.DestroyAPIView):
 
 
 # Department Views
-class DepartmentView(generics.ListAPIView):
-    """List all departments."""
+class DepartmentView(VersionedCacheMixin, EagerLoadingMixin, generics.ListAPIView):
+    """List all departments (cached, supports If-None-Match)."""
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
     permission_classes = [AllowAny]
+    cache_models = (Department, Institute)
 
 
 class DepartmentCreateView(generics.CreateAPIView):
@@ -75,7 +84,7 @@ class DepartmentCreateView(generics.CreateAPIView):
     permission_classes = [IsAdminUser]
 
 
-class DepartmentDetailView(generics.RetrieveUpdateDestroyAPIView):
+class DepartmentDetailView(EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
     """Retrieve, update or delete a specific department."""
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
@@ -97,11 +106,12 @@ class DepartmentDeleteView(generics.DestroyAPIView):
 
 
 # Institute Views
-class InstituteView(generics.ListAPIView):
-    """List all institutes."""
+class InstituteView(VersionedCacheMixin, EagerLoadingMixin, generics.ListAPIView):
+    """List all institutes (cached, supports If-None-Match)."""
     queryset = Institute.objects.all()
     serializer_class = InstituteSerializer
     permission_classes = [AllowAny]
+    cache_models = (Institute,)
 
 
 class InstituteCreateView(generics.CreateAPIView):
@@ -111,7 +121,7 @@ class InstituteCreateView(generics.CreateAPIView):
     permission_classes = [IsAdminUser]
 
 
-class InstituteDetailView(generics.RetrieveUpdateDestroyAPIView):
+class InstituteDetailView(EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
     """Retrieve, update or delete a specific institute."""
     queryset = Institute.objects.all()
     serializer_class = InstituteSerializer
@@ -133,9 +143,9 @@ class InstituteDeleteView(generics.DestroyAPIView):
 
 
 # Semester Views
-class SemesterListView(generics.ListAPIView):
+class SemesterListView(VersionedCacheMixin, EagerLoadingMixin, generics.ListAPIView):
     """
-    List all semesters.
+    List all semesters (cached, supports If-None-Match).
     
     Supports filtering by:
     - year: academic year
@@ -145,9 +155,10 @@ class SemesterListView(generics.ListAPIView):
     queryset = Semester.objects.all()
     serializer_class = SemesterSerializer
     permission_classes = [AllowAny]
+    cache_models = (Semester,)
     
     def get_queryset(self):
-        queryset = Semester.objects.all()
+        queryset = super().get_queryset()
         
         # Filter by year
         year = self.request.query_params.get('year', None)
@@ -177,7 +188,7 @@ class SemesterCreateView(generics.CreateAPIView):
 	serializer_class = SemesterSerializer
 	permission_classes = [IsAdminUser]
 
-class SemesterDetailView(generics.RetrieveUpdateDestroyAPIView):
+class SemesterDetailView(EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
 	"""Retrieve, update or delete a specific semester."""
 	queryset = Semester.objects.all()
 	serializer_class = SemesterSerializer
@@ -196,7 +207,7 @@ class SemesterDeleteView(generics.DestroyAPIView):
 	permission_classes = [IsAdminUser]
 
 # CurriculumSubject Views
-class CurriculumSubjectListView(generics.ListAPIView):
+class CurriculumSubjectListView(EagerLoadingMixin, generics.ListAPIView):
     """
     List curriculum subjects with filtering.
     
@@ -208,7 +219,7 @@ class CurriculumSubjectListView(generics.ListAPIView):
     permission_classes = [AllowAny]
     
     def get_queryset(self):
-        queryset = CurriculumSubject.objects.all()
+        queryset = super().get_queryset()
         
         # Filter by study program
         study_program_ids = self.request.query_params.getlist('study_program')
@@ -225,7 +236,7 @@ class CurriculumSubjectCreateView(generics.CreateAPIView):
     permission_classes = [IsAdminUser]
 
 
-class CurriculumSubjectDetailView(generics.RetrieveUpdateDestroyAPIView):
+class CurriculumSubjectDetailView(EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
     """Retrieve, update or delete a specific curriculum subject."""
     queryset = CurriculumSubject.objects.all()
     serializer_class = CurriculumSubjectWriteSerializer
@@ -245,7 +256,7 @@ class CurriculumSubjectDeleteView(generics.DestroyAPIView):
 
 
 # StudySubject Views
-class StudySubjectListView(generics.ListAPIView):
+class StudySubjectListView(EagerLoadingMixin, generics.ListAPIView):
     """
     List study subjects with filtering.
     
@@ -257,7 +268,7 @@ class StudySubjectListView(generics.ListAPIView):
     permission_classes = [AllowAny]
     
     def get_queryset(self):
-        queryset = StudySubject.objects.all()
+        queryset = super().get_queryset()
         
         # Filter by curriculum subject
         curriculum_subject_ids = self.request.query_params.getlist('curriculum_subject')
@@ -274,7 +285,7 @@ class StudySubjectCreateView(generics.CreateAPIView):
     permission_classes = [IsAdminUser]
 
 
-class StudySubjectDetailView(generics.RetrieveUpdateDestroyAPIView):
+class StudySubjectDetailView(EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
     """Retrieve, update or delete a specific study subject."""
     queryset = StudySubject.objects.all()
     serializer_class = StudySubjectWriteSerializer
@@ -291,3 +302,37 @@ class StudySubjectDeleteView(generics.DestroyAPIView):
 	queryset = StudySubject.objects.all()
 	serializer_class = StudySubjectWriteSerializer
 	permission_classes = [IsAdminUser]
+
+
+# Hierarchy
+class HierarchyView(generics.GenericAPIView):
+    """
+    The academic hierarchy as one nested tree.
+    
+    - /hierarchy/: every institute with its departments, study programs,
+      curriculum subjects and study subjects
+    - /hierarchy/<level>/<id>/: the subtree rooted at one node, where
+      level is one of institutes, departments, study-programs,
+      curriculum-subjects or study-subjects
+    
+    The JSON is materialized in the cache and rebuilt only after one of
+    the five models changed; supports If-None-Match.
+    """
+    permission_classes = [AllowAny]
+    
+    def get(self, request, level=None, pk=None):
+        if level is not None and level not in LEVEL_NAMES:
+            raise Http404
+        etag, content = get_tree_json(level, pk)
+        etag = quote_etag(etag)
+        
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if content is not None and if_none_match and etag in parse_etags(if_none_match):
+            response = HttpResponseNotModified()
+        elif content is None:
+            raise Http404
+        else:
+            response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+        return response
@@ -0,0 +1,242 @@
+"""
+Async Read Views
+================
+
+Async variants of the public read endpoints, served when
+``settings.ASYNC_VIEWS`` is on (the default under ASGI, see
+``teaching/asgi.py``; ``read_view`` picks the variant in ``api.urls``).
+
+Each variant is its sync view on top of an async generic view, e.g.
+``AsyncCourseListView(CourseListView, AsyncListAPIView)``: the filters,
+serializers, permissions and caching mixins are shared, and the method
+resolution order puts the async generic view right before DRF's, so
+``ConditionalGetMixin.alist`` wraps ``AsyncListModelMixin.alist`` just
+as ``list`` wraps ``ListModelMixin.list``.
+
+Database and cache access goes through the async APIs (``aiterator``,
+``aget``, ``aprefetch_related_objects``, ``cache.aget``), so a slow
+client only holds the event loop while its response is streamed, not a
+thread. Django runs the queries of one request on that request's
+database thread, one after another: for a detail, the row (with its
+``select_related`` relations, e.g. the course's teacher), then each
+prefetched relation (its semesters).
+
+Writes on the detail endpoint (PUT/PATCH/DELETE) run the sync code in
+``sync_to_async``.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import router
+from django.db.models import aprefetch_related_objects
+from django.http import Http404
+from rest_framework import generics
+from rest_framework.response import Response
+
+from .academic_structure_views import (
+    CurriculumSubjectListView, DepartmentView, InstituteView, SemesterListView, StudyProgramView,
+    StudySubjectListView,
+)
+from .course_views import CourseDetailView, CourseListView, CourseTypeView
+from .teacher_views import TeacherListView
+from ..eager_loading import get_eager_loading_plan
+from ..models import Course
+from ..search import get_search_backend
+
+
+# Rows per round trip for unpaginated (``?paginate=false``) lists.
+CHUNK_SIZE = 2000
+
+
+class AsyncAPIViewMixin:
+    """
+    ``APIView.dispatch`` for views whose handlers are coroutines.
+
+    Authentication only needs the database when credentials are sent,
+    so anonymous requests are authenticated in the event loop and the
+    others in ``sync_to_async``.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            if 'HTTP_AUTHORIZATION' in request.META:
+                await sync_to_async(self.initial)(request, *args, **kwargs)
+            else:
+                self.initial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncListModelMixin:
+    """Async ``ListModelMixin``."""
+
+    async def get(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        rows = [row async for row in queryset.aiterator(chunk_size=CHUNK_SIZE)]
+        serializer = self.get_serializer(rows, many=True)
+        return Response(serializer.data)
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        paginate = getattr(self.paginator, 'apaginate_queryset', None)
+        if paginate is None:
+            return await sync_to_async(self.paginator.paginate_queryset)(queryset, self.request, view=self)
+        return await paginate(queryset, self.request, view=self)
+
+
+class AsyncRetrieveModelMixin:
+    """Async ``RetrieveModelMixin``."""
+
+    async def get(self, request, *args, **kwargs):
+        return await self.aretrieve(request, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+
+    async def aget_object(self):
+        """
+        Async ``get_object``. The row is fetched with ``aget`` and the
+        prefetched relations of the serializer's eager-loading plan with
+        ``aprefetch_related_objects``.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+
+        _, prefetch = get_eager_loading_plan(self.get_serializer_class())
+        obj = await self._aget(queryset.prefetch_related(None), filter_kwargs)
+        if prefetch:
+            await aprefetch_related_objects([obj], *prefetch)
+
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    @staticmethod
+    async def _aget(queryset, filter_kwargs):
+        # As ``get_object_or_404``, which DRF uses in ``get_object``.
+        try:
+            return await queryset.aget(**filter_kwargs)
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+
+
+class AsyncListAPIView(AsyncAPIViewMixin, AsyncListModelMixin, generics.ListAPIView):
+    """Async ``ListAPIView``."""
+
+
+class AsyncRetrieveUpdateDestroyAPIView(
+        AsyncAPIViewMixin, AsyncRetrieveModelMixin, generics.RetrieveUpdateDestroyAPIView):
+    """
+    Async ``RetrieveUpdateDestroyAPIView``. Django requires every handler
+    of an async view to be a coroutine, so the (sync) writes are run in
+    ``sync_to_async``.
+    """
+
+    async def put(self, request, *args, **kwargs):
+        return await sync_to_async(self.update)(request, *args, **kwargs)
+
+    async def patch(self, request, *args, **kwargs):
+        return await sync_to_async(self.partial_update)(request, *args, **kwargs)
+
+    async def delete(self, request, *args, **kwargs):
+        return await sync_to_async(self.destroy)(request, *args, **kwargs)
+
+
+# Course views
+class AsyncCourseListView(CourseListView, AsyncListAPIView):
+    """Async ``CourseListView``."""
+
+    async def get(self, request, *args, **kwargs):
+        if request.query_params.get('search'):
+            # Picking the search backend may query the database once.
+            await sync_to_async(get_search_backend)(router.db_for_read(Course))
+        return await super().get(request, *args, **kwargs)
+
+
+class AsyncCourseDetailView(CourseDetailView, AsyncRetrieveUpdateDestroyAPIView):
+    """Async ``CourseDetailView``."""
+
+
+class AsyncCourseTypeView(CourseTypeView, AsyncListAPIView):
+    """Async ``CourseTypeView``."""
+
+
+# Teacher views
+class AsyncTeacherListView(TeacherListView, AsyncListAPIView):
+    """Async ``TeacherListView``."""
+
+
+# Academic structure views
+class AsyncStudyProgramView(StudyProgramView, AsyncListAPIView):
+    """Async ``StudyProgramView``."""
+
+
+class AsyncDepartmentView(DepartmentView, AsyncListAPIView):
+    """Async ``DepartmentView``."""
+
+
+class AsyncInstituteView(InstituteView, AsyncListAPIView):
+    """Async ``InstituteView``."""
+
+
+class AsyncSemesterListView(SemesterListView, AsyncListAPIView):
+    """Async ``SemesterListView``."""
+
+
+class AsyncCurriculumSubjectListView(CurriculumSubjectListView, AsyncListAPIView):
+    """Async ``CurriculumSubjectListView``."""
+
+
+class AsyncStudySubjectListView(StudySubjectListView, AsyncListAPIView):
+    """Async ``StudySubjectListView``."""
+
+
+ASYNC_VARIANTS = {
+    CourseListView: AsyncCourseListView,
+    CourseDetailView: AsyncCourseDetailView,
+    CourseTypeView: AsyncCourseTypeView,
+    TeacherListView: AsyncTeacherListView,
+    StudyProgramView: AsyncStudyProgramView,
+    DepartmentView: AsyncDepartmentView,
+    InstituteView: AsyncInstituteView,
+    SemesterListView: AsyncSemesterListView,
+    CurriculumSubjectListView: AsyncCurriculumSubjectListView,
+    StudySubjectListView: AsyncStudySubjectListView,
+}
+
+
+def read_view(view_class):
+    """Return the async variant of ``view_class`` when ``settings.ASYNC_VIEWS`` is on."""
+    if getattr(settings, 'ASYNC_VIEWS', False):
+        return ASYNC_VARIANTS.get(view_class, view_class)
+    return view_class
@@ -10,6 +10,7 @@ from rest_framework import generics
 from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
+from ..eager_loading import optimize_queryset
 
 
 class BaseListView(generics.ListAPIView):
@@ -102,6 +103,20 @@ class BaseDeleteView(generics.DestroyAPIView):
 
 
 # Mixins for common functionality
+class EagerLoadingMixin:
+    """
+    Mixin to eager-load the relations read by the view's serializer.
+
+    Applies the ``select_related``/``prefetch_related`` plan derived from
+    the serializer class, so nested output costs a constant number of
+    queries regardless of the number of rows.
+    """
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return optimize_queryset(queryset, self.get_serializer_class())
+
+
 class FilterMixin:
     """
     Mixin to add common filtering functionality.
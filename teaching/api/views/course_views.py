@@ -6,15 +6,70 @@ This module contains all views related to Course and CourseType models.
 Includes list, create, detail, update, and delete operations.
 """
 
-from rest_framework import generics
+from django.db.models import Count, Q
+from django.http import StreamingHttpResponse
+from rest_framework import generics, status
 from rest_framework.permissions import AllowAny, IsAdminUser
-from ..models import Course, CourseType
+from rest_framework.response import Response
+from .base_views import EagerLoadingMixin
+from ..bulk import BulkError, create_courses, update_courses, delete_courses
+from ..caching import ConditionalGetMixin, VersionedCacheMixin
+from ..export import CHUNK_SIZE, csv_lines, iter_course_rows, ndjson_lines
+from ..models import Course, CourseType, Teacher, Institute, Department, StudyProgram, Semester
+from ..search import search_courses
 from ..serializers import (
     CourseSerializer, CourseWriteSerializer, CourseTypeSerializer
 )
 
 
-class CourseListView(generics.ListAPIView):
+class CourseFilterMixin:
+    """
+    Mixin applying the course filter query parameters to a queryset.
+    
+    Shared by the course list, facets and export endpoints so they all
+    accept the same filters.
+    """
+    
+    def filter_courses(self, queryset, exclude=()):
+        """
+        Apply the request's course filters to ``queryset``.
+        
+        Args:
+            queryset: Course queryset to filter
+            exclude: parameter names to skip (used by the facet counts)
+        """
+        params = self.request.query_params
+        
+        # Filter by gender/diversity
+        gender_diversity = params.get('gender_diversity', None)
+        if gender_diversity is not None and 'gender_diversity' not in exclude:
+            gender_diversity = gender_diversity.lower() == 'true'
+            queryset = queryset.filter(gender_diversity=gender_diversity)
+        
+        # Filter by teacher, course type, institute, department and
+        # study program (each can be multiple)
+        for param in ('teacher', 'type', 'institute', 'department', 'study_program'):
+            ids = params.getlist(param)
+            if ids and param not in exclude:
+                queryset = queryset.filter(**{f'{param}_id__in': ids})
+        
+        # Filter by semester (many-to-many relationship). A semi-join on
+        # the join table instead of a JOIN + DISTINCT over whole rows; it
+        # is answered from the (semester_id, course_id) index.
+        semester_ids = params.getlist('semester')
+        if semester_ids and 'semester' not in exclude:
+            course_ids = Course.semesters.through.objects.filter(semester_id__in=semester_ids).values('course_id')
+            queryset = queryset.filter(pk__in=course_ids)
+        
+        # Full-text search, ranked by relevance
+        search = params.get('search', None)
+        if search is not None and 'search' not in exclude:
+            queryset = search_courses(queryset, search)
+        
+        return queryset
+
+
+class CourseListView(ConditionalGetMixin, CourseFilterMixin, EagerLoadingMixin, generics.ListAPIView):
     """
     List all courses with advanced filtering capabilities.
     
@@ -26,57 +81,113 @@ class CourseListView(generics.ListAPIView):
     - department: department ID(s) - supports multiple
     - study_program: study program ID(s) - supports multiple
     - semester: semester ID(s) - supports multiple
-    - search: text search in course titles
+    - search: full-text search in title, description, course code and
+      teacher name; results are ordered by relevance
+    
+    Supports conditional GET (ETag / Last-Modified).
     """
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
     permission_classes = [AllowAny]
     
     def get_queryset(self):
-        queryset = Course.objects.all()
-        
-        # Filter by gender/diversity
-        gender_diversity = self.request.query_params.get('gender_diversity', None)
-        if gender_diversity is not None:
-            gender_diversity = gender_diversity.lower() == 'true'
-            queryset = queryset.filter(gender_diversity=gender_diversity)
-        
-        # Filter by teacher (can be multiple)
-        teacher_ids = self.request.query_params.getlist('teacher')
-        if teacher_ids:
-            queryset = queryset.filter(teacher_id__in=teacher_ids)
-        
-        # Filter by course type (can be multiple)
-        course_type_ids = self.request.query_params.getlist('type')
-        if course_type_ids:
-            queryset = queryset.filter(type_id__in=course_type_ids)
-        
-        # Filter by institute (can be multiple)
-        institute_ids = self.request.query_params.getlist('institute')
-        if institute_ids:
-            queryset = queryset.filter(institute_id__in=institute_ids)
+        return self.filter_courses(super().get_queryset())
+
+
+class CourseFacetsView(CourseFilterMixin, generics.GenericAPIView):
+    """
+    Facet counts for the course filter bar.
+    
+    Accepts the same filters as CourseListView and returns, for every
+    facet, all options with the number of matching courses. Each facet
+    is counted with every filter except its own applied, so selecting
+    one teacher still shows the counts for the other teachers.
+    
+    Every facet is one grouped query (LEFT JOIN + COUNT ... GROUP BY).
+    """
+    queryset = Course.objects.all()
+    permission_classes = [AllowAny]
+    
+    # facet name -> (option model, reverse relation to Course)
+    facets = {
+        'teacher': (Teacher, 'course'),
+        'type': (CourseType, 'course'),
+        'institute': (Institute, 'course'),
+        'department': (Department, 'course'),
+        'study_program': (StudyProgram, 'course'),
+        'semester': (Semester, 'courses'),
+    }
+    
+    def get(self, request, *args, **kwargs):
+        base = Course.objects.all()
         
-        # Filter by department (can be multiple)
-        department_ids = self.request.query_params.getlist('department')
-        if department_ids:
-            queryset = queryset.filter(department_id__in=department_ids)
+        data = {
+            'total': self.filter_courses(base).order_by().values('pk').distinct().count(),
+            'facets': {},
+        }
         
-        # Filter by study program (can be multiple)
-        study_program_ids = self.request.query_params.getlist('study_program')
-        if study_program_ids:
-            queryset = queryset.filter(study_program_id__in=study_program_ids)
+        for name, (model, relation) in self.facets.items():
+            matching = self.filter_courses(base, exclude=(name,)).order_by().values('pk')
+            options = model.objects.annotate(
+                count=Count(relation, filter=Q(**{f'{relation}__in': matching}), distinct=True)
+            ).values('id', 'name', 'count')
+            if not model._meta.ordering:
+                options = options.order_by('name')
+            data['facets'][name] = list(options)
         
-        # Filter by semester (many-to-many relationship)
-        semester_ids = self.request.query_params.getlist('semester')
-        if semester_ids:
-            queryset = queryset.filter(semesters__id__in=semester_ids).distinct()
+        matching = self.filter_courses(base, exclude=('gender_diversity',)).order_by().values('pk')
+        counts = dict(
+            Course.objects.filter(pk__in=matching)
+            .values_list('gender_diversity')
+            .annotate(count=Count('pk'))
+            .order_by()
+        )
+        data['facets']['gender_diversity'] = [
+            {'value': value, 'count': counts.get(value, 0)} for value in (True, False)
+        ]
         
-        # Search by title
-        search = self.request.query_params.get('search', None)
-        if search is not None:
-            queryset = queryset.filter(title__icontains=search)
+        return Response(data)
+
+
+class CourseExportView(CourseFilterMixin, generics.GenericAPIView):
+    """
+    Stream the filtered course catalog as NDJSON (default) or CSV.
+    
+    Accepts the same filters as CourseListView, plus:
+    - output: ndjson/csv
+    - chunk_size: rows fetched per database round trip
+    
+    Rows are streamed from ``values()`` in chunks, so memory use does
+    not depend on the number of courses.
+    """
+    queryset = Course.objects.all()
+    permission_classes = [AllowAny]
+    
+    outputs = {
+        'ndjson': ('application/x-ndjson; charset=utf-8', ndjson_lines),
+        'csv': ('text/csv; charset=utf-8', csv_lines),
+    }
+    
+    def get(self, request, *args, **kwargs):
+        output = request.query_params.get('output', 'ndjson').lower()
+        if output not in self.outputs:
+            return Response(
+                {'error': f"Unsupported output '{output}', use one of: {', '.join(self.outputs)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            chunk_size = min(max(int(request.query_params.get('chunk_size', CHUNK_SIZE)), 1), 10000)
+        except ValueError:
+            chunk_size = CHUNK_SIZE
         
-        return queryset
+        content_type, render = self.outputs[output]
+        queryset = self.filter_courses(self.get_queryset())
+        response = StreamingHttpResponse(
+            render(iter_course_rows(queryset, chunk_size)),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = f'attachment; filename="courses.{output}"'
+        return response
 
 
 class CourseCreateView(generics.CreateAPIView):
@@ -86,8 +197,8 @@ class CourseCreateView(generics.CreateAPIView):
     permission_classes = [IsAdminUser]
 
 
-class CourseDetailView(generics.RetrieveUpdateDestroyAPIView):
-    """Retrieve, update or delete a specific course."""
+class CourseDetailView(ConditionalGetMixin, EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
+    """Retrieve (supports conditional GET), update or delete a specific course."""
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
     
@@ -102,6 +213,46 @@ class CourseDetailView(generics.RetrieveUpdateDestroyAPIView):
         return [IsAdminUser()]
 
 
+class CourseBulkView(generics.GenericAPIView):
+    """
+    Create, update or delete many courses in one request (admin only).
+    
+    - POST: list of courses to create
+    - PATCH: list of partial updates, each with an ``id``
+    - DELETE: ``{"ids": [...]}``
+    
+    The whole batch is validated first and written in one transaction;
+    if any item is invalid nothing is written and ``errors`` holds one
+    entry per item (``{}`` for valid items).
+    """
+    queryset = Course.objects.all()
+    permission_classes = [IsAdminUser]
+    
+    def post(self, request, *args, **kwargs):
+        return self._write(create_courses, request.data, status.HTTP_201_CREATED)
+    
+    def patch(self, request, *args, **kwargs):
+        return self._write(update_courses, request.data, status.HTTP_200_OK)
+    
+    def delete(self, request, *args, **kwargs):
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        try:
+            count = delete_courses(ids)
+        except BulkError as exc:
+            return Response({'errors': exc.errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'message': f'{count} courses deleted successfully', 'count': count})
+    
+    def _write(self, operation, items, success_status):
+        try:
+            courses = operation(items)
+        except BulkError as exc:
+            return Response({'errors': exc.errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {'count': len(courses), 'ids': [course.pk for course in courses]},
+            status=success_status,
+        )
+
+
 class CourseUpdateView(generics.UpdateAPIView):
     """Update a specific course."""
     queryset = Course.objects.all()
@@ -117,11 +268,12 @@ class CourseDeleteView(generics.DestroyAPIView):
 
 
 # CourseType Views
-class CourseTypeView(generics.ListAPIView):
-    """List all course types."""
+class CourseTypeView(VersionedCacheMixin, EagerLoadingMixin, generics.ListAPIView):
+    """List all course types (cached, supports If-None-Match)."""
     queryset = CourseType.objects.all()
     serializer_class = CourseTypeSerializer
     permission_classes = [AllowAny]
+    cache_models = (CourseType,)
 
 
 class CourseTypeCreateView(generics.CreateAPIView):
@@ -131,7 +283,7 @@ class CourseTypeCreateView(generics.CreateAPIView):
     permission_classes = [IsAdminUser]
 
 
-class CourseTypeDetailView(generics.RetrieveUpdateDestroyAPIView):
+class CourseTypeDetailView(EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
     """Retrieve, update or delete a specific course type."""
     queryset = CourseType.objects.all()
     serializer_class = CourseTypeSerializer
@@ -0,0 +1,63 @@
+"""
+Monitoring API Views
+====================
+
+This module contains operational endpoints: the Prometheus metrics
+collected by ``api.middleware.MetricsMiddleware`` and the slow query
+table of ``api.slow_queries``.
+"""
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from rest_framework import generics, status
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.response import Response
+from .. import metrics
+from ..slow_queries import slow_query_log
+
+
+class MetricsView(generics.GenericAPIView):
+    """
+    Request metrics in the Prometheus text format (404 while
+    ``METRICS_ENABLED`` is off).
+    
+    Unauthenticated so scrapers need no credentials; it exposes route
+    names and timings only.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request, *args, **kwargs):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise Http404
+        return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class SlowQueriesView(generics.GenericAPIView):
+    """
+    The slowest query fingerprints of this process (admin only).
+    
+    Query parameters:
+    - order: total (default), max or count
+    - limit: maximum number of entries (default 20)
+    
+    DELETE clears the table.
+    """
+    permission_classes = [IsAdminUser]
+    orders = {'total': 'total_ms', 'max': 'max_ms', 'count': 'count'}
+    default_limit = 20
+
+    def get(self, request, *args, **kwargs):
+        order = self.orders.get(request.query_params.get('order'), 'total_ms')
+        try:
+            limit = max(1, int(request.query_params.get('limit', self.default_limit)))
+        except ValueError:
+            limit = self.default_limit
+        return Response({
+            'threshold_ms': getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', None),
+            'results': slow_query_log.top(limit, order),
+        })
+
+    def delete(self, request, *args, **kwargs):
+        slow_query_log.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,53 @@
+"""
+Search-related API Views
+========================
+
+This module contains search helpers that span several models,
+such as the search-as-you-type autocomplete endpoint.
+"""
+
+from rest_framework import generics
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from ..autocomplete import autocomplete_index, COURSE, TEACHER
+
+
+class AutocompleteView(generics.GenericAPIView):
+    """
+    Prefix and fuzzy suggestions for courses and teachers.
+
+    Served from the in-process autocomplete index, no database access.
+
+    Query parameters:
+    - q: text typed so far
+    - type: course and/or teacher - supports multiple (default: both)
+    - limit: maximum number of suggestions (default 10, max 50)
+    """
+    permission_classes = [AllowAny]
+    default_limit = 10
+    max_limit = 50
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '')
+
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = max(1, min(limit, self.max_limit))
+
+        kinds = {kind for kind in request.query_params.getlist('type') if kind in (COURSE, TEACHER)}
+
+        results = []
+        for score, entry in autocomplete_index.query(query, limit=limit, kinds=kinds or None):
+            result = {
+                'type': entry.kind,
+                'id': entry.id,
+                'label': entry.label,
+                'score': round(score, 3),
+            }
+            if entry.kind == COURSE:
+                result['course_code'] = entry.code
+            results.append(result)
+
+        return Response({'query': query, 'results': results})
@@ -8,11 +8,13 @@ Includes list, create, detail, update, and delete operations.
 
 from rest_framework import generics
 from rest_framework.permissions import AllowAny, IsAdminUser
+from .base_views import EagerLoadingMixin
+from ..caching import ConditionalGetMixin
 from ..models import Teacher
 from ..serializers import TeacherSerializer, TeacherWriteSerializer
 
 
-class TeacherListView(generics.ListAPIView):
+class TeacherListView(EagerLoadingMixin, generics.ListAPIView):
     """
     List all teachers with filtering capabilities.
     
@@ -24,7 +26,7 @@ class TeacherListView(generics.ListAPIView):
     permission_classes = [AllowAny]
 
     def get_queryset(self):
-        queryset = Teacher.objects.all()
+        queryset = super().get_queryset()
         
         # Filter by subject
         subject = self.request.query_params.get('subject', None)
@@ -39,7 +41,7 @@ class TeacherListView(generics.ListAPIView):
         return queryset
 
 
-class TeacherView(generics.RetrieveUpdateDestroyAPIView):
+class TeacherView(ConditionalGetMixin, EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
     """Legacy view - kept for backward compatibility."""
     queryset = Teacher.objects.all()
     serializer_class = TeacherSerializer
@@ -62,8 +64,8 @@ class TeacherCreateView(generics.CreateAPIView):
     permission_classes = [IsAdminUser]
 
 
-class TeacherDetailView(generics.RetrieveUpdateDestroyAPIView):
-    """Retrieve, update or delete a specific teacher."""
+class TeacherDetailView(ConditionalGetMixin, EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
+    """Retrieve (supports conditional GET), update or delete a specific teacher."""
     queryset = Teacher.objects.all()
     serializer_class = TeacherSerializer
     
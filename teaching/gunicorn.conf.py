@@ -0,0 +1,82 @@
+"""
+Gunicorn configuration for serving the API in production.
+
+    gunicorn -c gunicorn.conf.py
+
+Every setting can be overridden with a ``GUNICORN_*`` environment
+variable (or on the command line, which wins over this file).
+
+- Workers: ``2 x CPUs + 1`` processes, each with a few threads, so a
+  request waiting on the database doesn't hold a whole process.
+- The app is preloaded in the master before forking: Django setup and
+  the autocomplete index are built once and shared copy-on-write, and a
+  broken deploy fails at startup instead of in every worker.
+- Workers are recycled after ``max_requests`` (with jitter, so they
+  don't all restart at once) to bound memory growth, and get
+  ``graceful_timeout`` seconds to finish in-flight requests on reload.
+- Keep-alive is tuned for nginx in front (see the Dockerfile), which
+  keeps a pool of upstream connections open.
+
+Set ``GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker`` (with
+uvicorn installed) to serve ``teaching.asgi`` instead of ``teaching.wsgi``.
+"""
+
+import multiprocessing
+import os
+
+
+def _env(name, default, cast=str):
+    value = os.environ.get(f'GUNICORN_{name}')
+    return default if value in (None, '') else cast(value)
+
+
+bind = _env('BIND', '0.0.0.0:8000')
+
+worker_class = _env('WORKER_CLASS', 'gthread')
+workers = _env('WORKERS', multiprocessing.cpu_count() * 2 + 1, int)
+threads = _env('THREADS', 4, int)
+if 'uvicorn' in worker_class:
+    wsgi_app = 'teaching.asgi:application'
+else:
+    wsgi_app = 'teaching.wsgi:application'
+
+preload_app = _env('PRELOAD', 'true').lower() in ('true', '1', 'yes')
+
+max_requests = _env('MAX_REQUESTS', 2000, int)
+max_requests_jitter = _env('MAX_REQUESTS_JITTER', 200, int)
+timeout = _env('TIMEOUT', 30, int)
+graceful_timeout = _env('GRACEFUL_TIMEOUT', 30, int)
+
+# Longer than nginx's upstream keepalive_timeout (60s default), so nginx
+# always closes an idle connection first and never reuses one gunicorn
+# is closing.
+keepalive = _env('KEEPALIVE', 75, int)
+backlog = _env('BACKLOG', 2048, int)
+
+# Heartbeat files on tmpfs: a disk-backed /tmp can block workers (Docker).
+worker_tmp_dir = _env('WORKER_TMP_DIR', '/dev/shm' if os.path.isdir('/dev/shm') else None)
+
+# nginx runs in the same container.
+forwarded_allow_ips = _env('FORWARDED_ALLOW_IPS', '127.0.0.1')
+
+accesslog = _env('ACCESS_LOG', '-')
+errorlog = _env('ERROR_LOG', '-')
+loglevel = _env('LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    # Connections and psycopg pools (with their threads) opened while
+    # preloading must not be inherited by workers: close them in the
+    # master before forking. Each worker opens its own pool on demand.
+    if server.cfg.preload_app:
+        from django.db import connections
+        for connection in connections.all(initialized_only=True):
+            connection.close()
+            if getattr(connection, 'pool', None):
+                connection.close_pool()
+
+
+def post_fork(server, worker):
+    # Connections opened while preloading must not be shared by workers.
+    from django.db import connections
+    connections.close_all()
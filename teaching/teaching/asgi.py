@@ -12,5 +12,12 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'teaching.settings')
+# Serve the public read endpoints with the async views (api.views.async_views).
+os.environ.setdefault('ASYNC_VIEWS', 'true')
 
 application = get_asgi_application()
+
+# Build the in-process autocomplete index before the first request.
+from api.autocomplete import warm_up  # noqa: E402
+
+warm_up()
@@ -45,6 +45,9 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
     ),
+    # Keyset pagination; pass ?paginate=false for the legacy plain list
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
 }
 
 SIMPLE_JWT = {
@@ -67,6 +70,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -126,6 +131,89 @@ DATABASES = {
 #     }
 
 
+# SQLite tuning
+
+# Pragmas run on every new SQLite connection (api.sqlite_tuning): WAL lets
+# the API keep reading while scrape_courses/import_catalog write.
+# SQLITE_TUNING=false keeps SQLite's stock settings.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    # Negative: KiB per connection
+    'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -64 * 1024)),
+    'temp_store': 'MEMORY',
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+} if os.environ.get('SQLITE_TUNING', 'True').lower() in ('true', '1', 'yes') else {}
+
+
+# Read replicas
+
+# The public read endpoints read from the replicas (api.db_routing); writes,
+# admin and everything else use 'default'. To try it locally, point
+# DB_REPLICAS at copies of db.sqlite3, refreshed by another process (e.g.
+# `sqlite3 db.sqlite3 ".backup replica.sqlite3"`).
+DATABASE_ROUTERS = ['api.db_routing.ReplicaRouter']
+DATABASE_REPLICAS = []
+for index, path in enumerate(filter(None, os.environ.get('DB_REPLICAS', '').split(','))):
+    DATABASES[f'replica{index + 1}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{index + 1}')
+# Replicas further behind than this (seconds) are skipped
+REPLICA_MAX_LAG = float(os.environ.get('DB_REPLICA_MAX_LAG', '5'))
+REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get('DB_REPLICA_LAG_CHECK_INTERVAL', '1'))
+# Seconds a client that wrote keeps reading from the primary
+REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', '10'))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Backs the versioned API response cache and the autocomplete version.
+# Both must be shared by every worker process (see api.caching), so the
+# default is a file cache; CACHE_LOCATION moves it. Never switch to the
+# per-process LocMemCache when running more than one worker.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+    }
+}
+
+# Seconds between a worker's checks of the shared autocomplete version
+# (api.autocomplete); changes made in other workers show up after at most this
+AUTOCOMPLETE_REFRESH_INTERVAL = float(os.environ.get('AUTOCOMPLETE_REFRESH_INTERVAL', '1'))
+
+
+# Admin
+
+# Course changelist performance mode: joined/prefetched rows, autocomplete
+# filters and an estimated result count (see api.admin.PerformanceModeMixin)
+ADMIN_PERFORMANCE_MODE = True
+
+
+# Metrics
+
+# Per-endpoint latency/query stats at /api/_metrics (api.middleware.MetricsMiddleware)
+METRICS_ENABLED = True
+# Add X-Query-Count and Server-Timing headers to every response
+METRICS_HEADERS = DEBUG
+
+# Queries slower than this are logged to "api.slow_queries", explained and
+# listed at /api/_slow-queries (api.slow_queries); None disables it
+SLOW_QUERY_THRESHOLD_MS = 200
+# Share of repeated slow SELECTs whose plan is sampled again
+SLOW_QUERY_EXPLAIN_RATE = 0.1
+SLOW_QUERY_TOP_N = 50
+
+# Serve the public read endpoints with the async views in
+# api.views.async_views; on by default under ASGI (teaching/asgi.py)
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', '').lower() in ('true', '1', 'yes')
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -24,6 +24,9 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # Keyset pagination; pass ?paginate=false for the legacy plain list
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
 }
 
 SIMPLE_JWT = {
@@ -46,6 +49,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # For serving static files in production
@@ -97,6 +102,53 @@ else:
         }
     }
 
+# SQLite pragmas on every new connection (api.sqlite_tuning); ignored for PostgreSQL
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -64 * 1024)),
+    'temp_store': 'MEMORY',
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+} if os.environ.get('SQLITE_TUNING', 'True').lower() in ('true', '1', 'yes') else {}
+
+# Read replicas for the public read endpoints (api.db_routing):
+# DATABASE_REPLICA_URLS=postgres://...,postgres://...
+DATABASE_ROUTERS = ['api.db_routing.ReplicaRouter']
+DATABASE_REPLICAS = []
+for index, url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(','))):
+    import dj_database_url
+    DATABASES[f'replica{index + 1}'] = {**dj_database_url.parse(url.strip()), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica{index + 1}')
+REPLICA_MAX_LAG = float(os.environ.get('DB_REPLICA_MAX_LAG', '5'))
+REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get('DB_REPLICA_LAG_CHECK_INTERVAL', '1'))
+REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', '10'))
+
+# Cache shared by all worker processes in the container (versioned API responses)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', '/tmp/teaching_cache'),
+    }
+}
+# Seconds between a worker's checks of the shared autocomplete version (api.autocomplete)
+AUTOCOMPLETE_REFRESH_INTERVAL = float(os.environ.get('AUTOCOMPLETE_REFRESH_INTERVAL', '1'))
+
+# Course changelist performance mode (see api.admin.PerformanceModeMixin)
+ADMIN_PERFORMANCE_MODE = os.environ.get('ADMIN_PERFORMANCE_MODE', 'True').lower() in ('true', '1', 'yes')
+
+# Per-endpoint latency/query stats at /api/_metrics (api.middleware.MetricsMiddleware)
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() in ('true', '1', 'yes')
+METRICS_HEADERS = os.environ.get('METRICS_HEADERS', 'False').lower() in ('true', '1', 'yes')
+
+# Slow query log at /api/_slow-queries (api.slow_queries)
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', '200'))
+SLOW_QUERY_EXPLAIN_RATE = float(os.environ.get('SLOW_QUERY_EXPLAIN_RATE', '0.1'))
+SLOW_QUERY_TOP_N = int(os.environ.get('SLOW_QUERY_TOP_N', '50'))
+
+# Async public read views (api.views.async_views); on by default under ASGI
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'False').lower() in ('true', '1', 'yes')
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
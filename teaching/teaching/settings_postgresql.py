@@ -4,6 +4,8 @@ Inherits from base settings and overrides database configuration.
 """
 
 import os
+from importlib.util import find_spec
+
 from .settings import *
 
 # Override database configuration for PostgreSQL
@@ -15,14 +17,59 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', 'teaching_password'),
         'HOST': os.environ.get('DB_HOST', 'localhost'),
         'PORT': os.environ.get('DB_PORT', '5432'),
+        # Keep connections open between requests (per worker thread) and
+        # check them before reuse, instead of a new TCP + auth handshake
+        # for every request.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '600')),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'True').lower() in ('true', '1', 'yes'),
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', '5')),
+        },
     }
 }
 
-# Optional: Add connection pooling for better performance
-DATABASES['default']['OPTIONS'] = {
-    'MAX_CONNS': 20,
-    'MIN_CONNS': 5,
-}
+# Connection pool: psycopg 3's pool (one per worker process) replaces the
+# persistent connections when psycopg and psycopg_pool are installed.
+# DB_POOL=false keeps persistent connections. Size the pool so that
+# workers x DB_POOL_MAX_SIZE stays below Postgres' max_connections.
+# Connection and pool stats are listed at /api/_metrics
+# (api.connection_metrics).
+DB_POOL = (
+    os.environ.get('DB_POOL', 'True').lower() in ('true', '1', 'yes')
+    and find_spec('psycopg') is not None
+    and find_spec('psycopg_pool') is not None
+)
+if DB_POOL:
+    DATABASES['default']['CONN_MAX_AGE'] = 0  # the pool keeps the connections
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+        # Seconds a request waits for a free connection before failing
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+        # Seconds before idle connections above min_size are closed
+        'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', '600')),
+        # Seconds before a connection is replaced
+        'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', '3600')),
+    }
+
+# Read replicas for the public read endpoints (api.db_routing):
+# DB_REPLICA_HOSTS=host[:port],... with the primary's database, user and
+# connection settings, e.g. a streaming replica on another local port.
+DATABASE_REPLICAS = []
+for index, address in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))):
+    host, _, port = address.strip().partition(':')
+    DATABASES[f'replica{index + 1}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{index + 1}')
+
+# Slow query log (api.slow_queries) instead of logging every query
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', '200'))
+SLOW_QUERY_EXPLAIN_RATE = float(os.environ.get('SLOW_QUERY_EXPLAIN_RATE', '0.1'))
 
 # Logging configuration to help with debugging
 LOGGING = {
@@ -40,9 +87,9 @@ LOGGING = {
         },
     },
     'loggers': {
-        'django.db.backends': {
-            'handlers': ['console'],
-            'level': 'DEBUG',
+        'api.slow_queries': {
+            'handlers': ['file', 'console'],
+            'level': 'WARNING',
             'propagate': False,
         },
         'django': {